@@ -0,0 +1,110 @@
+"""
+Measure review throughput of the managers with many concurrent clients.
+
+Compares a single global lock (one stripe) with per-document lock stripes.
+Each client adds comments, resolves them and reads document comment lists,
+using the same compound flows as the web routes. A listener that blocks for
+--io-ms per event stands in for slow listener work, such as writing the
+journal; listeners run after the document's lock is released.
+
+Usage:
+    python -m benchmarks.bench_concurrency [--clients N] [--documents N] [--ops N] [--io-ms MS]
+"""
+
+import argparse
+import io
+import tempfile
+import threading
+import time
+
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.core.locks import LockStripes
+from src.core.statistics import ReviewStatistics
+from src.models.document import DocumentStatus, DocumentType
+
+
+def review(document_manager: DocumentManager, comment_manager: CommentManager,
+           document_id: str, index: int):
+    """Add a comment and resolve it the way the add and resolve routes do."""
+    with document_manager.lock_document(document_id):
+        comment = comment_manager.add_comment(document_id, f"Comment {index}")
+        if document_manager.get_document(document_id).status == DocumentStatus.UPLOADED:
+            document_manager.update_document_status(document_id, DocumentStatus.IN_REVIEW)
+    comment_manager.get_comments_for_document(document_id)
+    with document_manager.lock_document(document_id):
+        comment_manager.resolve_comment(comment.id, "Done", "Reviewer")
+        if not comment_manager.get_open_comments_for_document(document_id):
+            document_manager.update_document_status(document_id, DocumentStatus.REVIEWED)
+
+
+def run(stripes: int, clients: int, documents: int, ops: int, io_ms: float):
+    """Run the workload once; return (reviews per second, consistency errors)."""
+    locks = LockStripes(stripes)
+    document_manager = DocumentManager(tempfile.mkdtemp(), locks=locks)
+    comment_manager = CommentManager(locks=locks)
+    stats = ReviewStatistics()
+    stats.attach(document_manager, comment_manager)
+    if io_ms:
+        comment_manager.add_listener(lambda event, comment, previous: time.sleep(io_ms / 1000))
+    document_ids = [
+        document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), f'doc-{n}.pdf', DocumentType.OTHER).id
+        for n in range(documents)
+    ]
+    
+    barrier = threading.Barrier(clients + 1)
+    
+    def client(number: int):
+        barrier.wait()
+        for op in range(ops):
+            document_id = document_ids[(number * ops + op) % documents]
+            review(document_manager, comment_manager, document_id, op)
+    
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    errors = 0
+    if len(comment_manager.comments) != clients * ops:
+        errors += 1
+    rebuilt = ReviewStatistics()
+    rebuilt.rebuild(document_manager, comment_manager)
+    if rebuilt.comments_by_status != stats.comments_by_status:
+        errors += 1
+    for document_id in document_ids:
+        if document_manager.get_document(document_id).status != DocumentStatus.REVIEWED:
+            errors += 1
+    return clients * ops / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=32,
+                        help='Concurrent client threads')
+    parser.add_argument('--documents', type=int, default=64,
+                        help='Documents the clients spread their reviews over')
+    parser.add_argument('--ops', type=int, default=100,
+                        help='Reviews per client')
+    parser.add_argument('--io-ms', type=float, default=0.5,
+                        help='Milliseconds each comment event blocks its listener')
+    parser.add_argument('--stripes', type=int, nargs='+', default=[1, 64],
+                        help='Lock stripe counts to compare (1 is a global lock)')
+    args = parser.parse_args()
+    
+    print(f"{args.clients} clients, {args.documents} documents, {args.ops} reviews each, "
+          f"{args.io_ms:g} ms blocking per event")
+    baseline = None
+    for stripes in args.stripes:
+        rate, errors = run(stripes, args.clients, args.documents, args.ops, args.io_ms)
+        baseline = baseline or rate
+        print(f"{stripes:>4} stripes: {rate:8.0f} reviews/s  x{rate / baseline:.2f}  "
+              f"({errors} consistency errors)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark near-duplicate lookups against an index of many documents.
+
+Usage:
+    python -m benchmarks.bench_duplicates [--documents N] [--words N]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from src.core.document_manager import DocumentManager
+from src.core.duplicates import DuplicateIndex
+
+
+def make_text(rng: random.Random, vocabulary, words: int) -> str:
+    """Generate random filler text."""
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--documents', type=int, default=50000,
+                        help='Number of indexed documents')
+    parser.add_argument('--words', type=int, default=2000,
+                        help='Words per document')
+    args = parser.parse_args()
+    
+    rng = random.Random(1)
+    vocabulary = [f"term{n}" for n in range(20000)]
+    index = DuplicateIndex(DocumentManager(tempfile.mkdtemp()))
+    
+    # Signing is per document and doesn't depend on index size; time a sample
+    texts = [make_text(rng, vocabulary, args.words) for _ in range(100)]
+    start = time.perf_counter()
+    signatures = [index.signature(text) for text in texts]
+    sign_ms = (time.perf_counter() - start) / len(texts) * 1000
+    
+    # Fill the index with random signatures; unrelated documents rarely share a band
+    random_signatures = np.random.default_rng(1).integers(
+        0, 2 ** 32, (args.documents, index.num_perm), dtype=np.uint32
+    )
+    start = time.perf_counter()
+    for n, signature in enumerate(random_signatures):
+        index.add(f"doc-{n}", signature)
+    for n, signature in enumerate(signatures):
+        index.add(f"text-{n}", signature)
+    add_us = (time.perf_counter() - start) / len(index) * 1e6
+    
+    # Query near duplicates: each sample text with 2% of its words replaced
+    queries = []
+    for text in texts:
+        words = text.split()
+        for i in rng.sample(range(len(words)), len(words) // 50):
+            words[i] = rng.choice(vocabulary)
+        queries.append(index.signature(" ".join(words)))
+    start = time.perf_counter()
+    found = sum(1 for n, q in enumerate(queries) if any(d == f"text-{n}" for d, _ in index.query(q)))
+    query_us = (time.perf_counter() - start) / len(queries) * 1e6
+    
+    stacked = np.stack(list(index._signatures.values()))
+    start = time.perf_counter()
+    for query in queries[:10]:
+        (stacked == query).mean(axis=1)
+    brute_us = (time.perf_counter() - start) / 10 * 1e6
+    
+    print(f"{len(index)} documents indexed, {args.words} words per document")
+    print(f"  sign:              {sign_ms:8.2f} ms per document")
+    print(f"  add:               {add_us:8.1f} us per document")
+    print(f"  LSH query:         {query_us:8.1f} us per lookup ({found}/{len(queries)} found)")
+    print(f"  brute-force scan:  {brute_us:8.1f} us per lookup")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark memory use and construction time of pydantic models vs. records.
+
+Usage:
+    python -m benchmarks.bench_models [--count N]
+"""
+
+import argparse
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+from src.models.document import Comment, CommentStatus
+from src.models.records import CommentRecord
+
+
+def build(factory, count: int, document_ids, comment_ids):
+    """Construct count comments with factory."""
+    return [
+        factory(
+            id=comment_ids[i],
+            document_id=document_ids[i % len(document_ids)],
+            text="Provide clearance dimensions for the medication room.",
+            page_number=i % 40 + 1,
+            created_at=datetime.now(),
+            status=CommentStatus.OPEN,
+        )
+        for i in range(count)
+    ]
+
+
+def measure(factory, count: int, document_ids):
+    """Return (seconds, bytes) to construct and hold count comments."""
+    comment_ids = [str(uuid.uuid4()) for _ in range(count)]
+    
+    start = time.perf_counter()
+    objects = build(factory, count, document_ids, comment_ids)
+    elapsed = time.perf_counter() - start
+    del objects
+    
+    tracemalloc.start()
+    objects = build(factory, count, document_ids, comment_ids)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return elapsed, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=200000,
+                        help='Number of comments to construct')
+    args = parser.parse_args()
+
+    document_ids = [str(uuid.uuid4()) for _ in range(200)]
+
+    results = {}
+    for name, factory in [('pydantic Comment', Comment), ('CommentRecord', CommentRecord)]:
+        elapsed, allocated = measure(factory, args.count, document_ids)
+        results[name] = (elapsed, allocated)
+        print(f"{name:>17}: {elapsed:.3f}s  {allocated / args.count:.0f} B/comment  "
+              f"({allocated / 2 ** 20:.1f} MiB total)")
+
+    model_time, model_bytes = results['pydantic Comment']
+    record_time, record_bytes = results['CommentRecord']
+    print(f"\nconstruction x{model_time / record_time:.2f} faster, "
+          f"memory x{model_bytes / record_bytes:.2f} smaller")
+
+
+if __name__ == '__main__':
+    main()
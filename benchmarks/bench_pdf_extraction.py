@@ -0,0 +1,73 @@
+"""
+Benchmark serial vs. parallel PDF text extraction.
+
+Usage:
+    python -m benchmarks.bench_pdf_extraction [PDF ...] [--pages N] [--repeat N]
+
+With no PDF paths a synthetic document of --pages pages is generated.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from src.utils.document_processor import PDFProcessor
+
+WORKER_COUNTS = [1, 2, 4, 8]
+
+
+def generate_pdf(path: str, pages: int):
+    """Write a text-heavy PDF with the given number of pages."""
+    pdf = canvas.Canvas(path, pagesize=letter)
+    for page in range(pages):
+        text = pdf.beginText(40, 740)
+        for line in range(50):
+            text.textLine(f"Page {page + 1} line {line + 1}: room data sheet, "
+                          f"medical gas outlets, infection control risk assessment")
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+
+
+def time_extraction(path: str, workers: int, repeat: int) -> float:
+    """Return the best wall time over repeat runs."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        PDFProcessor(path, max_workers=workers).extract_text()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pdfs', nargs='*', help='PDF files to benchmark')
+    parser.add_argument('--pages', type=int, default=200,
+                        help='Pages in the synthetic PDF')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per configuration (best is reported)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdfs = args.pdfs
+        if not pdfs:
+            path = os.path.join(tmp_dir, 'synthetic.pdf')
+            generate_pdf(path, args.pages)
+            pdfs = [path]
+
+        print(f"CPUs available: {os.cpu_count()}")
+        for path in pdfs:
+            print(f"\n{os.path.basename(path)}")
+            baseline = None
+            for workers in WORKER_COUNTS:
+                elapsed = time_extraction(path, workers, args.repeat)
+                baseline = baseline or elapsed
+                print(f"  workers={workers}: {elapsed:.3f}s  speedup x{baseline / elapsed:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark PDF file access: per-call buffered opens vs. a shared mapped buffer.
+
+Counts read() syscalls from /proc/self/io (Linux), page faults and wall
+time for an extract + metadata + page-count sequence, as a sandbox
+extraction job does.
+
+A memory-mapped file makes no read() calls, but its pages are still
+brought in through page faults: minor ones when the file is in the page
+cache, major ones when it has to be read from storage. Compare both
+columns, not read syscalls alone.
+
+Usage:
+    python -m benchmarks.bench_pdf_io [PDF ...] [--pages N]
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+import PyPDF2
+
+from benchmarks.bench_pdf_extraction import generate_pdf
+from src.utils.document_processor import MMAP_THRESHOLD, PDFProcessor
+
+
+def read_syscalls() -> int:
+    """Read syscalls made by this process so far."""
+    with open('/proc/self/io') as f:
+        for line in f:
+            if line.startswith('syscr:'):
+                return int(line.split()[1])
+    return 0
+
+
+def buffered_open_path(path: str):
+    """The previous access pattern: a fresh buffered open per call."""
+    with open(path, 'rb') as file:
+        text = "".join(page.extract_text() + "\n" for page in PyPDF2.PdfReader(file).pages)
+    with open(path, 'rb') as file:
+        metadata = dict(PyPDF2.PdfReader(file).metadata or {})
+    with open(path, 'rb') as file:
+        page_count = len(PyPDF2.PdfReader(file).pages)
+    return text, metadata, page_count
+
+
+def shared_buffer_path(path: str):
+    """The current access pattern: one processor, one buffer, one reader."""
+    with PDFProcessor(path, max_workers=1) as processor:
+        return processor.extract_text(), processor.get_metadata(), processor.get_page_count()
+
+
+def page_faults():
+    """(minor, major) page faults of this process so far."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_minflt, usage.ru_majflt
+
+
+def measure(func, path: str):
+    """Return (read syscalls, minor faults, major faults, seconds) for one call of func."""
+    overhead = read_syscalls()
+    overhead = read_syscalls() - overhead
+    before = read_syscalls()
+    minor_before, major_before = page_faults()
+    start = time.perf_counter()
+    func(path)
+    elapsed = time.perf_counter() - start
+    minor_after, major_after = page_faults()
+    return (read_syscalls() - before - overhead, minor_after - minor_before,
+            major_after - major_before, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pdfs', nargs='*', help='PDF files to benchmark')
+    parser.add_argument('--pages', type=int, nargs='+', default=[20, 2000],
+                        help='Page counts of synthetic PDFs')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdfs = args.pdfs
+        if not pdfs:
+            pdfs = []
+            for pages in args.pages:
+                path = os.path.join(tmp_dir, f'synthetic-{pages}.pdf')
+                generate_pdf(path, pages)
+                pdfs.append(path)
+        
+        for path in pdfs:
+            size = os.path.getsize(path)
+            mode = 'mmap' if size >= MMAP_THRESHOLD else 'bulk read'
+            print(f"\n{os.path.basename(path)} ({size / 2 ** 20:.1f} MiB, {mode})")
+            assert buffered_open_path(path) == shared_buffer_path(path)
+            for name, func in [('buffered open per call', buffered_open_path),
+                               ('shared buffer', shared_buffer_path)]:
+                syscalls, minor, major, elapsed = measure(func, path)
+                print(f"  {name:>22}: {syscalls:6d} read syscalls  {minor:7d} minor / "
+                      f"{major:5d} major faults  {elapsed:.3f}s")
+
+
+if __name__ == '__main__':
+    main()
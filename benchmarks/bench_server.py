@@ -0,0 +1,108 @@
+"""
+Load-test the production server and report requests per second by thread count.
+
+Usage:
+    python -m benchmarks.bench_server [--threads 1 4 16] [--clients N] [--seconds N]
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+HOST = '127.0.0.1'
+
+
+def wait_until_ready(port: int, timeout: float = 30):
+    """Poll the server until it answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(HOST, port, timeout=2)
+            connection.request('GET', '/api/stats')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def client(port: int, path: str, seconds: float, results):
+    """Send requests over one keep-alive connection for the given time."""
+    connection = http.client.HTTPConnection(HOST, port, timeout=10)
+    count = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                count += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(HOST, port, timeout=10)
+    results.put((count, errors))
+
+
+def run(threads: int, clients: int, seconds: float, path: str, port: int):
+    """Start a server with the given threads and load it; return (req/s, errors)."""
+    directory = tempfile.mkdtemp()
+    env = dict(os.environ, UPLOAD_FOLDER=os.path.join(directory, 'uploads'),
+               REPORTS_FOLDER=os.path.join(directory, 'reports'))
+    env.pop('JOURNAL_DIR', None)
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'src.run', '--production', '--port', str(port),
+         '--threads', str(threads)],
+        cwd=directory, env=dict(env, PYTHONPATH=os.getcwd()),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port)
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=client, args=(port, path, seconds, results))
+            for _ in range(clients)
+        ]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+    return sum(c for c, _ in totals) / seconds, sum(e for _, e in totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16],
+                        help='Request thread counts to compare')
+    parser.add_argument('--clients', type=int, default=16,
+                        help='Concurrent client processes')
+    parser.add_argument('--seconds', type=float, default=10,
+                        help='Duration of each run')
+    parser.add_argument('--path', default='/',
+                        help='Path to request (the dashboard renders a template per request)')
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients, GET {args.path}, {args.seconds:g}s per run")
+    baseline = None
+    for threads in args.threads:
+        rate, errors = run(threads, args.clients, args.seconds, args.path, args.port)
+        baseline = baseline or rate
+        print(f"{threads:>3} threads: {rate:8.0f} req/s  x{rate / baseline:.2f}  ({errors} errors)")
+
+
+if __name__ == '__main__':
+    main()
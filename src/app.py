@@ -3,19 +3,60 @@ Main application file for DocProcessor.
 """
 
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory
+import sys
+import json
+import atexit
+from datetime import datetime
+from flask import (Flask, render_template, request, redirect, url_for, flash,
+                   send_from_directory, make_response, session, jsonify,
+                   Response, has_request_context, send_file, abort)
 from flask_bootstrap import Bootstrap5
+from markupsafe import Markup
+from pydantic import ValidationError
 from werkzeug.utils import secure_filename
 
 from src.models.document import DocumentType, DocumentStatus, CommentStatus
+from src.models.batch import (AddCommentOperation, BatchRequest, ResolveCommentOperation,
+                              UpdateDocumentStatusOperation)
+from src.models.forms import (AttachVersionForm, CommentForm, DocumentStatusForm,
+                              ResolutionForm, UploadForm)
 from src.core.document_manager import DocumentManager
 from src.core.comment_manager import CommentManager
+from src.core.render_cache import RenderCache
+from src.core.batch import BatchProcessor, BatchError
+from src.core.statistics import ReviewStatistics
+from src.core.live_updates import LiveUpdateBroker
+from src.core.journal import Journal
+from src.core.anchoring import AnchorIndex
+from src.core.duplicates import DuplicateIndex
+from src.core.reports import ReportEngine, ReportFormat, MIMETYPES
+from src.utils.sandbox import ExtractionSandbox, validate_document
 
 # Initialize Flask application
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-for-development-only')
 app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB max upload
+app.config['JOURNAL_DIR'] = os.environ.get('JOURNAL_DIR')  # Unset disables persistence
+# Stored files never change (new versions get new ids), so downloads can be cached
+app.config['DOWNLOAD_MAX_AGE'] = int(os.environ.get('DOWNLOAD_MAX_AGE', 24 * 60 * 60))
+# Limits for each sandboxed extraction job
+app.config['EXTRACTION_CPU_SECONDS'] = int(os.environ.get('EXTRACTION_CPU_SECONDS', 30))
+app.config['EXTRACTION_MEMORY_MB'] = int(os.environ.get('EXTRACTION_MEMORY_MB', 1024))
+app.config['EXTRACTION_TIMEOUT'] = float(os.environ.get('EXTRACTION_TIMEOUT', 60))
+app.config['EXTRACTION_PAGE_WORKERS'] = int(os.environ.get('EXTRACTION_PAGE_WORKERS',
+                                                           min(4, os.cpu_count() or 1)))
+# Production server (src/run.py --production): worker processes and threads per worker.
+# Documents and comments live in process memory, so only one worker is supported.
+app.config['WEB_THREADS'] = int(os.environ.get('WEB_THREADS', 16))
+# Live update streams open at once; each holds a request thread while connected
+app.config['LIVE_UPDATE_MAX_STREAMS'] = int(os.environ.get('LIVE_UPDATE_MAX_STREAMS',
+                                                           max(1, app.config['WEB_THREADS'] // 2)))
+# Seconds workers get to finish in-flight requests on shutdown or reload
+app.config['GRACEFUL_TIMEOUT'] = float(os.environ.get('GRACEFUL_TIMEOUT', 30))
+app.config['REPORTS_FOLDER'] = os.environ.get('REPORTS_FOLDER', 'reports')
+# Exports with more comments than this are built in the background
+app.config['REPORT_BACKGROUND_ROWS'] = int(os.environ.get('REPORT_BACKGROUND_ROWS', 5000))
 
 # Initialize extensions
 bootstrap = Bootstrap5(app)
@@ -24,8 +65,33 @@ bootstrap = Bootstrap5(app)
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Initialize managers
-document_manager = DocumentManager(app.config['UPLOAD_FOLDER'])
-comment_manager = CommentManager()
+document_manager = DocumentManager(app.config['UPLOAD_FOLDER'], sandbox=ExtractionSandbox(
+    cpu_seconds=app.config['EXTRACTION_CPU_SECONDS'],
+    memory_bytes=app.config['EXTRACTION_MEMORY_MB'] * 1024 * 1024,
+    timeout=app.config['EXTRACTION_TIMEOUT'],
+    page_workers=app.config['EXTRACTION_PAGE_WORKERS']
+))
+comment_manager = CommentManager(locks=document_manager.locks)
+render_cache = RenderCache()
+batch_processor = BatchProcessor(document_manager, comment_manager)
+review_statistics = ReviewStatistics()
+review_statistics.attach(document_manager, comment_manager)
+
+# Restore persisted state before anything else listens for changes
+journal = None
+if app.config['JOURNAL_DIR']:
+    journal = Journal(app.config['JOURNAL_DIR'])
+    recovery_report = journal.recover(document_manager, comment_manager)
+    app.logger.info(f"Journal recovery took {recovery_report['seconds']:.3f}s")
+    review_statistics.rebuild(document_manager, comment_manager)
+    journal.attach(document_manager, comment_manager)
+    atexit.register(journal.close)
+live_updates = LiveUpdateBroker(max_subscribers=app.config['LIVE_UPDATE_MAX_STREAMS'])
+anchor_index = AnchorIndex(document_manager, comment_manager)
+duplicate_index = DuplicateIndex(document_manager)
+duplicate_index.submit_rebuild()
+report_engine = ReportEngine(document_manager, comment_manager, app.config['REPORTS_FOLDER'])
+anchor_index.attach()
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc', 'xlsx', 'xls'}
@@ -34,16 +100,85 @@ def allowed_file(filename):
     """Check if a filename has an allowed extension."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def form_error(error):
+    """Describe the first problem with a submitted form for a flash message."""
+    problem = error.errors()[0]
+    label = str(problem['loc'][0]).replace('_', ' ').capitalize() if problem['loc'] else 'Form'
+    if problem['type'] == 'missing':
+        return f'{label} is required'
+    return f'Invalid {label.lower()}: {problem["msg"]}'
+
+def publish_comment_change(event, comment, previous):
+    """Push a comment mutation to reviewers viewing its document."""
+    if not has_request_context() or not live_updates.has_subscribers(comment.document_id):
+        return
+    live_updates.publish(comment.document_id, event, {
+        'comment_id': comment.id,
+        'status': comment.status.value,
+        'html': render_template('_comment.html', comment=comment),
+    })
+
+def publish_document_change(event, document, previous):
+    """Push a document mutation to reviewers viewing it (or its previous version)."""
+    if not has_request_context():
+        return
+    if event == 'document_status_changed':
+        live_updates.publish(document.id, event, {'status': document.status.value})
+    elif event in ('document_added', 'document_version_attached') and document.parent_document_id:
+        live_updates.publish(document.parent_document_id, 'version_added', {
+            'version': document.version,
+            'url': url_for('document_detail', document_id=document.id),
+        })
+
+document_manager.add_listener(publish_document_change)
+comment_manager.add_listener(publish_comment_change)
+
+def render_cached_page(page_template, fragment_template, key, load_context, **page_context):
+    """
+    Render a page whose main content is a cached fragment.
+    
+    The fragment is only rendered from load_context() when nothing is cached
+    under key, which must include the version stamps of the data shown.
+    Pages without pending flash messages carry an ETag, and a request whose
+    If-None-Match matches it gets a 304 without rendering anything.
+    """
+    etag = render_cache.etag(key)
+    has_flashes = bool(session.get('_flashes'))
+    if not has_flashes and etag in request.if_none_match:
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    
+    _, fragment = render_cache.get_or_render(
+        key, lambda: render_template(fragment_template, **load_context())
+    )
+    response = make_response(render_template(page_template, fragment=Markup(fragment), **page_context))
+    if not has_flashes:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/')
 def index():
     """Render the main dashboard page."""
-    return render_template('index.html', title='DocProcessor Dashboard')
+    return render_template('index.html', title='DocProcessor Dashboard',
+                           stats=review_statistics.snapshot())
+
+@app.route('/api/stats')
+def stats():
+    """Return the review statistics as JSON."""
+    return jsonify(review_statistics.snapshot())
 
 @app.route('/documents')
 def documents():
     """Display list of uploaded documents."""
-    all_documents = document_manager.get_all_documents()
-    return render_template('documents.html', title='Documents', documents=all_documents)
+    return render_cached_page(
+        'documents.html',
+        '_documents_table.html',
+        ('documents', document_manager.get_revision()),
+        lambda: {'documents': document_manager.get_all_documents()},
+        title='Documents'
+    )
 
 @app.route('/upload', methods=['GET', 'POST'])
 def upload():
@@ -62,26 +197,25 @@ def upload():
             flash('No selected file', 'danger')
             return redirect(request.url)
             
-        document_type_str = request.form.get('document_type')
-        if not document_type_str:
-            flash('Please select a document type', 'danger')
-            return redirect(request.url)
-        
         try:
-            document_type = DocumentType(document_type_str)
-        except ValueError:
-            flash('Invalid document type', 'danger')
+            form = UploadForm.model_validate(request.form.to_dict())
+        except ValidationError as e:
+            flash(form_error(e), 'danger')
             return redirect(request.url)
             
         if file and allowed_file(file.filename):
             try:
+                # Reject malformed files before they are stored
+                validate_document(file.stream, file.filename)
+                
                 # Upload document
                 document = document_manager.upload_document(
                     file.stream, 
                     secure_filename(file.filename),
-                    document_type
+                    form.document_type
                 )
                 flash(f'Document "{file.filename}" uploaded successfully', 'success')
+                duplicate_index.submit_check(document.id)
                 return redirect(url_for('document_detail', document_id=document.id))
             except Exception as e:
                 app.logger.error(f"Error uploading document: {str(e)}")
@@ -98,17 +232,42 @@ def document_detail(document_id):
     """Display document details and comments."""
     try:
         document = document_manager.get_document(document_id)
-        comments = comment_manager.get_comments_for_document(document_id)
-        return render_template(
+        key = (
+            'document_detail',
+            document_id,
+            document_manager.get_revision(document_id),
+            comment_manager.get_revision(document_id),
+        )
+        return render_cached_page(
             'document_detail.html',
-            title=f'Document: {document.original_filename}',
-            document=document,
-            comments=comments
+            '_document_detail.html',
+            key,
+            lambda: {
+                'document': document,
+                'comments': comment_manager.get_comments_for_document(document_id),
+            },
+            title=f'Document: {document.original_filename}'
         )
     except KeyError:
         flash('Document not found', 'danger')
         return redirect(url_for('documents'))
 
+@app.route('/documents/<document_id>/events')
+def document_events(document_id):
+    """Stream live updates for a document as server-sent events."""
+    try:
+        document_manager.get_document(document_id)
+    except KeyError:
+        return jsonify({'error': 'Document not found'}), 404
+    if live_updates.is_full():
+        # EventSource gives up on an error status; the page then posts forms normally
+        return jsonify({'error': 'Too many live update streams'}), 503
+    
+    response = Response(live_updates.stream(document_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/downloads/<document_id>')
 def download_document(document_id):
     """Download a document."""
@@ -118,7 +277,8 @@ def download_document(document_id):
             app.config['UPLOAD_FOLDER'],
             document.filename,
             as_attachment=True,
-            download_name=document.original_filename
+            download_name=document.original_filename,
+            max_age=app.config['DOWNLOAD_MAX_AGE']
         )
     except KeyError:
         flash('Document not found', 'danger')
@@ -128,92 +288,68 @@ def download_document(document_id):
 def add_comment(document_id):
     """Add a comment to a document."""
     try:
-        document_manager.get_document(document_id)  # Ensure document exists
-        
-        text = request.form.get('text')
-        if not text:
-            flash('Comment text is required', 'danger')
-            return redirect(url_for('document_detail', document_id=document_id))
-        
-        page_number = request.form.get('page_number')
-        if page_number:
-            try:
-                page_number = int(page_number)
-            except ValueError:
-                page_number = None
-        
-        section = request.form.get('section')
-        
-        comment = comment_manager.add_comment(
-            document_id=document_id,
-            text=text,
-            page_number=page_number,
-            section=section
-        )
-        
-        # Update document status if this is the first comment
-        document = document_manager.get_document(document_id)
-        if document.status == DocumentStatus.UPLOADED:
-            document_manager.update_document_status(document_id, DocumentStatus.IN_REVIEW)
-        
-        flash('Comment added successfully', 'success')
+        form = CommentForm.model_validate(request.form.to_dict())
+    except ValidationError as e:
+        flash(form_error(e), 'danger')
         return redirect(url_for('document_detail', document_id=document_id))
-    except KeyError:
+    
+    # Applied as a one-operation batch, so the form and the batch API
+    # follow the same status workflow
+    try:
+        batch_processor.apply(BatchRequest(operations=[
+            AddCommentOperation(op='add_comment', document_id=document_id, **form.model_dump())
+        ]))
+    except BatchError:
         flash('Document not found', 'danger')
         return redirect(url_for('documents'))
+    
+    flash('Comment added successfully', 'success')
+    return redirect(url_for('document_detail', document_id=document_id))
 
 @app.route('/comments/<comment_id>/resolve', methods=['POST'])
 def resolve_comment(comment_id):
     """Resolve a comment."""
     try:
-        comment = comment_manager.get_comment(comment_id)
-        document_id = comment.document_id
-        
-        resolution_text = request.form.get('resolution_text')
-        if not resolution_text:
-            flash('Resolution text is required', 'danger')
-            return redirect(url_for('document_detail', document_id=document_id))
-        
-        # In a real app, we would get the current user
-        resolved_by = "System User"
-        
-        # Resolve the comment
-        comment_manager.resolve_comment(comment_id, resolution_text, resolved_by)
-        
-        # Check if all comments for this document are resolved
-        open_comments = comment_manager.get_open_comments_for_document(document_id)
-        if not open_comments:
-            # All comments resolved, update document status
-            document_manager.update_document_status(document_id, DocumentStatus.REVIEWED)
-        
-        flash('Comment resolved successfully', 'success')
-        return redirect(url_for('document_detail', document_id=document_id))
+        document_id = comment_manager.get_comment(comment_id).document_id
     except KeyError:
         flash('Comment not found', 'danger')
         return redirect(url_for('documents'))
+    
+    try:
+        form = ResolutionForm.model_validate(request.form.to_dict())
+    except ValidationError as e:
+        flash(form_error(e), 'danger')
+        return redirect(url_for('document_detail', document_id=document_id))
+    
+    # In a real app, we would get the current user
+    batch_processor.apply(BatchRequest(operations=[
+        ResolveCommentOperation(op='resolve_comment', comment_id=comment_id,
+                                resolution_text=form.resolution_text, resolved_by="System User")
+    ]))
+    
+    flash('Comment resolved successfully', 'success')
+    return redirect(url_for('document_detail', document_id=document_id))
 
 @app.route('/documents/<document_id>/update_status', methods=['POST'])
 def update_document_status(document_id):
     """Update the status of a document."""
     try:
-        status_str = request.form.get('status')
-        if not status_str:
-            flash('Status is required', 'danger')
-            return redirect(url_for('document_detail', document_id=document_id))
-        
-        try:
-            status = DocumentStatus(status_str)
-        except ValueError:
-            flash('Invalid document status', 'danger')
-            return redirect(url_for('document_detail', document_id=document_id))
-        
-        document = document_manager.update_document_status(document_id, status)
-        
-        flash(f'Document status updated to {status.value}', 'success')
+        form = DocumentStatusForm.model_validate(request.form.to_dict())
+    except ValidationError as e:
+        flash(form_error(e), 'danger')
         return redirect(url_for('document_detail', document_id=document_id))
-    except KeyError:
+    
+    try:
+        batch_processor.apply(BatchRequest(operations=[
+            UpdateDocumentStatusOperation(op='update_document_status', document_id=document_id,
+                                          status=form.status)
+        ]))
+    except BatchError:
         flash('Document not found', 'danger')
         return redirect(url_for('documents'))
+    
+    flash(f'Document status updated to {form.status.value}', 'success')
+    return redirect(url_for('document_detail', document_id=document_id))
 
 @app.route('/documents/<document_id>/new_version', methods=['GET', 'POST'])
 def upload_new_version(document_id):
@@ -237,6 +373,8 @@ def upload_new_version(document_id):
                 
             if file and allowed_file(file.filename):
                 try:
+                    validate_document(file.stream, original_document.filename)
+                    
                     # Upload new version
                     new_document = document_manager.create_new_version(
                         document_id,
@@ -244,6 +382,9 @@ def upload_new_version(document_id):
                     )
                     
                     flash(f'New version of "{original_document.original_filename}" uploaded successfully', 'success')
+                    duplicate_index.submit_check(new_document.id)
+                    if request.form.get('carry_forward'):
+                        carry_forward_comments(document_id, new_document.id)
                     return redirect(url_for('document_detail', document_id=new_document.id))
                 except Exception as e:
                     app.logger.error(f"Error uploading new version: {str(e)}")
@@ -262,6 +403,175 @@ def upload_new_version(document_id):
         flash('Document not found', 'danger')
         return redirect(url_for('documents'))
 
+@app.route('/api/batch', methods=['POST'])
+def apply_batch():
+    """Apply a batch of comment and document status operations as JSON."""
+    try:
+        batch = BatchRequest.model_validate(request.get_json(silent=True) or {})
+    except ValidationError as e:
+        return jsonify({'error': 'Invalid batch', 'details': json.loads(e.json(include_url=False))}), 400
+    
+    try:
+        return jsonify(batch_processor.apply(batch))
+    except BatchError as e:
+        return jsonify({'error': e.message, 'index': e.index}), 404
+
+def carry_forward_comments(document_id, new_document_id):
+    """Start copying open comments onto a new version, flashing that it's under way."""
+    if comment_manager.get_open_comments_for_document(document_id):
+        anchor_index.submit_carry_forward(document_id, new_document_id)
+        flash('Open comments are being carried forward to the new version', 'info')
+
+@app.route('/documents/<document_id>/attach_as_version', methods=['POST'])
+def attach_as_version(document_id):
+    """Attach a separately uploaded document as the latest version of another."""
+    try:
+        form = AttachVersionForm.model_validate(request.form.to_dict())
+        parent = document_manager.get_latest_version(form.parent_document_id)
+        document = document_manager.attach_as_version(document_id, parent.id)
+        document_manager.update_document_metadata(document_id, {'duplicate_candidates': []})
+        flash(f'Document attached as version {document.version} of "{parent.original_filename}"', 'success')
+    except KeyError:
+        flash('Document not found', 'danger')
+        return redirect(url_for('documents'))
+    except ValidationError as e:
+        flash(form_error(e), 'danger')
+    except ValueError as e:
+        flash(str(e), 'danger')
+    
+    return redirect(url_for('document_detail', document_id=document_id))
+
+@app.route('/api/documents/<document_id>/comments')
+def document_comments(document_id):
+    """Return a document's comments with their anchors, optionally by section or page."""
+    try:
+        section = request.args.get('section')
+        page = request.args.get('page', type=int)
+        if section:
+            comments = anchor_index.comments_for_section(document_id, section)
+        elif page:
+            comments = anchor_index.comments_for_page(document_id, page)
+        else:
+            document_manager.get_document(document_id)
+            comments = comment_manager.get_comments_for_document(document_id)
+        
+        results = []
+        for comment in comments:
+            data = comment.to_model().model_dump(mode='json')
+            data['anchor'] = anchor_index.get_anchor(comment.id)._asdict()
+            results.append(data)
+        return jsonify({'comments': results})
+    except KeyError:
+        return jsonify({'error': 'Document not found'}), 404
+    except Exception as e:
+        app.logger.error(f"Error anchoring comments: {str(e)}")
+        return jsonify({'error': f'Document text could not be extracted: {str(e)}'}), 422
+
+@app.route('/reports')
+def reports():
+    """Render the report export page."""
+    return render_template(
+        'reports.html',
+        title='Reports',
+        documents=document_manager.get_all_documents(),
+        document_statuses=list(DocumentStatus),
+        document_types=list(DocumentType),
+        comment_statuses=list(CommentStatus)
+    )
+
+def report_download_name(report_format):
+    """Build the download filename of a report."""
+    return f"comment-log-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{report_format.value}"
+
+@app.route('/reports/export')
+def export_report():
+    """Export a comment log, streaming small CSVs and building large reports in the background."""
+    try:
+        report_format = ReportFormat(request.args.get('format', 'csv'))
+        status = request.args.get('status')
+        document_type = request.args.get('document_type')
+        comment_status = request.args.get('comment_status')
+        document_ids = report_engine.select_documents(
+            request.args.get('scope', 'document'),
+            document_id=request.args.get('document_id'),
+            status=DocumentStatus(status) if status else None,
+            document_type=DocumentType(document_type) if document_type else None
+        )
+        comment_status = CommentStatus(comment_status) if comment_status else None
+    except KeyError:
+        flash('Document not found', 'danger')
+        return redirect(url_for('reports'))
+    except ValueError as e:
+        flash(f'Invalid report options: {str(e)}', 'danger')
+        return redirect(url_for('reports'))
+    
+    download_name = report_download_name(report_format)
+    cached_path = report_engine.get_cached(
+        report_engine.cache_key(report_format, document_ids, comment_status)
+    )
+    if cached_path:
+        return send_file(cached_path, mimetype=MIMETYPES[report_format],
+                         as_attachment=True, download_name=download_name)
+    
+    if report_engine.count_rows(document_ids) > app.config['REPORT_BACKGROUND_ROWS']:
+        job_id = report_engine.submit(report_format, document_ids, comment_status)
+        flash('The report is large and is being generated in the background', 'info')
+        return redirect(url_for('report_job', job_id=job_id))
+    
+    if report_format == ReportFormat.CSV:
+        response = Response(report_engine.stream_csv(document_ids, comment_status),
+                            mimetype=MIMETYPES[report_format])
+        response.headers['Content-Disposition'] = f'attachment; filename={download_name}'
+        return response
+    
+    try:
+        path = report_engine.build(report_format, document_ids, comment_status)
+    except Exception as e:
+        app.logger.error(f"Error building report: {str(e)}")
+        flash(f'Error building report: {str(e)}', 'danger')
+        return redirect(url_for('reports'))
+    return send_file(path, mimetype=MIMETYPES[report_format],
+                     as_attachment=True, download_name=download_name)
+
+@app.route('/reports/jobs/<job_id>')
+def report_job(job_id):
+    """Show the progress of a background export."""
+    try:
+        job = report_engine.get_job(job_id)
+    except KeyError:
+        flash('Report not found', 'danger')
+        return redirect(url_for('reports'))
+    
+    return render_template(
+        'reports.html',
+        title='Reports',
+        job=job,
+        documents=document_manager.get_all_documents(),
+        document_statuses=list(DocumentStatus),
+        document_types=list(DocumentType),
+        comment_statuses=list(CommentStatus)
+    )
+
+@app.route('/reports/jobs/<job_id>/download')
+def download_report_job(job_id):
+    """Download the result of a finished background export."""
+    try:
+        job = report_engine.get_job(job_id)
+    except KeyError:
+        abort(404)
+    
+    if job['status'] == 'expired':
+        abort(410)
+    if job['status'] != 'done':
+        return redirect(url_for('report_job', job_id=job_id))
+    report_format = ReportFormat(job['format'])
+    try:
+        return send_file(job['path'], mimetype=MIMETYPES[report_format],
+                         as_attachment=True, download_name=report_download_name(report_format))
+    except FileNotFoundError:
+        # Evicted between the status check and opening the file
+        abort(410)
+
 # Error handlers
 @app.errorhandler(404)
 def page_not_found(e):
@@ -274,4 +584,6 @@ def internal_server_error(e):
     return render_template('500.html'), 500
 
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    # Extraction sandbox processes import the main module, which must not be
+    # this one; its module-level setup would run again in every job
+    os.execv(sys.executable, [sys.executable, '-m', 'src.run', '--debug']) 
\ No newline at end of file
@@ -0,0 +1,383 @@
+"""
+Anchoring of comments to pages and sections of extracted document text.
+"""
+
+import bisect
+import difflib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.models.records import CommentRecord
+from src.utils.document_processor import Chunk, extract_document_sections
+
+logger = logging.getLogger(__name__)
+
+
+class Anchor(NamedTuple):
+    """Where a comment points in a document's extracted text."""
+    
+    page: Optional[int]  # 1-based page number, for paged documents
+    section: Optional[str]  # Section title as found by extract_document_sections
+    offset: Optional[int]  # Character offset into the extracted text
+
+
+UNANCHORED = Anchor(None, None, None)
+
+
+def _normalize(title: str) -> str:
+    """Normalize a section title for matching user-entered text."""
+    return re.sub(r'\s+', ' ', title).strip().casefold()
+
+
+class DocumentOutline:
+    """Chunk, page and section offsets within a document's extracted text."""
+    
+    def __init__(self, chunks: List[Chunk], paged: bool):
+        """
+        Build the outline of a document.
+        
+        Args:
+            chunks: The document's extracted chunks
+            paged: Whether each chunk is a page (PDFs)
+        """
+        self.fingerprints = [fp for fp, _ in chunks]
+        self.chunk_offsets: List[int] = []
+        offset = 0
+        for _, text in chunks:
+            self.chunk_offsets.append(offset)
+            offset += len(text)
+        self.length = offset
+        self.paged = paged
+        
+        # Find each section title after the previous one; titles are
+        # stripped lines of the text, so a forward search locates them
+        text = "".join(text for _, text in chunks)
+        self.section_titles: List[str] = []
+        self.section_offsets: List[int] = []
+        position = 0
+        for title, _ in extract_document_sections(text):
+            found = text.find(title, position)
+            if found < 0:
+                continue
+            self.section_titles.append(title)
+            self.section_offsets.append(found)
+            position = found + len(title)
+        self._titles_by_key = {}
+        for title in self.section_titles:
+            self._titles_by_key.setdefault(_normalize(title), title)
+    
+    @property
+    def page_count(self) -> int:
+        return len(self.chunk_offsets) if self.paged else 0
+    
+    def page_at(self, offset: int) -> Optional[int]:
+        """Get the 1-based page containing an offset."""
+        if not self.paged or not self.chunk_offsets:
+            return None
+        return bisect.bisect_right(self.chunk_offsets, offset)
+    
+    def section_at(self, offset: int) -> Optional[str]:
+        """Get the title of the section containing an offset."""
+        index = bisect.bisect_right(self.section_offsets, offset) - 1
+        return self.section_titles[index] if index >= 0 else None
+    
+    def find_section(self, section: str) -> Optional[str]:
+        """
+        Match user-entered section text to a section title.
+        
+        Tries an exact match ignoring case and spacing, then a title that
+        starts with or contains the text.
+        """
+        key = _normalize(section)
+        if not key:
+            return None
+        if key in self._titles_by_key:
+            return self._titles_by_key[key]
+        for title_key, title in self._titles_by_key.items():
+            if title_key.startswith(key):
+                return title
+        for title_key, title in self._titles_by_key.items():
+            if key in title_key:
+                return title
+        return None
+    
+    def resolve(self, page_number: Optional[int], section: Optional[str]) -> Anchor:
+        """
+        Resolve a comment's free-text page and section to an anchor.
+        
+        A page outside the document is dropped. A matched section pins the
+        offset to the section's start; otherwise a valid page pins it to the
+        page's start, and the section is the one that page starts in.
+        """
+        page = page_number if page_number and 1 <= page_number <= self.page_count else None
+        title = self.find_section(section) if section else None
+        
+        if title is not None:
+            offset = self.section_offsets[self.section_titles.index(title)]
+            return Anchor(page or self.page_at(offset), title, offset)
+        if page is not None:
+            offset = self.chunk_offsets[page - 1]
+            return Anchor(page, self.section_at(offset), offset)
+        return UNANCHORED
+    
+    def chunk_at(self, offset: int) -> Tuple[int, int]:
+        """Get (chunk index, offset within the chunk) for an offset."""
+        index = max(bisect.bisect_right(self.chunk_offsets, offset) - 1, 0)
+        return index, offset - self.chunk_offsets[index]
+
+
+def remap_offsets(old: DocumentOutline, new: DocumentOutline,
+                  offsets: List[int]) -> List[int]:
+    """
+    Map offsets in an old version's text to the new version's text.
+    
+    The versions are diffed chunk by chunk on their fingerprints (pages,
+    paragraphs or rows, not characters), so this stays fast for large
+    documents. Offsets in unchanged chunks move with their chunk; offsets
+    in changed or deleted chunks land at the start of the chunk that
+    replaced them.
+    """
+    if not new.chunk_offsets:
+        return [0 for _ in offsets]
+    
+    # Chunks that couldn't be fingerprinted never compare equal
+    old_keys = [fp or object() for fp in old.fingerprints]
+    new_keys = [fp or object() for fp in new.fingerprints]
+    opcodes = difflib.SequenceMatcher(None, old_keys, new_keys, autojunk=False).get_opcodes()
+    opcode_starts = [i1 for _, i1, _, _, _ in opcodes]
+    
+    remapped = []
+    for offset in offsets:
+        chunk, within = old.chunk_at(offset)
+        tag, i1, i2, j1, j2 = opcodes[max(bisect.bisect_right(opcode_starts, chunk) - 1, 0)]
+        if tag == 'equal':
+            remapped.append(new.chunk_offsets[j1 + chunk - i1] + within)
+        else:
+            target = min(j1 + chunk - i1, j2 - 1) if j2 > j1 else j1
+            target = min(target, len(new.chunk_offsets) - 1)
+            remapped.append(new.chunk_offsets[target])
+    return remapped
+
+
+class AnchorIndex:
+    """
+    Index of comments by their anchors.
+    
+    Documents are outlined lazily, the first time one of their comments is
+    looked up. After that, new comments are anchored as they are added.
+    Outlines are kept for the ``max_outlines`` most recently used documents;
+    an evicted document is outlined again on its next lookup. Safe to use
+    from many request threads.
+    """
+    
+    def __init__(self, document_manager: DocumentManager, comment_manager: CommentManager,
+                 max_outlines: int = 64):
+        """
+        Initialize the index.
+        
+        Args:
+            document_manager: Manager used to extract document text
+            comment_manager: Manager holding the comments to anchor
+            max_outlines: Documents to keep outlines and anchors for
+        """
+        self.document_manager = document_manager
+        self.comment_manager = comment_manager
+        self.max_outlines = max_outlines
+        self._lock = threading.RLock()
+        self._outlines: "OrderedDict[str, DocumentOutline]" = OrderedDict()
+        self._anchors: Dict[str, Anchor] = {}
+        # Comment ids by document, then by section title or page number
+        self._by_section: Dict[str, Dict[str, Dict[str, None]]] = {}
+        self._by_page: Dict[str, Dict[int, Dict[str, None]]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='anchoring')
+    
+    def attach(self):
+        """Anchor comments on outlined documents as they are added."""
+        self.comment_manager.add_listener(self.on_comment_change)
+    
+    def on_comment_change(self, event: str, comment: CommentRecord, previous: dict):
+        """Anchor a new comment if its document is already outlined."""
+        if event == 'comment_added':
+            with self._lock:
+                outline = self._outlines.get(comment.document_id)
+                if outline is not None:
+                    self._add(comment, outline)
+    
+    def outline(self, document_id: str) -> DocumentOutline:
+        """
+        Get a document's outline, extracting it and anchoring its comments on first use.
+        
+        Extraction runs without holding the index's lock, so other
+        documents' lookups don't wait for it.
+        
+        Args:
+            document_id: ID of the document
+            
+        Returns:
+            The document's outline
+            
+        Raises:
+            KeyError: If the document doesn't exist
+        """
+        with self._lock:
+            outline = self._outlines.get(document_id)
+            if outline is not None:
+                self._outlines.move_to_end(document_id)
+                return outline
+        
+        document = self.document_manager.get_document(document_id)
+        chunks = self.document_manager.get_document_chunks(document_id)
+        outline = DocumentOutline(chunks, paged=document.filename.lower().endswith('.pdf'))
+        
+        with self._lock:
+            # Another thread may have outlined the document meanwhile
+            if document_id in self._outlines:
+                self._outlines.move_to_end(document_id)
+                return self._outlines[document_id]
+            self._outlines[document_id] = outline
+            for comment in self.comment_manager.get_comments_for_document(document_id):
+                self._add(comment, outline)
+            while len(self._outlines) > self.max_outlines:
+                self._evict(next(iter(self._outlines)))
+        return outline
+    
+    def _add(self, comment: CommentRecord, outline: DocumentOutline):
+        """Anchor a comment and index it. Caller holds the lock."""
+        anchor = outline.resolve(comment.page_number, comment.section)
+        self._anchors[comment.id] = anchor
+        if anchor.section is not None:
+            sections = self._by_section.setdefault(comment.document_id, {})
+            sections.setdefault(anchor.section, {})[comment.id] = None
+        if anchor.page is not None:
+            pages = self._by_page.setdefault(comment.document_id, {})
+            pages.setdefault(anchor.page, {})[comment.id] = None
+    
+    def _evict(self, document_id: str):
+        """Drop a document's outline and anchors. Caller holds the lock."""
+        del self._outlines[document_id]
+        self._by_section.pop(document_id, None)
+        self._by_page.pop(document_id, None)
+        for comment in self.comment_manager.get_comments_for_document(document_id):
+            self._anchors.pop(comment.id, None)
+    
+    def get_anchor(self, comment_id: str) -> Anchor:
+        """
+        Get a comment's anchor.
+        
+        Args:
+            comment_id: ID of the comment
+            
+        Returns:
+            The anchor (all None if the comment doesn't point anywhere valid)
+            
+        Raises:
+            KeyError: If the comment or its document doesn't exist
+        """
+        comment = self.comment_manager.get_comment(comment_id)
+        outline = self.outline(comment.document_id)
+        with self._lock:
+            anchor = self._anchors.get(comment_id)
+        # Not indexed yet if the comment's event hasn't been delivered
+        return anchor if anchor is not None else outline.resolve(comment.page_number, comment.section)
+    
+    def comments_for_section(self, document_id: str, section: str) -> List[CommentRecord]:
+        """
+        Get the comments anchored to a section.
+        
+        Args:
+            document_id: ID of the document
+            section: Section title, matched like user-entered section text
+            
+        Returns:
+            Comments anchored to the section
+        """
+        title = self.outline(document_id).find_section(section)
+        with self._lock:
+            comment_ids = list(self._by_section.get(document_id, {}).get(title, {}))
+        return [self.comment_manager.get_comment(c) for c in comment_ids]
+    
+    def comments_for_page(self, document_id: str, page: int) -> List[CommentRecord]:
+        """
+        Get the comments anchored to a page.
+        
+        Args:
+            document_id: ID of the document
+            page: 1-based page number
+            
+        Returns:
+            Comments anchored to the page
+        """
+        self.outline(document_id)
+        with self._lock:
+            comment_ids = list(self._by_page.get(document_id, {}).get(page, {}))
+        return [self.comment_manager.get_comment(c) for c in comment_ids]
+    
+    def carry_forward(self, document_id: str, new_document_id: str) -> List[CommentRecord]:
+        """
+        Copy a document's open comments onto its new version.
+        
+        Anchors are remapped in one pass through the diff between the two
+        versions; each copy gets the page and section at its new position
+        and is linked to the original comment.
+        
+        Args:
+            document_id: ID of the previous version
+            new_document_id: ID of the new version
+            
+        Returns:
+            The comments created on the new version
+        """
+        old = self.outline(document_id)
+        new = self.outline(new_document_id)
+        
+        comments = self.comment_manager.get_open_comments_for_document(document_id)
+        anchors = [old.resolve(comment.page_number, comment.section) for comment in comments]
+        anchored = [i for i, anchor in enumerate(anchors) if anchor.offset is not None]
+        offsets = remap_offsets(old, new, [anchors[i].offset for i in anchored])
+        new_anchors: Dict[int, Anchor] = {
+            i: Anchor(new.page_at(offset), new.section_at(offset), offset)
+            for i, offset in zip(anchored, offsets)
+        }
+        
+        carried = []
+        for i, comment in enumerate(comments):
+            anchor = new_anchors.get(i)
+            copy = self.comment_manager.add_comment(
+                document_id=new_document_id,
+                text=comment.text,
+                page_number=anchor.page if anchor else comment.page_number,
+                section=anchor.section if anchor and anchor.section else comment.section
+            )
+            self.comment_manager.link_related_comments(copy.id, [comment.id])
+            carried.append(copy)
+        return carried
+    
+    def submit_carry_forward(self, document_id: str, new_document_id: str) -> Future:
+        """
+        Carry a document's open comments forward in the background.
+        
+        Outlining both versions means extracting them, which can take as
+        long as the sandbox allows, so uploads hand it off here instead of
+        waiting. Jobs run one at a time, in submission order.
+        
+        Args:
+            document_id: ID of the previous version
+            new_document_id: ID of the new version
+            
+        Returns:
+            Future resolving to the comments created on the new version
+        """
+        def run():
+            try:
+                return self.carry_forward(document_id, new_document_id)
+            except Exception as e:
+                logger.error(f"Carrying comments forward to {new_document_id} failed: {str(e)}")
+                raise
+        
+        return self._executor.submit(run)
@@ -0,0 +1,148 @@
+"""
+Batch application of comment and document status operations.
+"""
+
+from typing import Any, Dict, List, Set
+
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.models.batch import (
+    AddCommentOperation, BatchRequest, ResolveCommentOperation,
+    UpdateCommentStatusOperation, UpdateDocumentStatusOperation
+)
+from src.models.document import CommentStatus, DocumentStatus
+
+
+class BatchError(Exception):
+    """Raised when a batch fails its checks. Nothing has been changed."""
+    
+    def __init__(self, index: int, message: str):
+        super().__init__(f"Operation {index}: {message}")
+        self.index = index
+        self.message = message
+
+
+class BatchProcessor:
+    """Applies many review operations in one call."""
+    
+    def __init__(self, document_manager: DocumentManager, comment_manager: CommentManager):
+        """
+        Initialize the batch processor.
+        
+        Args:
+            document_manager: Manager holding the documents
+            comment_manager: Manager holding the comments
+        """
+        self.document_manager = document_manager
+        self.comment_manager = comment_manager
+    
+    def apply(self, batch: BatchRequest) -> Dict[str, Any]:
+        """
+        Apply a batch of operations.
+        
+        Every operation is checked before any is applied, so a batch that
+        refers to a missing document or comment changes nothing. This is a
+        pre-check, not a transaction: there is no rollback, and should an
+        operation fail unexpectedly after the checks, the operations before
+        it stay applied. Document
+        status side effects (Uploaded -> In Review on a new comment,
+        Reviewed once no comments are open after a comment is resolved or
+        moved to Resolved or Approved) are recomputed once per touched
+        document after the whole batch, rather than once per operation.
+        Documents whose status is set explicitly in the batch keep that status.
+        The form routes apply their changes as one-operation batches, so
+        both follow the same workflow.
+        
+        The locks of every touched document are held for the whole batch,
+        so no other request sees or changes those documents part-way through.
+        
+        Args:
+            batch: The validated batch request
+            
+        Returns:
+            Dict with per-operation ``results`` and the final ``documents``
+            statuses of every touched document
+            
+        Raises:
+            BatchError: If an operation refers to a missing document or comment
+        """
+        touched = self._check(batch)
+        with self.document_manager.locks.locked(*touched), \
+                self.comment_manager.locks.locked(*touched):
+            return self._apply(batch)
+    
+    def _apply(self, batch: BatchRequest) -> Dict[str, Any]:
+        """Apply a checked batch. Caller holds the touched documents' locks."""
+        results: List[Dict[str, Any]] = []
+        commented: Set[str] = set()
+        resolved: Set[str] = set()
+        explicit: Set[str] = set()
+        
+        for operation in batch.operations:
+            if isinstance(operation, AddCommentOperation):
+                comment = self.comment_manager.add_comment(
+                    document_id=operation.document_id,
+                    text=operation.text,
+                    page_number=operation.page_number,
+                    section=operation.section
+                )
+                commented.add(comment.document_id)
+                results.append(comment.to_model().model_dump(mode='json'))
+            elif isinstance(operation, ResolveCommentOperation):
+                comment = self.comment_manager.resolve_comment(
+                    operation.comment_id, operation.resolution_text, operation.resolved_by
+                )
+                resolved.add(comment.document_id)
+                results.append(comment.to_model().model_dump(mode='json'))
+            elif isinstance(operation, UpdateCommentStatusOperation):
+                comment = self.comment_manager.update_comment_status(
+                    operation.comment_id, operation.status
+                )
+                if operation.status not in (CommentStatus.OPEN, CommentStatus.IN_PROGRESS):
+                    resolved.add(comment.document_id)
+                results.append(comment.to_model().model_dump(mode='json'))
+            else:
+                document = self.document_manager.update_document_status(
+                    operation.document_id, operation.status
+                )
+                explicit.add(document.id)
+                results.append(document.to_model().model_dump(mode='json', exclude={'comments'}))
+        
+        self._update_document_statuses(commented - explicit, resolved - explicit)
+        
+        touched = commented | resolved | explicit
+        documents = {
+            document_id: self.document_manager.get_document(document_id).status.value
+            for document_id in sorted(touched)
+        }
+        return {'results': results, 'documents': documents}
+    
+    def _check(self, batch: BatchRequest) -> Set[str]:
+        """Verify every referenced document and comment exists; return the touched document IDs."""
+        touched: Set[str] = set()
+        for index, operation in enumerate(batch.operations):
+            if isinstance(operation, (AddCommentOperation, UpdateDocumentStatusOperation)):
+                if operation.document_id not in self.document_manager.documents:
+                    raise BatchError(index, f"Document {operation.document_id} not found")
+                touched.add(operation.document_id)
+            elif operation.comment_id not in self.comment_manager.comments:
+                raise BatchError(index, f"Comment {operation.comment_id} not found")
+            else:
+                touched.add(self.comment_manager.comments[operation.comment_id].document_id)
+        return touched
+    
+    def _update_document_statuses(self, commented: Set[str], resolved: Set[str]):
+        """
+        Apply the review workflow's status transitions once per document.
+        
+        Runs under the batch's locks, so a check and its transition can't
+        interleave with a comment being added or resolved elsewhere.
+        """
+        for document_id in commented:
+            document = self.document_manager.get_document(document_id)
+            if document.status == DocumentStatus.UPLOADED:
+                self.document_manager.update_document_status(document_id, DocumentStatus.IN_REVIEW)
+        
+        for document_id in resolved:
+            if not self.comment_manager.get_open_comments_for_document(document_id):
+                self.document_manager.update_document_status(document_id, DocumentStatus.REVIEWED)
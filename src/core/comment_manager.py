@@ -3,22 +3,51 @@ Core functionality for managing comments on documents.
 """
 
 import uuid
+import itertools
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional
 
-from src.models.document import Document, Comment, CommentStatus
+from src.models.document import CommentStatus
+from src.models.records import CommentRecord
+from src.core.events import EventDispatcher
+from src.core.locks import LockStripes
 
 
 class CommentManager:
-    """Manager for comments across documents."""
+    """
+    Manager for comments across documents.
     
-    def __init__(self):
-        """Initialize the comment manager."""
+    Safe to use from many request threads. Comments are guarded by a
+    striped lock per document, so reviews of different documents proceed
+    in parallel while changes to one document's comments are serialized.
+    """
+    
+    def __init__(self, locks: Optional[LockStripes] = None):
+        """
+        Initialize the comment manager.
+        
+        Args:
+            locks: Per-document locks (defaults to a new set); pass the
+                DocumentManager's locks so that holding
+                ``DocumentManager.lock_document`` also keeps the document's
+                comments from changing
+        """
+        self.locks = locks or LockStripes()
         # In a real application, this would connect to a database
-        self.comments: Dict[str, Comment] = {}
+        self.comments: Dict[str, CommentRecord] = {}
+        # Comment ids per document, in insertion order, so per-document
+        # lookups don't scan every comment
+        self._document_comments: Dict[str, Dict[str, None]] = {}
+        
+        # Version stamps for cache keys, bumped on every mutation; next() on
+        # the counter is atomic, so concurrent mutations never share a stamp
+        self.revision = 0
+        self._revisions = itertools.count(1)
+        self._document_revisions: Dict[str, int] = {}
+        self._events = EventDispatcher(self.locks)
     
     def add_comment(self, document_id: str, text: str, page_number: Optional[int] = None,
-                    section: Optional[str] = None) -> Comment:
+                    section: Optional[str] = None) -> CommentRecord:
         """
         Add a new comment to a document.
         
@@ -32,7 +61,7 @@ class CommentManager:
             The newly created comment
         """
         comment_id = str(uuid.uuid4())
-        comment = Comment(
+        comment = CommentRecord(
             id=comment_id,
             document_id=document_id,
             text=text,
@@ -42,10 +71,13 @@ class CommentManager:
             status=CommentStatus.OPEN
         )
         
-        self.comments[comment_id] = comment
+        with self.locks.locked(document_id):
+            self.comments[comment_id] = comment
+            self._document_comments.setdefault(comment.document_id, {})[comment_id] = None
+            self._record_change('comment_added', comment, {})
         return comment
     
-    def update_comment_status(self, comment_id: str, status: CommentStatus) -> Comment:
+    def update_comment_status(self, comment_id: str, status: CommentStatus) -> CommentRecord:
         """
         Update the status of a comment.
         
@@ -63,13 +95,16 @@ class CommentManager:
             raise KeyError(f"Comment {comment_id} not found")
             
         comment = self.comments[comment_id]
-        comment.status = status
-        comment.updated_at = datetime.now()
+        with self.locks.locked(comment.document_id):
+            previous = {'status': comment.status}
+            comment.status = status
+            comment.updated_at = datetime.now()
+            self._record_change('comment_status_changed', comment, previous)
         
         return comment
     
     def resolve_comment(self, comment_id: str, resolution_text: str, 
-                        resolved_by: str) -> Comment:
+                        resolved_by: str) -> CommentRecord:
         """
         Mark a comment as resolved.
         
@@ -88,15 +123,18 @@ class CommentManager:
             raise KeyError(f"Comment {comment_id} not found")
             
         comment = self.comments[comment_id]
-        comment.status = CommentStatus.RESOLVED
-        comment.resolution_text = resolution_text
-        comment.resolved_by = resolved_by
-        comment.resolved_at = datetime.now()
-        comment.updated_at = datetime.now()
+        with self.locks.locked(comment.document_id):
+            previous = {'status': comment.status, 'resolved_at': comment.resolved_at}
+            comment.status = CommentStatus.RESOLVED
+            comment.resolution_text = resolution_text
+            comment.resolved_by = resolved_by
+            comment.resolved_at = datetime.now()
+            comment.updated_at = datetime.now()
+            self._record_change('comment_resolved', comment, previous)
         
         return comment
     
-    def get_comments_for_document(self, document_id: str) -> List[Comment]:
+    def get_comments_for_document(self, document_id: str) -> List[CommentRecord]:
         """
         Get all comments for a document.
         
@@ -106,12 +144,40 @@ class CommentManager:
         Returns:
             List of comments for the document
         """
-        return [
-            comment for comment in self.comments.values() 
-            if comment.document_id == document_id
-        ]
+        # list() copies the ids in one step, so a comment added meanwhile
+        # can't change the dict while it is being read
+        comment_ids = list(self._document_comments.get(document_id, {}))
+        return [self.comments[comment_id] for comment_id in comment_ids]
     
-    def get_open_comments_for_document(self, document_id: str) -> List[Comment]:
+    def copy_comments(self) -> List[CommentRecord]:
+        """
+        Get a copy of every comment, each taken under its document's lock.
+        
+        Use this to read records in bulk (snapshots, rebuilds) while other
+        threads may be changing them.
+        
+        Returns:
+            List of comment copies
+        """
+        copies = []
+        for comment in list(self.comments.values()):
+            with self.locks.locked(comment.document_id):
+                copies.append(comment.copy())
+        return copies
+    
+    def count_comments_for_document(self, document_id: str) -> int:
+        """
+        Count the comments on a document.
+        
+        Args:
+            document_id: ID of the document to count comments for
+            
+        Returns:
+            Number of comments on the document
+        """
+        return len(self._document_comments.get(document_id, {}))
+    
+    def get_open_comments_for_document(self, document_id: str) -> List[CommentRecord]:
         """
         Get all open comments for a document.
         
@@ -122,11 +188,11 @@ class CommentManager:
             List of open comments for the document
         """
         return [
-            comment for comment in self.comments.values() 
-            if comment.document_id == document_id and comment.status == CommentStatus.OPEN
+            comment for comment in self.get_comments_for_document(document_id)
+            if comment.status == CommentStatus.OPEN
         ]
     
-    def get_comment(self, comment_id: str) -> Comment:
+    def get_comment(self, comment_id: str) -> CommentRecord:
         """
         Get a comment by ID.
         
@@ -144,7 +210,7 @@ class CommentManager:
             
         return self.comments[comment_id]
     
-    def link_related_comments(self, comment_id: str, related_comment_ids: List[str]) -> Comment:
+    def link_related_comments(self, comment_id: str, related_comment_ids: List[str]) -> CommentRecord:
         """
         Link a comment to related comments.
         
@@ -167,7 +233,69 @@ class CommentManager:
                 raise KeyError(f"Related comment {related_id} not found")
         
         comment = self.comments[comment_id]
-        comment.related_comment_ids = related_comment_ids
-        comment.updated_at = datetime.now()
+        with self.locks.locked(comment.document_id):
+            previous = {'related_comment_ids': comment.related_comment_ids}
+            comment.related_comment_ids = tuple(related_comment_ids)
+            comment.updated_at = datetime.now()
+            self._record_change('comment_linked', comment, previous)
+        
+        return comment
+    
+    def get_revision(self, document_id: Optional[str] = None) -> int:
+        """
+        Get a version stamp that changes whenever comments change.
+        
+        Args:
+            document_id: ID of a document to scope to, or None for all comments
+            
+        Returns:
+            The current revision number
+        """
+        if document_id is None:
+            return self.revision
+        return self._document_revisions.get(document_id, 0)
+    
+    def restore_comment(self, comment: CommentRecord):
+        """
+        Insert or replace a comment record without notifying listeners.
         
-        return comment 
\ No newline at end of file
+        Used when rebuilding state from persistent storage.
+        
+        Args:
+            comment: The comment record to restore
+        """
+        with self.locks.locked(comment.document_id):
+            self.comments[comment.id] = comment
+            self._document_comments.setdefault(comment.document_id, {})[comment.id] = None
+            self.revision = next(self._revisions)
+            self._document_revisions[comment.document_id] = self.revision
+    
+    def add_listener(self, listener: Callable[[str, CommentRecord, Dict[str, Any]], None]):
+        """
+        Register a callback to run after every comment mutation.
+        
+        Callbacks run once the mutating thread has released the document's
+        lock, in the order the comment changes were made.
+        
+        The callback receives the event name (``comment_added``,
+        ``comment_status_changed``, ``comment_resolved`` or
+        ``comment_linked``), the updated comment and a dict of the values
+        the mutation replaced.
+        
+        Args:
+            listener: Callback to register
+        """
+        self._events.add_listener(listener)
+    
+    def _record_change(self, event: str, comment: CommentRecord, previous: Dict[str, Any]):
+        """
+        Bump the version stamps and notify listeners of a mutation.
+        
+        Called with the document's lock held. Listeners get a copy of the
+        comment as of this change, queued by revision and delivered after the
+        lock is released.
+        """
+        revision = next(self._revisions)
+        self.revision = revision
+        self._document_revisions[comment.document_id] = revision
+        self._events.publish(comment.document_id, revision, event, comment.copy(), previous) 
\ No newline at end of file
@@ -5,31 +5,66 @@ Core functionality for managing documents.
 import os
 import uuid
 import shutil
+import itertools
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, BinaryIO
+from typing import Any, Callable, Iterator, List, Dict, Optional, BinaryIO, Tuple
 
-from src.models.document import Document, DocumentType, DocumentStatus
-from src.utils.document_processor import get_processor_for_file
+from src.models.document import DocumentType, DocumentStatus
+from src.models.records import DocumentRecord
+from src.core.extraction_cache import ExtractionCache
+from src.core.events import EventDispatcher
+from src.core.locks import LockStripes
+from src.utils.document_processor import Chunk
+from src.utils.sandbox import CHUNKS, METADATA, TRANSIENT_REASONS, ExtractionError, ExtractionSandbox
 
 
 class DocumentManager:
-    """Manager for documents in the system."""
+    """
+    Manager for documents in the system.
     
-    def __init__(self, storage_dir: str):
+    Safe to use from many request threads. Each document is guarded by a
+    striped lock rather than one lock for the whole manager, so requests on
+    different documents don't wait for each other. Version numbers are
+    allocated under the lock of the lineage's first version, so concurrent
+    uploads of new versions never get the same number.
+    """
+    
+    def __init__(self, storage_dir: str, sandbox: Optional[ExtractionSandbox] = None,
+                 locks: Optional[LockStripes] = None):
         """
         Initialize the document manager.
         
         Args:
             storage_dir: Directory to store uploaded documents
+            sandbox: Sandbox that runs extraction jobs (defaults to one with
+                the default limits)
+            locks: Per-document locks (defaults to a new set); share them
+                with the CommentManager so comment changes and status changes
+                on one document exclude each other
         """
         self.storage_dir = storage_dir
         os.makedirs(storage_dir, exist_ok=True)
         
         # In a real application, this would connect to a database
-        self.documents: Dict[str, Document] = {}
+        self.documents: Dict[str, DocumentRecord] = {}
+        self.extraction_cache = ExtractionCache()
+        self.sandbox = sandbox or ExtractionSandbox()
+        self.locks = locks or LockStripes()
+        # Highest version number allocated in each lineage, keyed by the ID
+        # of its first version
+        self._latest_versions: Dict[str, int] = {}
+        
+        # Version stamps for cache keys, bumped on every mutation. Stamps
+        # come from a counter whose next() is atomic, so concurrent
+        # mutations never share one.
+        self.revision = 0
+        self._revisions = itertools.count(1)
+        self._document_revisions: Dict[str, int] = {}
+        self._events = EventDispatcher(self.locks)
     
     def upload_document(self, file_obj: BinaryIO, original_filename: str, 
-                        document_type: DocumentType) -> Document:
+                        document_type: DocumentType) -> DocumentRecord:
         """
         Upload a new document.
         
@@ -51,7 +86,7 @@ class DocumentManager:
             shutil.copyfileobj(file_obj, f)
         
         # Create document record
-        document = Document(
+        document = DocumentRecord(
             id=document_id,
             filename=filename,
             original_filename=original_filename,
@@ -62,10 +97,30 @@ class DocumentManager:
             version=1
         )
         
-        self.documents[document_id] = document
+        with self.locks.locked(document_id):
+            self._latest_versions[document_id] = 1
+            self.documents[document_id] = document
+            self._record_change('document_added', document, {})
         return document
     
-    def get_document(self, document_id: str) -> Document:
+    @contextmanager
+    def lock_document(self, document_id: str) -> Iterator[None]:
+        """
+        Hold a document's lock across several operations.
+        
+        Used for read-then-write sequences such as "add a comment, then move
+        the document to In Review if it was Uploaded", so no other thread
+        changes the document, or its comments if the CommentManager shares
+        these locks, in between. The lock is re-entrant, so the managers'
+        own methods can be called while holding it.
+        
+        Args:
+            document_id: ID of the document to lock
+        """
+        with self.locks.locked(document_id):
+            yield
+    
+    def get_document(self, document_id: str) -> DocumentRecord:
         """
         Get a document by ID.
         
@@ -96,16 +151,128 @@ class DocumentManager:
         Raises:
             KeyError: If the document doesn't exist
         """
+        return "".join(text for _, text in self.get_document_chunks(document_id))
+    
+    def get_document_chunks(self, document_id: str) -> List[Chunk]:
+        """
+        Extract a document as fingerprinted chunks, reusing earlier versions.
+        
+        Chunks are cached per document. For a new version, chunks whose
+        fingerprint matches the nearest cached ancestor are reused, and only
+        the changed pages, paragraphs or rows are extracted. Reuse counts are
+        recorded in ``document.metadata['extraction']``.
+        
+        Extraction runs in the sandbox. A failed job is recorded in
+        ``document.metadata['extraction_error']``. Failures caused by the
+        file (invalid, parser error, CPU or memory limit) are not retried;
+        transient ones (timeout, killed, crashed) are retried on the next
+        call, and the record is cleared once extraction succeeds.
+        
+        Args:
+            document_id: ID of the document to extract
+            
+        Returns:
+            List of (fingerprint, text) chunks
+            
+        Raises:
+            KeyError: If the document doesn't exist
+            ExtractionError: If extraction fails or exceeds its limits
+        """
+        chunks = self.extraction_cache.get(document_id)
+        if chunks is None:
+            chunks, _ = self._extract(document_id)
+        return chunks
+    
+    def _extract(self, document_id: str) -> Tuple[List[Chunk], Dict[str, Any]]:
+        """
+        Extract a document's chunks and file metadata in one sandbox job.
+        
+        The job opens the file once, so its buffer and parser serve both
+        results, and both are cached together.
+        """
         document = self.get_document(document_id)
+        self._check_extraction_error(document)
+        base_document_id = self._nearest_cached_ancestor(document)
+        known = self.extraction_cache.known_chunks(base_document_id) if base_document_id else {}
+        
         file_path = os.path.join(self.storage_dir, document.filename)
+        try:
+            results = self.sandbox.extract(file_path, known)
+        except ExtractionError as e:
+            self._record_extraction_error(document, e)
+            raise
+        
+        chunks, metadata = results[CHUNKS], results[METADATA]
+        self._clear_extraction_error(document)
+        self.extraction_cache.put(document_id, chunks, metadata)
+        self.update_document_metadata(document_id, {'extraction': {
+            'chunks': len(chunks),
+            'reused': sum(1 for fp, _ in chunks if fp in known),
+            'base_document_id': base_document_id,
+        }})
+        return chunks, dict(metadata)
+    
+    def _check_extraction_error(self, document: DocumentRecord):
+        """Raise the recorded failure of a document that can't be extracted."""
+        error = document.metadata.get('extraction_error')
+        if error and error['reason'] not in TRANSIENT_REASONS:
+            raise ExtractionError(error['reason'], error['message'])
+    
+    def _clear_extraction_error(self, document: DocumentRecord):
+        """Drop a recorded transient failure after a successful retry."""
+        if 'extraction_error' in document.metadata:
+            with self.locks.locked(document.id):
+                metadata = dict(document.metadata)
+                previous = {'extraction_error': metadata.pop('extraction_error', None)}
+                document.metadata = metadata
+                self._record_change('document_metadata_changed', document, previous)
+    
+    def _record_extraction_error(self, document: DocumentRecord, error: ExtractionError):
+        """Record a failed extraction job on the document."""
+        with self.locks.locked(document.id):
+            document.metadata = dict(document.metadata, extraction_error={
+                'reason': error.reason,
+                'message': error.message,
+                'failed_at': datetime.now().isoformat(),
+            })
+            self._record_change('document_extraction_failed', document, {})
+    
+    def _nearest_cached_ancestor(self, document: DocumentRecord) -> Optional[str]:
+        """Find the closest previous version whose chunks are cached."""
+        parent_id = document.parent_document_id
+        while parent_id and parent_id in self.documents:
+            if self.extraction_cache.get(parent_id) is not None:
+                return parent_id
+            parent_id = self.documents[parent_id].parent_document_id
+        return None
+    
+    def get_lineage_root(self, document_id: str) -> str:
+        """
+        Follow parent links to the first version of a document.
         
-        processor = get_processor_for_file(file_path)
-        return processor.extract_text()
+        Args:
+            document_id: ID of any version
+            
+        Returns:
+            ID of the lineage's first version; an unknown ID is returned as is
+        """
+        while document_id in self.documents and self.documents[document_id].parent_document_id:
+            document_id = self.documents[document_id].parent_document_id
+        return document_id
+    
+    def _allocate_version(self, root_id: str, after: int) -> int:
+        """Reserve the next version number in a lineage; hold the root's lock."""
+        version = max(self._latest_versions.get(root_id, 0), after) + 1
+        self._latest_versions[root_id] = version
+        return version
     
     def get_document_metadata(self, document_id: str) -> Dict:
         """
         Get metadata for a document.
         
+        Read by the same sandbox job as the document's chunks, and cached
+        with them.
+        
         Args:
             document_id: ID of the document to get metadata for
             
@@ -114,14 +281,75 @@ class DocumentManager:
             
         Raises:
             KeyError: If the document doesn't exist
+            ExtractionError: If the file can't be read or exceeds the limits
         """
-        document = self.get_document(document_id)
-        file_path = os.path.join(self.storage_dir, document.filename)
+        metadata = self.extraction_cache.get_metadata(document_id)
+        if metadata is None:
+            _, metadata = self._extract(document_id)
+        return metadata
+    
+    def get_revision(self, document_id: Optional[str] = None) -> int:
+        """
+        Get a version stamp that changes whenever documents change.
         
-        processor = get_processor_for_file(file_path)
-        return processor.get_metadata()
+        Args:
+            document_id: ID of a single document, or None for all documents
+            
+        Returns:
+            The current revision number
+        """
+        if document_id is None:
+            return self.revision
+        return self._document_revisions.get(document_id, 0)
+    
+    def restore_document(self, document: DocumentRecord):
+        """
+        Insert or replace a document record without notifying listeners.
+        
+        Used when rebuilding state from persistent storage.
+        
+        Args:
+            document: The document record to restore
+        """
+        root_id = self.get_lineage_root(document.parent_document_id or document.id)
+        with self.locks.locked(document.id, root_id):
+            self.documents[document.id] = document
+            self.extraction_cache.invalidate(document.id)
+            self._latest_versions[root_id] = max(self._latest_versions.get(root_id, 0), document.version)
+            self.revision = next(self._revisions)
+            self._document_revisions[document.id] = self.revision
     
-    def get_all_documents(self) -> List[Document]:
+    def add_listener(self, listener: Callable[[str, DocumentRecord, Dict[str, Any]], None]):
+        """
+        Register a callback to run after every document mutation.
+        
+        Callbacks run once the mutating thread has released the document's
+        lock, in the order the document changes were made.
+        
+        The callback receives the event name (``document_added``,
+        ``document_status_changed``, ``document_extraction_failed``,
+        ``document_metadata_changed`` or ``document_version_attached``), the
+        updated document and a dict of the values the mutation replaced.
+        
+        Args:
+            listener: Callback to register
+        """
+        self._events.add_listener(listener)
+    
+    def _record_change(self, event: str, document: DocumentRecord, previous: Dict[str, Any]):
+        """
+        Bump the version stamps and notify listeners of a mutation.
+        
+        Called with the document's lock held. Listeners get a copy of the
+        document as of this change, queued by revision and delivered after the
+        lock is released.
+        """
+        revision = next(self._revisions)
+        self.revision = revision
+        self._document_revisions[document.id] = revision
+        self._events.publish(document.id, revision, event, document.copy(), previous)
+    
+    def get_all_documents(self) -> List[DocumentRecord]:
         """
         Get all documents.
         
@@ -130,7 +358,23 @@ class DocumentManager:
         """
         return list(self.documents.values())
     
-    def update_document_status(self, document_id: str, status: DocumentStatus) -> Document:
+    def copy_documents(self) -> List[DocumentRecord]:
+        """
+        Get a copy of every document, each taken under the document's lock.
+        
+        Use this to read records in bulk (snapshots, rebuilds) while other
+        threads may be changing them.
+        
+        Returns:
+            List of document copies
+        """
+        copies = []
+        for document in self.get_all_documents():
+            with self.locks.locked(document.id):
+                copies.append(document.copy())
+        return copies
+    
+    def update_document_status(self, document_id: str, status: DocumentStatus) -> DocumentRecord:
         """
         Update the status of a document.
         
@@ -145,15 +389,44 @@ class DocumentManager:
             KeyError: If the document doesn't exist
         """
         document = self.get_document(document_id)
-        document.status = status
-        document.last_modified = datetime.now()
+        with self.locks.locked(document_id):
+            previous = {'status': document.status}
+            document.status = status
+            document.last_modified = datetime.now()
+            self._record_change('document_status_changed', document, previous)
         
         return document
     
-    def create_new_version(self, document_id: str, file_obj: BinaryIO) -> Document:
+    def update_document_metadata(self, document_id: str, values: Dict[str, Any]) -> DocumentRecord:
+        """
+        Set metadata entries of a document.
+        
+        Args:
+            document_id: ID of the document to update
+            values: Metadata entries to set
+            
+        Returns:
+            The updated document
+            
+        Raises:
+            KeyError: If the document doesn't exist
+        """
+        document = self.get_document(document_id)
+        with self.locks.locked(document_id):
+            previous = {key: document.metadata.get(key) for key in values}
+            document.metadata = {**document.metadata, **values}
+            self._record_change('document_metadata_changed', document, previous)
+        
+        return document
+    
+    def create_new_version(self, document_id: str, file_obj: BinaryIO) -> DocumentRecord:
         """
         Create a new version of a document.
         
+        The new version is numbered one past the highest version in the
+        document's lineage, so two versions uploaded at once from the same
+        parent get distinct numbers.
+        
         Args:
             document_id: ID of the document to create a new version of
             file_obj: File object with the new version
@@ -175,23 +448,84 @@ class DocumentManager:
         with open(file_path, 'wb') as f:
             shutil.copyfileobj(file_obj, f)
         
-        # Create new document record
-        new_document = Document(
-            id=new_document_id,
-            filename=filename,
-            original_filename=original_document.original_filename,
-            document_type=original_document.document_type,
-            upload_date=datetime.now(),
-            last_modified=datetime.now(),
-            status=DocumentStatus.UPDATED,
-            version=original_document.version + 1,
-            parent_document_id=document_id
-        )
-        
-        self.documents[new_document_id] = new_document
+        root_id = self.get_lineage_root(document_id)
+        with self.locks.locked(root_id):
+            # Create new document record
+            new_document = DocumentRecord(
+                id=new_document_id,
+                filename=filename,
+                original_filename=original_document.original_filename,
+                document_type=original_document.document_type,
+                upload_date=datetime.now(),
+                last_modified=datetime.now(),
+                status=DocumentStatus.UPDATED,
+                version=self._allocate_version(root_id, original_document.version),
+                parent_document_id=document_id
+            )
+            
+            self.documents[new_document_id] = new_document
+            self._record_change('document_added', new_document, {})
         return new_document
     
-    def get_document_version_history(self, document_id: str) -> List[Document]:
+    def attach_as_version(self, document_id: str, parent_document_id: str) -> DocumentRecord:
+        """
+        Make a separately uploaded document the next version of another.
+        
+        Used when a revision was uploaded as a new document instead of
+        through create_new_version.
+        
+        Args:
+            document_id: ID of the document to attach
+            parent_document_id: ID of the version it follows
+            
+        Returns:
+            The attached document
+            
+        Raises:
+            KeyError: If either document doesn't exist
+            ValueError: If the document already belongs to a version history
+        """
+        document = self.get_document(document_id)
+        parent = self.get_document(parent_document_id)
+        root_id = self.get_lineage_root(parent_document_id)
+        with self.locks.locked(document_id, root_id):
+            if document.parent_document_id or any(
+                doc.parent_document_id == document_id for doc in list(self.documents.values())
+            ):
+                raise ValueError("Document already belongs to a version history")
+            if document_id == parent_document_id:
+                raise ValueError("A document can't be a version of itself")
+            
+            previous = {'parent_document_id': document.parent_document_id, 'version': document.version}
+            document.parent_document_id = parent.id
+            document.version = self._allocate_version(root_id, parent.version)
+            document.last_modified = datetime.now()
+            self._latest_versions.pop(document_id, None)
+            self._record_change('document_version_attached', document, previous)
+        
+        return document
+    
+    def get_latest_version(self, document_id: str) -> DocumentRecord:
+        """
+        Get the newest version descending from a document.
+        
+        Args:
+            document_id: ID of any version of the document
+            
+        Returns:
+            The highest version found by following newer versions
+            
+        Raises:
+            KeyError: If the document doesn't exist
+        """
+        latest = self.get_document(document_id)
+        while True:
+            newer = [doc for doc in list(self.documents.values()) if doc.parent_document_id == latest.id]
+            if not newer:
+                return latest
+            latest = max(newer, key=lambda d: d.version)
+    
+    def get_document_version_history(self, document_id: str) -> List[DocumentRecord]:
         """
         Get the version history of a document.
         
@@ -210,7 +544,7 @@ class DocumentManager:
         versions = [document]
         
         # Find all documents that have this as a parent
-        for doc in self.documents.values():
+        for doc in list(self.documents.values()):
             if doc.parent_document_id == document_id:
                 versions.append(doc)
         
@@ -0,0 +1,302 @@
+"""
+Near-duplicate detection of uploaded documents with MinHash and LSH.
+"""
+
+import logging
+import re
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.core.document_manager import DocumentManager
+
+logger = logging.getLogger(__name__)
+
+# Words per shingle; five words keep common phrases from matching on their own
+SHINGLE_SIZE = 5
+
+# Shingles hashed per block, bounding the (block x permutations) work array
+HASH_BLOCK_SIZE = 8192
+
+# Candidate lineages recorded per document
+MAX_CANDIDATES = 5
+
+_WORD_PATTERN = re.compile(r'\w+')
+_EMPTY_HASH = np.uint32(0xFFFFFFFF)
+
+
+def shingle_hashes(text: str, shingle_size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Hash the overlapping word shingles of a text.
+    
+    Each distinct word is hashed once and shingle hashes are combined from
+    the word hashes with vectorized arithmetic.
+    
+    Args:
+        text: Text to shingle
+        shingle_size: Words per shingle
+    
+    Returns:
+        Distinct 32-bit shingle hashes
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    
+    word_hashes = {}
+    for word in words:
+        if word not in word_hashes:
+            word_hashes[word] = zlib.crc32(word.encode('utf-8'))
+    hashes = np.fromiter((word_hashes[word] for word in words), dtype=np.uint64, count=len(words))
+    
+    span = max(1, len(words) - shingle_size + 1)
+    combined = np.zeros(span, dtype=np.uint64)
+    for i in range(min(shingle_size, len(words))):
+        combined = combined * np.uint64(1000003) + hashes[i:i + span]
+    return np.unique(combined & np.uint64(0xFFFFFFFF))
+
+
+class DuplicateIndex:
+    """
+    Index of MinHash signatures with locality-sensitive hashing.
+    
+    A signature is computed once per document at ingest. It is split into
+    bands and each band is hashed into a bucket, so documents that share a
+    bucket in any band are candidates. A lookup touches one bucket per band
+    rather than every document. Candidates are then checked against the
+    similarity threshold using their full signatures.
+    
+    Signatures are kept only in memory, as they are large and the journal
+    would repeat them with every later change to the document's metadata.
+    After a restart the index is rebuilt by signing each document again.
+    """
+    
+    def __init__(self, document_manager: DocumentManager, num_perm: int = 128,
+                 bands: int = 16, threshold: float = 0.7, seed: int = 1):
+        """
+        Initialize the index.
+        
+        With 16 bands of 8 rows, pairs above about 0.7 Jaccard similarity
+        are almost always found and pairs below 0.4 rarely become candidates.
+        
+        Args:
+            document_manager: Manager holding the documents
+            num_perm: Hash functions per signature
+            bands: LSH bands; must divide num_perm
+            threshold: Minimum estimated Jaccard similarity for a match
+            seed: Seed of the hash functions; signatures made with different
+                seeds can't be compared
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.document_manager = document_manager
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        
+        # Multiply-shift hashing: ((a * x + b) mod 2**64) >> 32, with a odd
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        
+        self._lock = threading.Lock()
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bands)]
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='duplicates')
+    
+    def __len__(self) -> int:
+        return len(self._signatures)
+    
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a text.
+        
+        Args:
+            text: Text to sign
+        
+        Returns:
+            Array of num_perm 32-bit minimums, or None if the text has no words
+        """
+        shingles = shingle_hashes(text)
+        if not len(shingles):
+            return None
+        signature = np.full(self.num_perm, _EMPTY_HASH, dtype=np.uint32)
+        for start in range(0, len(shingles), HASH_BLOCK_SIZE):
+            block = shingles[start:start + HASH_BLOCK_SIZE, np.newaxis]
+            hashed = ((block * self._a + self._b) >> np.uint64(32)).astype(np.uint32)
+            np.minimum(signature, hashed.min(axis=0), out=signature)
+        return signature
+    
+    def add(self, document_id: str, signature: np.ndarray):
+        """
+        Index a document's signature.
+        
+        Args:
+            document_id: ID of the document
+            signature: Its MinHash signature
+        """
+        with self._lock:
+            if document_id in self._signatures:
+                self._remove(document_id)
+            self._signatures[document_id] = signature
+            for band, key in enumerate(self._band_keys(signature)):
+                self._buckets[band].setdefault(key, []).append(document_id)
+    
+    def remove(self, document_id: str):
+        """
+        Remove a document from the index, if present.
+        
+        Args:
+            document_id: ID of the document
+        """
+        with self._lock:
+            if document_id in self._signatures:
+                self._remove(document_id)
+    
+    def _remove(self, document_id: str):
+        signature = self._signatures.pop(document_id)
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band][key]
+            bucket.remove(document_id)
+            if not bucket:
+                del self._buckets[band][key]
+    
+    def _band_keys(self, signature: np.ndarray) -> Iterable[bytes]:
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows].tobytes()
+    
+    def query(self, signature: np.ndarray, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """
+        Find indexed documents similar to a signature.
+        
+        Args:
+            signature: MinHash signature to look up
+            exclude: Document IDs to leave out of the results
+        
+        Returns:
+            (document ID, estimated Jaccard similarity) pairs at or above the
+            threshold, most similar first
+        """
+        exclude = set(exclude)
+        with self._lock:
+            candidates = []
+            for band, key in enumerate(self._band_keys(signature)):
+                for document_id in self._buckets[band].get(key, ()):
+                    if document_id not in exclude:
+                        candidates.append(document_id)
+                        exclude.add(document_id)
+            if not candidates:
+                return []
+            stacked = np.stack([self._signatures[d] for d in candidates])
+        
+        similarities = (stacked == signature).mean(axis=1)
+        matches = [
+            (document_id, float(similarity))
+            for document_id, similarity in zip(candidates, similarities)
+            if similarity >= self.threshold
+        ]
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+    
+    def check(self, document_id: str) -> List[Dict[str, Any]]:
+        """
+        Sign a newly ingested document, index it and find its near duplicates.
+        
+        Matches within the document's own version lineage are ignored, and
+        each other lineage is reported once, by its most similar version.
+        The candidates are recorded in the document's metadata as
+        ``duplicate_candidates``.
+        
+        Args:
+            document_id: ID of the document
+        
+        Returns:
+            Candidate dicts with the matching document's ``document_id``,
+            ``original_filename``, ``version`` and ``similarity``
+        
+        Raises:
+            KeyError: If the document doesn't exist
+            ExtractionError: If the document's text can't be extracted
+        """
+        signature = self.signature(self.document_manager.get_document_text(document_id))
+        if signature is None:
+            return []
+        
+        root = self.document_manager.get_lineage_root(document_id)
+        candidates = []
+        seen_roots = {root}
+        for match_id, similarity in self.query(signature, exclude=[document_id]):
+            match_root = self.document_manager.get_lineage_root(match_id)
+            if match_root in seen_roots:
+                continue
+            seen_roots.add(match_root)
+            match = self.document_manager.get_document(match_id)
+            candidates.append({
+                'document_id': match_id,
+                'original_filename': match.original_filename,
+                'version': match.version,
+                'similarity': round(similarity, 3),
+            })
+            if len(candidates) == MAX_CANDIDATES:
+                break
+        
+        self.add(document_id, signature)
+        self.document_manager.update_document_metadata(document_id, {'duplicate_candidates': candidates})
+        return candidates
+    
+    def submit_check(self, document_id: str) -> Future:
+        """
+        Check a newly ingested document for near duplicates in the background.
+        
+        Signing a document means extracting its text, which can take as
+        long as the sandbox allows, so uploads hand it off here instead of
+        waiting. Checks run one at a time, in submission order; the
+        document's detail page shows the candidates once they're recorded.
+        
+        Args:
+            document_id: ID of the document
+            
+        Returns:
+            Future resolving to the candidates found
+        """
+        def run():
+            try:
+                return self.check(document_id)
+            except Exception as e:
+                logger.warning(f"Duplicate check failed for {document_id}: {str(e)}")
+                raise
+        
+        return self._executor.submit(run)
+    
+    def rebuild(self):
+        """
+        Sign and index every document, e.g. after a restart.
+        
+        Documents whose text can't be extracted are left out. Candidates
+        already recorded on documents are kept as they are.
+        """
+        for document in self.document_manager.copy_documents():
+            if 'extraction_error' in document.metadata:
+                continue
+            try:
+                signature = self.signature(self.document_manager.get_document_text(document.id))
+            except Exception as e:
+                logger.warning(f"Could not sign {document.id} for duplicate detection: {str(e)}")
+                continue
+            if signature is not None:
+                self.add(document.id, signature)
+    
+    def submit_rebuild(self) -> Future:
+        """
+        Rebuild the index in the background.
+        
+        Checks submitted afterwards run once the rebuild is done, so they
+        are compared against every existing document.
+        
+        Returns:
+            Future resolving once the index is rebuilt
+        """
+        return self._executor.submit(self.rebuild)
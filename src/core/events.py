@@ -0,0 +1,93 @@
+"""
+Ordered delivery of manager events to listeners outside the document locks.
+"""
+
+import heapq
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Set, Tuple
+
+from src.core.locks import LockStripes
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[str, Any, Dict[str, Any]], None]
+
+
+class EventDispatcher:
+    """
+    Queues manager events under a document's lock and delivers them after it.
+    
+    Listeners can be slow (rendering templates, writing the journal), so
+    they run once the publishing thread has released every lock rather than
+    while other requests wait on the document. Each event carries the
+    document's sequence number, and one thread at a time delivers a
+    document's queue in sequence order, so listeners still see the changes
+    to any one document in the order they were made.
+    
+    By the time a listener runs, the change has been made and its locks
+    released, so a failing listener is logged rather than raised: the
+    caller's change succeeded, and the other listeners and the document's
+    later events are still delivered.
+    """
+    
+    def __init__(self, locks: LockStripes):
+        """
+        Initialize the dispatcher.
+        
+        Args:
+            locks: Locks the publishing manager mutates documents under
+        """
+        self.locks = locks
+        self.listeners: List[Listener] = []
+        self._mutex = threading.Lock()
+        self._queues: Dict[Hashable, List[Tuple[int, str, Any, Dict[str, Any]]]] = {}
+        self._delivering: Set[Hashable] = set()
+    
+    def add_listener(self, listener: Listener):
+        """
+        Register a callback for every published event.
+        
+        Args:
+            listener: Callback taking the event name, record and replaced values
+        """
+        self.listeners.append(listener)
+    
+    def publish(self, key: Hashable, sequence: int, event: str, record: Any,
+                previous: Dict[str, Any]):
+        """
+        Queue an event for delivery once the caller's locks are released.
+        
+        The caller holds ``key``'s lock, so sequence numbers for one key are
+        queued in increasing order.
+        
+        Args:
+            key: Document the event belongs to
+            sequence: Number ordering the event among the document's events
+            event: Event name
+            record: Copy of the record as of the event
+            previous: Values the mutation replaced
+        """
+        with self._mutex:
+            heapq.heappush(self._queues.setdefault(key, []), (sequence, event, record, previous))
+        self.locks.defer(lambda: self._deliver(key))
+    
+    def _deliver(self, key: Hashable):
+        """Deliver a document's queued events unless another thread already is."""
+        with self._mutex:
+            if key in self._delivering:
+                return
+            self._delivering.add(key)
+        while True:
+            with self._mutex:
+                queue = self._queues.get(key)
+                if not queue:
+                    self._queues.pop(key, None)
+                    self._delivering.discard(key)
+                    return
+                _, event, record, previous = heapq.heappop(queue)
+            for listener in self.listeners:
+                try:
+                    listener(event, record, previous)
+                except Exception:
+                    logger.exception(f"Listener {listener!r} failed on {event} for {key}")
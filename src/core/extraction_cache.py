@@ -0,0 +1,102 @@
+"""
+Cache of extracted document chunks and file metadata, shared across document versions.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.utils.document_processor import Chunk
+
+
+class ExtractionCache:
+    """
+    Least-recently-used cache of extracted chunks and file metadata per document.
+    
+    Both come from the same extraction job, so they are cached and evicted
+    together. New versions of a document look up their parent's chunks here so only the
+    pages, paragraphs or rows that changed need to be extracted again.
+    Safe to share between threads.
+    """
+    
+    def __init__(self, max_documents: int = 256):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_documents: Number of documents to keep chunks for
+        """
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[List[Chunk], Dict[str, Any]]]" = OrderedDict()
+    
+    def get(self, document_id: str) -> Optional[List[Chunk]]:
+        """
+        Get the cached chunks for a document.
+        
+        Args:
+            document_id: ID of the document
+            
+        Returns:
+            The document's chunks, or None if they aren't cached
+        """
+        entry = self._get(document_id)
+        return entry[0] if entry is not None else None
+    
+    def get_metadata(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached file metadata for a document.
+        
+        Args:
+            document_id: ID of the document
+            
+        Returns:
+            A copy of the document's file metadata, or None if it isn't cached
+        """
+        entry = self._get(document_id)
+        return dict(entry[1]) if entry is not None else None
+    
+    def _get(self, document_id: str) -> Optional[Tuple[List[Chunk], Dict[str, Any]]]:
+        """Look up a document's entry and mark it recently used."""
+        with self._lock:
+            entry = self._entries.get(document_id)
+            if entry is not None:
+                self._entries.move_to_end(document_id)
+        return entry
+    
+    def put(self, document_id: str, chunks: List[Chunk], metadata: Dict[str, Any]):
+        """
+        Cache the chunks and metadata for a document, evicting the oldest entry if full.
+        
+        Args:
+            document_id: ID of the document
+            chunks: Extracted chunks of the document
+            metadata: File metadata read by the same extraction job
+        """
+        with self._lock:
+            self._entries[document_id] = (chunks, metadata)
+            self._entries.move_to_end(document_id)
+            while len(self._entries) > self.max_documents:
+                self._entries.popitem(last=False)
+    
+    def known_chunks(self, document_id: str) -> Dict[str, str]:
+        """
+        Get a document's reusable chunk texts keyed by fingerprint.
+        
+        Args:
+            document_id: ID of the document
+            
+        Returns:
+            Mapping of fingerprint to chunk text (empty if not cached)
+        """
+        return {fp: text for fp, text in self.get(document_id) or [] if fp is not None}
+    
+    def invalidate(self, document_id: str):
+        """
+        Drop the cached chunks and metadata for a document.
+        
+        Args:
+            document_id: ID of the document
+        """
+        with self._lock:
+            self._entries.pop(document_id, None)
@@ -0,0 +1,303 @@
+"""
+Operation journal and snapshots for the in-memory managers.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.models.document import Comment, Document
+from src.models.records import CommentRecord, DocumentRecord
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = 'snapshot.jsonl'
+JOURNAL_FILE = 'journal.jsonl'
+# Journal segment being folded into a snapshot; replayed if a crash
+# interrupts compaction
+COMPACTING_FILE = 'journal.compacting.jsonl'
+
+
+class JournalCorruptError(Exception):
+    """Raised when a snapshot or journal file is damaged before its final line."""
+
+
+class Journal:
+    """
+    Durable operation log for DocumentManager and CommentManager.
+    
+    Every mutation is appended to a JSON-lines journal as the full state of
+    the record it changed, so replaying entries is idempotent. Entries are
+    written by a listener after the mutation has been applied in memory,
+    and fsynced in batches: after ``fsync_batch_size`` entries, or by a
+    background thread within ``fsync_interval`` seconds. This is not a
+    write-ahead log: a crash can lose mutations that were applied and
+    acknowledged but not yet fsynced, and an entry that can't be written
+    is logged by the event dispatcher rather than failing the request
+    whose mutation already happened. Once
+    ``snapshot_every`` entries have accumulated, the background thread
+    writes a compact snapshot of both managers and drops the journal
+    entries it covers.
+    
+    On startup, ``recover`` loads the snapshot and replays the journal
+    segment of an interrupted snapshot, then the journal tail.
+    """
+    
+    def __init__(self, directory: str, fsync_batch_size: int = 64,
+                 fsync_interval: float = 1.0, snapshot_every: int = 10000):
+        """
+        Initialize the journal.
+        
+        Args:
+            directory: Directory holding the snapshot and journal files
+            fsync_batch_size: Entries written before forcing an fsync
+            fsync_interval: Longest time, in seconds, an entry waits for fsync
+            snapshot_every: Journal entries between automatic snapshots
+        """
+        self.directory = directory
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._file = None
+        self._pending = 0
+        self._entries_since_snapshot = 0
+        self._document_manager: Optional[DocumentManager] = None
+        self._comment_manager: Optional[CommentManager] = None
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+    
+    def recover(self, document_manager: DocumentManager,
+                comment_manager: CommentManager) -> Dict[str, Any]:
+        """
+        Rebuild the managers from the snapshot and journal.
+        
+        Args:
+            document_manager: Manager to restore documents into
+            comment_manager: Manager to restore comments into
+            
+        Returns:
+            Recovery report with record counts and elapsed seconds
+            
+        Raises:
+            JournalCorruptError: If a file is damaged before its final line
+        """
+        start = time.perf_counter()
+        report = {'snapshot_records': 0, 'journal_records': 0}
+        
+        for entry in self._read(self._path(SNAPSHOT_FILE)):
+            self._restore(entry, document_manager, comment_manager)
+            report['snapshot_records'] += 1
+        for name in (COMPACTING_FILE, JOURNAL_FILE):
+            for entry in self._read(self._path(name)):
+                self._restore(entry, document_manager, comment_manager)
+                report['journal_records'] += 1
+        
+        self._entries_since_snapshot = report['journal_records']
+        report['seconds'] = time.perf_counter() - start
+        logger.info(
+            f"Recovered {report['snapshot_records']} snapshot and "
+            f"{report['journal_records']} journal records in {report['seconds']:.3f}s"
+        )
+        return report
+    
+    def _read(self, path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the entries of a JSON-lines file.
+        
+        A crash mid-write can only damage the final line. Such a line is cut
+        off the file so entries appended after recovery are readable. A
+        damaged line followed by more entries means the file itself is
+        corrupt, and is never truncated.
+        
+        Raises:
+            JournalCorruptError: If a line other than the final one is invalid
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as f:
+            offset = 0
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    if f.read().strip():
+                        raise JournalCorruptError(f"Corrupt entry at byte {offset} of {path}")
+                    logger.warning(f"Truncating torn entry at byte {offset} of {path}")
+                    f.truncate(offset)
+                    return
+                offset += len(line)
+                yield entry
+    
+    def _restore(self, entry: Dict[str, Any], document_manager: DocumentManager,
+                 comment_manager: CommentManager):
+        """Apply one snapshot or journal entry."""
+        if entry['kind'] == 'document':
+            document = Document.model_validate(entry['record'])
+            document_manager.restore_document(DocumentRecord.from_model(document))
+        else:
+            comment = Comment.model_validate(entry['record'])
+            comment_manager.restore_comment(CommentRecord.from_model(comment))
+    
+    def attach(self, document_manager: DocumentManager, comment_manager: CommentManager):
+        """
+        Start journaling the managers' mutations.
+        
+        Call this after ``recover`` so restored records aren't logged again.
+        
+        Args:
+            document_manager: Manager whose documents to journal
+            comment_manager: Manager whose comments to journal
+        """
+        self._document_manager = document_manager
+        self._comment_manager = comment_manager
+        document_manager.add_listener(self.on_document_change)
+        comment_manager.add_listener(self.on_comment_change)
+        self.resume()
+    
+    def resume(self):
+        """
+        Open the journal for appending and start the background thread.
+        
+        Called by ``attach``. A forked worker process calls it again after
+        the parent has closed the journal, since the parent's locks and
+        thread don't carry over into the child.
+        """
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._file = open(self._path(JOURNAL_FILE), 'a', encoding='utf-8')
+        self._flusher = threading.Thread(target=self._run_flusher, name='journal-flusher', daemon=True)
+        self._flusher.start()
+    
+    def on_document_change(self, event: str, document: DocumentRecord, previous: Dict[str, Any]):
+        """Journal a document mutation."""
+        self.append({'op': event, 'kind': 'document', 'record': _serialize(document)})
+    
+    def on_comment_change(self, event: str, comment: CommentRecord, previous: Dict[str, Any]):
+        """Journal a comment mutation."""
+        self.append({'op': event, 'kind': 'comment', 'record': _serialize(comment)})
+    
+    def append(self, entry: Dict[str, Any]):
+        """
+        Append an entry, fsyncing once a full batch is pending.
+        
+        Args:
+            entry: JSON-serializable journal entry
+        """
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            self._entries_since_snapshot += 1
+            if self._pending >= self.fsync_batch_size:
+                self._sync()
+    
+    def _sync(self):
+        """Flush and fsync the journal. Caller holds the lock."""
+        if self._pending and self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+    
+    def flush(self):
+        """Force every appended entry to disk."""
+        with self._lock:
+            self._sync()
+    
+    def _run_flusher(self):
+        """Background loop bounding fsync latency and triggering snapshots."""
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self.flush()
+                if self._entries_since_snapshot >= self.snapshot_every:
+                    self.snapshot()
+            except Exception as e:
+                logger.error(f"Journal maintenance failed: {str(e)}")
+    
+    def snapshot(self) -> int:
+        """
+        Write a snapshot of both managers and drop the journal it covers.
+        
+        The journal is rotated first, so mutations made while the snapshot
+        is written go to the new journal and are replayed on recovery. If an
+        earlier snapshot was interrupted, the journal is appended to the
+        segment it left behind rather than replacing it.
+        
+        Returns:
+            Number of records in the snapshot
+        """
+        with self._snapshot_lock:
+            return self._write_snapshot()
+    
+    def _write_snapshot(self) -> int:
+        """Rotate the journal and write the snapshot. Caller holds the snapshot lock."""
+        with self._lock:
+            self._sync()
+            self._file.close()
+            self._rotate()
+            self._file = open(self._path(JOURNAL_FILE), 'a', encoding='utf-8')
+            self._entries_since_snapshot = 0
+        
+        # Records are copied under their locks, so none changes while serialized
+        documents = self._document_manager.copy_documents()
+        comments = self._comment_manager.copy_comments()
+        
+        temp_path = self._path(SNAPSHOT_FILE + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for document in documents:
+                f.write(json.dumps({'kind': 'document', 'record': _serialize(document)},
+                                   separators=(',', ':')) + '\n')
+            for comment in comments:
+                f.write(json.dumps({'kind': 'comment', 'record': _serialize(comment)},
+                                   separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._path(SNAPSHOT_FILE))
+        os.remove(self._path(COMPACTING_FILE))
+        
+        logger.info(f"Wrote journal snapshot of {len(documents) + len(comments)} records")
+        return len(documents) + len(comments)
+    
+    def _rotate(self):
+        """Move the journal into the compacting segment. Caller holds the lock."""
+        journal_path = self._path(JOURNAL_FILE)
+        compacting_path = self._path(COMPACTING_FILE)
+        if not os.path.exists(compacting_path):
+            os.replace(journal_path, compacting_path)
+            return
+        # Both segments are older than the snapshot about to be written, and
+        # recovery replays the compacting segment before the journal
+        with open(journal_path, 'rb') as source, open(compacting_path, 'ab') as target:
+            for line in source:
+                target.write(line)
+            target.flush()
+            os.fsync(target.fileno())
+        os.remove(journal_path)
+    
+    def close(self):
+        """Stop the background thread and sync the journal."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def _serialize(record) -> Dict[str, Any]:
+    """Convert a document or comment record to JSON-compatible data."""
+    return record.to_model().model_dump(mode='json', exclude={'comments'})
@@ -0,0 +1,166 @@
+"""
+Per-document event channels for live review updates.
+"""
+
+import json
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+# Event sent to a subscriber whose queue overflowed; the page reloads instead
+# of applying a partial stream of updates.
+RELOAD_EVENT = 'reload'
+
+# Milliseconds a stream turned away at the subscriber limit waits before
+# EventSource reconnects
+BUSY_RETRY_MS = 30000
+
+
+class TooManySubscribersError(Exception):
+    """Raised when a subscription would exceed the broker's subscriber limit."""
+
+
+class LiveUpdateBroker:
+    """
+    Fans out document events to server-sent event (SSE) subscribers.
+    
+    Each subscriber gets a bounded queue. A subscriber that falls too far
+    behind has its queue replaced by a single reload event rather than
+    blocking the publisher.
+    
+    Every open stream holds a request thread, so the number of subscribers
+    can be capped below the server's thread count; streams beyond the cap
+    are turned away and the page falls back to plain form posts.
+    """
+    
+    def __init__(self, max_queue_size: int = 100, heartbeat_seconds: float = 15.0,
+                 max_subscribers: Optional[int] = None):
+        """
+        Initialize the broker.
+        
+        Args:
+            max_queue_size: Events buffered per subscriber before it is told to reload
+            heartbeat_seconds: Idle time after which a keep-alive comment is sent
+            max_subscribers: Subscribers allowed at once across all documents
+                (None for no limit)
+        """
+        self.max_queue_size = max_queue_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[queue.Queue]] = {}
+        self._subscriber_count = 0
+    
+    def is_full(self) -> bool:
+        """Check whether the subscriber limit has been reached."""
+        return self.max_subscribers is not None and self._subscriber_count >= self.max_subscribers
+    
+    def has_subscribers(self, document_id: str) -> bool:
+        """Check whether anyone is listening to a document's channel."""
+        return bool(self._subscribers.get(document_id))
+    
+    def subscribe(self, document_id: str) -> queue.Queue:
+        """
+        Subscribe to a document's channel.
+        
+        Args:
+            document_id: ID of the document to follow
+            
+        Returns:
+            Queue that receives (event, data) tuples
+            
+        Raises:
+            TooManySubscribersError: If the subscriber limit has been reached
+        """
+        subscriber: queue.Queue = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            if self.is_full():
+                raise TooManySubscribersError(f"{self._subscriber_count} live update streams are open")
+            self._subscribers.setdefault(document_id, []).append(subscriber)
+            self._subscriber_count += 1
+        return subscriber
+    
+    def unsubscribe(self, document_id: str, subscriber: queue.Queue):
+        """
+        Stop delivering a document's events to a subscriber.
+        
+        Args:
+            document_id: ID of the followed document
+            subscriber: Queue returned by subscribe()
+        """
+        with self._lock:
+            subscribers = self._subscribers.get(document_id, [])
+            if subscriber in subscribers:
+                subscribers.remove(subscriber)
+                self._subscriber_count -= 1
+            if not subscribers:
+                self._subscribers.pop(document_id, None)
+    
+    def publish(self, document_id: str, event: str, data: Dict[str, Any]):
+        """
+        Publish an event to every subscriber of a document.
+        
+        Args:
+            document_id: ID of the document the event concerns
+            event: Event name
+            data: JSON-serializable event payload
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(document_id, []))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                self._overflow(subscriber)
+    
+    def _overflow(self, subscriber: queue.Queue):
+        """Replace a lagging subscriber's backlog with a reload event."""
+        try:
+            while True:
+                subscriber.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            subscriber.put_nowait((RELOAD_EVENT, {}))
+        except queue.Full:
+            # Another publisher refilled the queue; it will overflow again
+            pass
+    
+    def stream(self, document_id: str) -> Iterator[str]:
+        """
+        Subscribe to a document and yield its events in SSE wire format.
+        
+        The subscription is made on the first iteration, before anything is
+        sent, and ends when the generator is closed. A response that is
+        never iterated, e.g. because the client disconnected first, holds
+        no subscription. If the subscriber limit has been reached, the
+        stream only tells the client to retry after BUSY_RETRY_MS and ends.
+        
+        Args:
+            document_id: ID of the document to follow
+            
+        Returns:
+            Iterator of SSE message strings
+        """
+        def generate():
+            try:
+                subscriber = self.subscribe(document_id)
+            except TooManySubscribersError:
+                yield f"retry: {BUSY_RETRY_MS}\n\n"
+                return
+            try:
+                # Tell EventSource how long to wait before reconnecting
+                yield "retry: 3000\n\n"
+                while True:
+                    try:
+                        event, data = subscriber.get(timeout=self.heartbeat_seconds)
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                    if event == RELOAD_EVENT:
+                        return
+            finally:
+                self.unsubscribe(document_id, subscriber)
+        
+        return generate()
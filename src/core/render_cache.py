@@ -0,0 +1,81 @@
+"""
+Cache of rendered template fragments keyed on data version stamps.
+"""
+
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+
+
+class RenderCache:
+    """
+    Least-recently-used cache of rendered HTML fragments.
+    
+    Keys include the version stamps of the data a fragment was rendered
+    from (see ``DocumentManager.get_revision`` and
+    ``CommentManager.get_revision``), so a mutation invalidates a fragment
+    simply by changing its key. Stale entries age out of the LRU.
+    """
+    
+    def __init__(self, max_entries: int = 512):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Number of fragments to keep
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._fragments: "OrderedDict[Hashable, str]" = OrderedDict()
+        # Revision counters restart with the process, so salt ETags with a
+        # per-process id to keep them from matching pages rendered earlier.
+        self._salt = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+    
+    def etag(self, key: Hashable) -> str:
+        """
+        Get the ETag for a cache key.
+        
+        Args:
+            key: Cache key, including the relevant version stamps
+            
+        Returns:
+            An opaque ETag value
+        """
+        return hashlib.blake2b(f"{self._salt}:{key!r}".encode('utf-8'), digest_size=16).hexdigest()
+    
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> Tuple[str, str]:
+        """
+        Get a fragment from the cache, rendering and storing it on a miss.
+        
+        Args:
+            key: Cache key, including the relevant version stamps
+            render: Callable that renders the fragment
+            
+        Returns:
+            Tuple of (etag, fragment HTML)
+        """
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self.hits += 1
+                self._fragments.move_to_end(key)
+                return self.etag(key), fragment
+            self.misses += 1
+        
+        # Rendered outside the lock; two threads missing on the same key
+        # both render it, which is cheaper than serializing every render
+        fragment = render()
+        with self._lock:
+            self._fragments[key] = fragment
+            while len(self._fragments) > self.max_entries:
+                self._fragments.popitem(last=False)
+        return self.etag(key), fragment
+    
+    def clear(self):
+        """Drop all cached fragments."""
+        with self._lock:
+            self._fragments.clear()
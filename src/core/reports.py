@@ -0,0 +1,444 @@
+"""
+Comment-resolution report generation.
+"""
+
+import csv
+import hashlib
+import io
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.models.document import CommentStatus, DocumentStatus, DocumentType
+
+logger = logging.getLogger(__name__)
+
+REPORT_COLUMNS = [
+    'Document', 'Version', 'Document Status', 'Comment ID', 'Page', 'Section',
+    'Comment', 'Comment Status', 'Created', 'Resolution', 'Resolved By',
+    'Resolved At', 'Related Comments',
+]
+
+# CSV rows written to the output buffer before it is yielded
+CSV_ROWS_PER_CHUNK = 500
+
+# Spreadsheet programs treat text starting with these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ReportFormat(str, Enum):
+    """Output formats for reports."""
+    
+    CSV = "csv"
+    XLSX = "xlsx"
+    PDF = "pdf"
+
+
+MIMETYPES = {
+    ReportFormat.CSV: 'text/csv',
+    ReportFormat.XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    ReportFormat.PDF: 'application/pdf',
+}
+
+
+def _format_datetime(value: Optional[datetime]) -> str:
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else ''
+
+
+def _escape_formula(value: Any) -> Any:
+    """Prefix text that a spreadsheet would evaluate with a quote, so it stays text."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class ReportEngine:
+    """
+    Builds comment logs for a document, a version lineage or a filtered set.
+    
+    Rows are generated lazily from the managers and written straight to
+    the output, so CSV and XLSX exports use constant memory regardless of
+    size. Finished report files are cached under a key made of the
+    documents' version stamps, so a report is rebuilt only after its data
+    changes. Large exports run as background jobs.
+    
+    The cache is held in memory, so report files left in the output
+    directory by a previous run are deleted at startup.
+    """
+    
+    def __init__(self, document_manager: DocumentManager, comment_manager: CommentManager,
+                 output_dir: str, max_workers: int = 2, max_cached_reports: int = 64,
+                 max_jobs: int = 256):
+        """
+        Initialize the report engine.
+        
+        Args:
+            document_manager: Manager holding the documents
+            comment_manager: Manager holding the comments
+            output_dir: Directory for finished report files
+            max_workers: Background export threads
+            max_cached_reports: Report files kept before the oldest is deleted
+            max_jobs: Export jobs remembered before the oldest is forgotten
+        """
+        self.document_manager = document_manager
+        self.comment_manager = comment_manager
+        self.output_dir = output_dir
+        self.max_cached_reports = max_cached_reports
+        self.max_jobs = max_jobs
+        os.makedirs(output_dir, exist_ok=True)
+        self._remove_stale_files()
+        
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='report')
+    
+    def _remove_stale_files(self):
+        """Delete finished and partly written reports no cache entry refers to."""
+        suffixes = tuple(f".{report_format.value}" for report_format in ReportFormat) + ('.tmp',)
+        for name in os.listdir(self.output_dir):
+            if name.endswith(suffixes):
+                try:
+                    os.remove(os.path.join(self.output_dir, name))
+                except OSError:
+                    pass
+    
+    def select_documents(self, scope: str, document_id: Optional[str] = None,
+                         status: Optional[DocumentStatus] = None,
+                         document_type: Optional[DocumentType] = None) -> List[str]:
+        """
+        Get the IDs of the documents a report covers.
+        
+        Args:
+            scope: 'document', 'lineage' (every version of the document) or 'filter'
+            document_id: Document for the 'document' and 'lineage' scopes
+            status: Only include documents with this status ('filter' scope)
+            document_type: Only include documents of this type ('filter' scope)
+            
+        Returns:
+            Document IDs in report order
+            
+        Raises:
+            KeyError: If the document doesn't exist
+            ValueError: If the scope is unknown
+        """
+        if scope == 'document':
+            return [self.document_manager.get_document(document_id).id]
+        if scope == 'lineage':
+            history = self.document_manager.get_document_version_history(document_id)
+            return list(dict.fromkeys(document.id for document in history))
+        if scope == 'filter':
+            return [
+                document.id for document in self.document_manager.get_all_documents()
+                if (status is None or document.status == status)
+                and (document_type is None or document.document_type == document_type)
+            ]
+        raise ValueError(f"Unknown report scope: {scope}")
+    
+    def count_rows(self, document_ids: List[str]) -> int:
+        """Count the comments a report over the documents would contain."""
+        return sum(self.comment_manager.count_comments_for_document(d) for d in document_ids)
+    
+    def iter_rows(self, document_ids: List[str],
+                  comment_status: Optional[CommentStatus] = None) -> Iterator[List[Any]]:
+        """
+        Yield one row per comment, following REPORT_COLUMNS.
+        
+        Args:
+            document_ids: Documents to report on
+            comment_status: Only include comments with this status
+        """
+        for document_id in document_ids:
+            # Copy under the lock so each document's rows are consistent,
+            # without holding it while the caller consumes them
+            with self.document_manager.lock_document(document_id), \
+                    self.comment_manager.locks.locked(document_id):
+                document = self.document_manager.get_document(document_id).copy()
+                comments = [c.copy() for c in self.comment_manager.get_comments_for_document(document_id)]
+            for comment in comments:
+                if comment_status is not None and comment.status != comment_status:
+                    continue
+                yield [
+                    document.original_filename,
+                    document.version,
+                    document.status.value,
+                    comment.id,
+                    comment.page_number or '',
+                    comment.section or '',
+                    comment.text,
+                    comment.status.value,
+                    _format_datetime(comment.created_at),
+                    comment.resolution_text or '',
+                    comment.resolved_by or '',
+                    _format_datetime(comment.resolved_at),
+                    ', '.join(comment.related_comment_ids),
+                ]
+    
+    def stream_csv(self, document_ids: List[str],
+                   comment_status: Optional[CommentStatus] = None) -> Iterator[str]:
+        """
+        Yield a CSV report in chunks, for streaming responses.
+        
+        Text a spreadsheet would run as a formula, such as a comment
+        starting with '=', is prefixed with a quote.
+        
+        Args:
+            document_ids: Documents to report on
+            comment_status: Only include comments with this status
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(REPORT_COLUMNS)
+        for count, row in enumerate(self.iter_rows(document_ids, comment_status), 1):
+            writer.writerow([_escape_formula(value) for value in row])
+            if count % CSV_ROWS_PER_CHUNK == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    
+    def cache_key(self, report_format: ReportFormat, document_ids: List[str],
+                  comment_status: Optional[CommentStatus] = None) -> str:
+        """
+        Get the cache key of a report, which changes whenever its data does.
+        
+        Args:
+            report_format: Output format
+            document_ids: Documents to report on
+            comment_status: Comment status filter
+            
+        Returns:
+            Hex digest identifying the report contents
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{report_format.value}:{comment_status}".encode('utf-8'))
+        for document_id in document_ids:
+            digest.update(
+                f"|{document_id}:{self.document_manager.get_revision(document_id)}"
+                f":{self.comment_manager.get_revision(document_id)}".encode('utf-8')
+            )
+        return digest.hexdigest()
+    
+    def get_cached(self, key: str) -> Optional[str]:
+        """
+        Get the path of a finished report.
+        
+        Args:
+            key: Report cache key
+            
+        Returns:
+            Path of the report file, or None if it isn't cached
+        """
+        with self._lock:
+            path = self._cache.get(key)
+            if path is not None:
+                self._cache.move_to_end(key)
+            return path
+    
+    def build(self, report_format: ReportFormat, document_ids: List[str],
+              comment_status: Optional[CommentStatus] = None) -> str:
+        """
+        Build a report file, or reuse the cached one if the data is unchanged.
+        
+        Args:
+            report_format: Output format
+            document_ids: Documents to report on
+            comment_status: Only include comments with this status
+            
+        Returns:
+            Path of the finished report file
+        """
+        key = self.cache_key(report_format, document_ids, comment_status)
+        path = self.get_cached(key)
+        if path is not None:
+            return path
+        
+        path = os.path.join(self.output_dir, f"{key}.{report_format.value}")
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            if report_format == ReportFormat.CSV:
+                with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+                    for chunk in self.stream_csv(document_ids, comment_status):
+                        f.write(chunk)
+            elif report_format == ReportFormat.XLSX:
+                _write_xlsx(temp_path, self.iter_rows(document_ids, comment_status))
+            else:
+                _write_pdf(temp_path, self.iter_rows(document_ids, comment_status))
+            os.replace(temp_path, path)
+        except BaseException:
+            # Don't leave a partly written report behind
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        
+        self._store(key, path)
+        return path
+    
+    def _store(self, key: str, path: str):
+        """
+        Cache a finished report, deleting the oldest beyond the limit.
+        
+        Jobs whose file is deleted are marked 'expired' in the same step,
+        so no job keeps pointing at a missing file.
+        """
+        with self._lock:
+            self._cache[key] = path
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cached_reports:
+                _, old_path = self._cache.popitem(last=False)
+                for job in self._jobs.values():
+                    if job['path'] == old_path:
+                        job['status'] = 'expired'
+                        job['path'] = None
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+    
+    def submit(self, report_format: ReportFormat, document_ids: List[str],
+               comment_status: Optional[CommentStatus] = None) -> str:
+        """
+        Build a report in the background.
+        
+        Args:
+            report_format: Output format
+            document_ids: Documents to report on
+            comment_status: Only include comments with this status
+            
+        Returns:
+            ID of the export job
+        """
+        job_id = str(uuid.uuid4())
+        job = {'id': job_id, 'status': 'pending', 'format': report_format.value,
+               'path': None, 'error': None}
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        
+        def run():
+            with self._lock:
+                job['status'] = 'running'
+            try:
+                path = self.build(report_format, document_ids, comment_status)
+            except Exception as e:
+                logger.error(f"Report job {job_id} failed: {str(e)}")
+                with self._lock:
+                    job['error'] = str(e)
+                    job['status'] = 'failed'
+                return
+            with self._lock:
+                # The file may have been evicted while other reports were built
+                if path in self._cache.values():
+                    job['path'] = path
+                    job['status'] = 'done'
+                else:
+                    job['status'] = 'expired'
+        
+        self._executor.submit(run)
+        return job_id
+    
+    def get_job(self, job_id: str) -> Dict[str, Any]:
+        """
+        Get the state of an export job.
+        
+        Args:
+            job_id: ID returned by submit()
+            
+        Returns:
+            Dict with the job's id, status ('pending', 'running', 'done',
+            'failed' or 'expired' once its file was evicted), format, file
+            path and error
+            
+        Raises:
+            KeyError: If the job doesn't exist or was forgotten
+        """
+        with self._lock:
+            if job_id not in self._jobs:
+                raise KeyError(f"Report job {job_id} not found")
+            return dict(self._jobs[job_id])
+
+
+def _write_xlsx(path: str, rows: Iterator[List[Any]]):
+    """
+    Write rows with openpyxl's write-only mode, which streams to disk.
+    
+    openpyxl stores text starting with '=' as a formula, so such values are
+    written as explicit string cells instead.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Comments')
+    sheet.append(REPORT_COLUMNS)
+    for row in rows:
+        sheet.append([_text_cell(sheet, value) for value in row])
+    workbook.save(path)
+
+
+def _text_cell(sheet, value: Any) -> Any:
+    """Wrap formula-like text in a cell typed as a string."""
+    if not (isinstance(value, str) and value.startswith(FORMULA_PREFIXES)):
+        return value
+    cell = WriteOnlyCell(sheet, value)
+    cell.data_type = 's'
+    return cell
+
+
+# Columns shown in PDF reports: (REPORT_COLUMNS index, width in points)
+PDF_COLUMNS = [(0, 110), (1, 30), (4, 30), (5, 90), (6, 200), (7, 60), (9, 150), (10, 60)]
+PDF_FONT_SIZE = 7
+PDF_LINE_HEIGHT = 9
+PDF_MARGIN = 30
+
+
+def _write_pdf(path: str, rows: Iterator[List[Any]]):
+    """
+    Write rows as a paginated table.
+    
+    reportlab keeps finished pages until save(), so memory grows with the
+    page count; pages are compressed to keep that small.
+    """
+    width, height = landscape(letter)
+    pdf = canvas.Canvas(path, pagesize=(width, height), pageCompression=1)
+    
+    def header():
+        pdf.setFont('Helvetica-Bold', PDF_FONT_SIZE)
+        x = PDF_MARGIN
+        for index, column_width in PDF_COLUMNS:
+            pdf.drawString(x, height - PDF_MARGIN, REPORT_COLUMNS[index])
+            x += column_width
+        pdf.setFont('Helvetica', PDF_FONT_SIZE)
+        return height - PDF_MARGIN - 2 * PDF_LINE_HEIGHT
+    
+    y = header()
+    for row in rows:
+        cells = [
+            simpleSplit(str(row[index]), 'Helvetica', PDF_FONT_SIZE, column_width - 4)
+            for index, column_width in PDF_COLUMNS
+        ]
+        lines = max(len(cell) for cell in cells) or 1
+        if y - lines * PDF_LINE_HEIGHT < PDF_MARGIN:
+            pdf.showPage()
+            y = header()
+        x = PDF_MARGIN
+        for cell, (_, column_width) in zip(cells, PDF_COLUMNS):
+            for n, line in enumerate(cell):
+                pdf.drawString(x, y - n * PDF_LINE_HEIGHT, line)
+            x += column_width
+        y -= lines * PDF_LINE_HEIGHT + 4
+    pdf.save()
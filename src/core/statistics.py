@@ -0,0 +1,128 @@
+"""
+Review statistics maintained incrementally from manager events.
+"""
+
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.models.document import CommentStatus, DocumentStatus, DocumentType
+from src.models.records import CommentRecord, DocumentRecord
+
+# Comment statuses counted as still needing work on the dashboard
+OPEN_COMMENT_STATUSES = (CommentStatus.OPEN, CommentStatus.IN_PROGRESS)
+
+
+class ReviewStatistics:
+    """
+    Materialized review metrics for the dashboard.
+    
+    Counters are updated by listeners on the document and comment managers,
+    so reading them never scans either manager. ``rebuild`` recomputes
+    everything from the managers in bulk, e.g. after restoring state.
+    """
+    
+    def __init__(self):
+        """Initialize empty statistics."""
+        self._lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        """Zero every counter."""
+        self.documents_by_status: Counter = Counter()
+        self.documents_by_type: Counter = Counter()
+        self.comments_by_status: Counter = Counter()
+        self.resolution_seconds = 0.0
+        self.resolution_count = 0
+    
+    def attach(self, document_manager: DocumentManager, comment_manager: CommentManager):
+        """
+        Start tracking the managers' mutations.
+        
+        Args:
+            document_manager: Manager whose documents to count
+            comment_manager: Manager whose comments to count
+        """
+        document_manager.add_listener(self.on_document_change)
+        comment_manager.add_listener(self.on_comment_change)
+    
+    def rebuild(self, document_manager: DocumentManager, comment_manager: CommentManager):
+        """
+        Recompute every counter from the managers' current contents.
+        
+        Args:
+            document_manager: Manager whose documents to count
+            comment_manager: Manager whose comments to count
+        """
+        documents = document_manager.copy_documents()
+        comments = comment_manager.copy_comments()
+        with self._lock:
+            self._reset()
+            for document in documents:
+                self.documents_by_status[document.status] += 1
+                self.documents_by_type[document.document_type] += 1
+            for comment in comments:
+                self.comments_by_status[comment.status] += 1
+                self._add_resolution(comment.created_at, comment.resolved_at, 1)
+    
+    def on_document_change(self, event: str, document: DocumentRecord, previous: Dict[str, Any]):
+        """Update document counters after a document mutation."""
+        with self._lock:
+            if event == 'document_added':
+                self.documents_by_status[document.status] += 1
+                self.documents_by_type[document.document_type] += 1
+            elif event == 'document_status_changed':
+                self.documents_by_status[previous['status']] -= 1
+                self.documents_by_status[document.status] += 1
+    
+    def on_comment_change(self, event: str, comment: CommentRecord, previous: Dict[str, Any]):
+        """Update comment counters after a comment mutation."""
+        with self._lock:
+            if event == 'comment_added':
+                self.comments_by_status[comment.status] += 1
+                return
+            if 'status' in previous:
+                self.comments_by_status[previous['status']] -= 1
+                self.comments_by_status[comment.status] += 1
+            if event == 'comment_resolved':
+                # A comment resolved again replaces its earlier resolution time
+                self._add_resolution(comment.created_at, previous.get('resolved_at'), -1)
+                self._add_resolution(comment.created_at, comment.resolved_at, 1)
+    
+    def _add_resolution(self, created_at: datetime, resolved_at: Optional[datetime], sign: int):
+        """Add (or with sign=-1, remove) one resolution time."""
+        if resolved_at is not None:
+            self.resolution_seconds += sign * (resolved_at - created_at).total_seconds()
+            self.resolution_count += sign
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current metrics.
+        
+        Returns:
+            Dict of document and comment counts and the average time to
+            resolution in seconds (None before any comment is resolved)
+        """
+        with self._lock:
+            open_comments = sum(self.comments_by_status[s] for s in OPEN_COMMENT_STATUSES)
+            total_comments = sum(self.comments_by_status.values())
+            return {
+                'documents': {
+                    'total': sum(self.documents_by_status.values()),
+                    'by_status': {s.value: self.documents_by_status[s] for s in DocumentStatus},
+                    'by_type': {t.value: self.documents_by_type[t] for t in DocumentType},
+                },
+                'comments': {
+                    'total': total_comments,
+                    'open': open_comments,
+                    'resolved': total_comments - open_comments,
+                    'by_status': {s.value: self.comments_by_status[s] for s in CommentStatus},
+                    'average_resolution_seconds': (
+                        self.resolution_seconds / self.resolution_count
+                        if self.resolution_count else None
+                    ),
+                },
+            }
@@ -0,0 +1,62 @@
+"""
+Request models for the batch operations API.
+"""
+
+from typing import List, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+from typing_extensions import Annotated
+
+from src.models.document import CommentStatus, DocumentStatus
+
+
+class AddCommentOperation(BaseModel):
+    """Add a comment to a document."""
+    
+    op: Literal['add_comment']
+    document_id: str
+    text: str = Field(min_length=1)
+    page_number: Optional[int] = Field(default=None, ge=1)
+    section: Optional[str] = None
+
+
+class ResolveCommentOperation(BaseModel):
+    """Resolve a comment."""
+    
+    op: Literal['resolve_comment']
+    comment_id: str
+    resolution_text: str = Field(min_length=1)
+    resolved_by: str = "System User"
+
+
+class UpdateCommentStatusOperation(BaseModel):
+    """Move a comment to a new status."""
+    
+    op: Literal['update_comment_status']
+    comment_id: str
+    status: CommentStatus
+
+
+class UpdateDocumentStatusOperation(BaseModel):
+    """Move a document to a new status."""
+    
+    op: Literal['update_document_status']
+    document_id: str
+    status: DocumentStatus
+
+
+BatchOperation = Annotated[
+    Union[
+        AddCommentOperation,
+        ResolveCommentOperation,
+        UpdateCommentStatusOperation,
+        UpdateDocumentStatusOperation,
+    ],
+    Field(discriminator='op'),
+]
+
+
+class BatchRequest(BaseModel):
+    """A list of operations to apply together."""
+    
+    operations: List[BatchOperation] = Field(min_length=1, max_length=5000)
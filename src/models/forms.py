@@ -0,0 +1,52 @@
+"""
+Request models for the HTML form routes.
+"""
+
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+from src.models.document import DocumentStatus, DocumentType
+
+
+class FormModel(BaseModel):
+    """Base for form models; blank fields count as missing, as browsers submit them empty."""
+    
+    @model_validator(mode='before')
+    @classmethod
+    def drop_blank_fields(cls, data: Any) -> Any:
+        if isinstance(data, dict):
+            return {key: value for key, value in data.items() if value != ''}
+        return data
+
+
+class UploadForm(FormModel):
+    """Fields of the document upload form."""
+    
+    document_type: DocumentType
+
+
+class CommentForm(FormModel):
+    """Fields of the add comment form."""
+    
+    text: str = Field(min_length=1)
+    page_number: Optional[int] = Field(default=None, ge=1)
+    section: Optional[str] = None
+
+
+class ResolutionForm(FormModel):
+    """Fields of the resolve comment form."""
+    
+    resolution_text: str = Field(min_length=1)
+
+
+class DocumentStatusForm(FormModel):
+    """Fields of the document status form."""
+    
+    status: DocumentStatus
+
+
+class AttachVersionForm(FormModel):
+    """Fields of the attach as version form."""
+    
+    parent_document_id: str
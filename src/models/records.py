@@ -0,0 +1,169 @@
+"""
+Compact in-memory records for documents and comments.
+
+The managers hold large numbers of these, so they use ``__slots__`` instead
+of a per-instance dict, intern their ids and share immutable defaults.
+They skip validation; convert to and from the pydantic models in
+``src.models.document`` at the API boundaries with ``to_model()`` and
+``from_model()``.
+"""
+
+import sys
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from src.models.document import (
+    Comment, CommentStatus, Document, DocumentStatus, DocumentType
+)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Intern an optional id so repeated references share one string."""
+    return sys.intern(value) if value is not None else None
+
+
+class CommentRecord:
+    """Slots-based counterpart of :class:`Comment`."""
+    
+    __slots__ = (
+        'id', 'document_id', 'text', 'page_number', 'section', 'created_at',
+        'updated_at', 'status', 'resolution_text', 'resolved_at', 'resolved_by',
+        'related_comment_ids',
+    )
+    
+    def __init__(self, id: str, document_id: str, text: str,
+                 page_number: Optional[int] = None, section: Optional[str] = None,
+                 created_at: Optional[datetime] = None,
+                 updated_at: Optional[datetime] = None,
+                 status: CommentStatus = CommentStatus.OPEN,
+                 resolution_text: Optional[str] = None,
+                 resolved_at: Optional[datetime] = None,
+                 resolved_by: Optional[str] = None,
+                 related_comment_ids: Tuple[str, ...] = ()):
+        self.id = _intern(id)
+        self.document_id = _intern(document_id)
+        self.text = text
+        self.page_number = page_number
+        self.section = section
+        self.created_at = created_at or datetime.now()
+        self.updated_at = updated_at
+        self.status = status
+        self.resolution_text = resolution_text
+        self.resolved_at = resolved_at
+        self.resolved_by = _intern(resolved_by)
+        self.related_comment_ids = tuple(_intern(i) for i in related_comment_ids)
+    
+    @classmethod
+    def from_model(cls, comment: Comment) -> 'CommentRecord':
+        """Create a record from a validated :class:`Comment`."""
+        return cls(**comment.model_dump())
+    
+    def to_model(self) -> Comment:
+        """
+        Convert to a :class:`Comment` for serialization.
+        
+        Records only hold data that was validated on the way in, so the
+        model is built without validating again.
+        """
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields['related_comment_ids'] = list(self.related_comment_ids)
+        return Comment.model_construct(**fields)
+    
+    def copy(self) -> 'CommentRecord':
+        """Get a copy that later changes to this record don't affect."""
+        copy = CommentRecord.__new__(CommentRecord)
+        for name in self.__slots__:
+            setattr(copy, name, getattr(self, name))
+        return copy
+    
+    def __repr__(self) -> str:
+        return f"CommentRecord(id={self.id!r}, document_id={self.document_id!r}, status={self.status.value!r})"
+
+
+class DocumentRecord:
+    """Slots-based counterpart of :class:`Document`."""
+    
+    __slots__ = (
+        'id', 'filename', 'original_filename', 'document_type', 'upload_date',
+        'last_modified', 'status', 'version', 'parent_document_id', '_metadata',
+    )
+    
+    def __init__(self, id: str, filename: str, original_filename: str,
+                 document_type: DocumentType,
+                 upload_date: Optional[datetime] = None,
+                 last_modified: Optional[datetime] = None,
+                 status: DocumentStatus = DocumentStatus.UPLOADED,
+                 version: int = 1,
+                 parent_document_id: Optional[str] = None,
+                 metadata: Optional[dict] = None):
+        self.id = _intern(id)
+        self.filename = filename
+        self.original_filename = original_filename
+        self.document_type = document_type
+        self.upload_date = upload_date or datetime.now()
+        self.last_modified = last_modified or self.upload_date
+        self.status = status
+        self.version = version
+        self.parent_document_id = _intern(parent_document_id)
+        self._metadata = metadata or None
+    
+    @property
+    def metadata(self) -> dict:
+        """
+        Extensible metadata; read-only for callers.
+        
+        Reading never allocates, as documents are read without their lock.
+        The DocumentManager replaces the whole dict under the document's
+        lock instead of changing it in place.
+        """
+        return self._metadata or {}
+    
+    @metadata.setter
+    def metadata(self, metadata: dict):
+        self._metadata = metadata or None
+    
+    @classmethod
+    def from_model(cls, document: Document) -> 'DocumentRecord':
+        """
+        Create a record from a validated :class:`Document`.
+        
+        Comments are held by the CommentManager, not on the record, so a
+        document that carries comments is rejected rather than having them
+        dropped.
+        
+        Raises:
+            ValueError: If the document has comments
+        """
+        if document.comments:
+            raise ValueError("Documents are stored without comments; add them to the CommentManager")
+        fields = document.model_dump(exclude={'comments'})
+        return cls(**fields)
+    
+    def to_model(self, comments: Sequence[CommentRecord] = ()) -> Document:
+        """
+        Convert to a :class:`Document` for serialization.
+        
+        Records only hold data that was validated on the way in, so the
+        model is built without validating again.
+        
+        Args:
+            comments: The document's comments to include, e.g. from
+                ``CommentManager.get_comments_for_document``; the model's
+                ``comments`` is empty otherwise
+        """
+        fields = {name: getattr(self, name) for name in self.__slots__ if name != '_metadata'}
+        fields['metadata'] = dict(self._metadata or {})
+        fields['comments'] = [comment.to_model() for comment in comments]
+        return Document.model_construct(**fields)
+    
+    def copy(self) -> 'DocumentRecord':
+        """Get a copy that later changes to this record, including its metadata, don't affect."""
+        copy = DocumentRecord.__new__(DocumentRecord)
+        for name in self.__slots__:
+            setattr(copy, name, getattr(self, name))
+        if self._metadata is not None:
+            copy._metadata = dict(self._metadata)
+        return copy
+    
+    def __repr__(self) -> str:
+        return f"DocumentRecord(id={self.id!r}, version={self.version}, status={self.status.value!r})"
@@ -3,35 +3,240 @@ Main script to run the DocProcessor application.
 """
 
 import os
+import sys
+import queue
+import signal
+import socket
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 import argparse
 import logging
 
-from src.app import app
+from werkzeug.serving import BaseWSGIServer
 
+# Set in the environment of a re-executed master to pass on the listening socket
+LISTEN_FD_ENV = 'DOCPROCESSOR_LISTEN_FD'
 
-def setup_logging():
-    """Set up logging configuration."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('app.log')
-        ]
-    )
+# A server process exiting sooner than this after starting is treated as a boot failure
+SERVER_BOOT_SECONDS = 2
 
+logger = logging.getLogger(__name__)
 
-def parse_args():
+
+def setup_logging(log_queue) -> QueueListener:
+    """
+    Set up logging configuration.
+    
+    Log records are put on a queue and written to the console and app.log
+    by a background listener, so request threads never wait on file or
+    console I/O. The server process shares the master's queue.
+    
+    Args:
+        log_queue: Queue the records pass through
+    
+    Returns:
+        The started listener; stop it to flush pending records
+    """
+    formatter = logging.Formatter('%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s')
+    handlers = [logging.StreamHandler(), logging.FileHandler('app.log')]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.handlers = [QueueHandler(log_queue)]
+    
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def parse_args(argv=None):
     """Parse command-line arguments."""
     parser = argparse.ArgumentParser(description='Run the DocProcessor application')
-    parser.add_argument('--host', type=str, default='127.0.0.1', 
+    parser.add_argument('--host', type=str, default='127.0.0.1',
                         help='Host to bind the server to')
-    parser.add_argument('--port', type=int, default=5000, 
+    parser.add_argument('--port', type=int, default=5000,
                         help='Port to bind the server to')
-    parser.add_argument('--debug', action='store_true', 
+    parser.add_argument('--debug', action='store_true',
                         help='Enable debug mode')
-    return parser.parse_args()
+    parser.add_argument('--production', action='store_true',
+                        help='Serve with the supervised, threaded production server')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Request threads in production mode (default: WEB_THREADS)')
+    return parser.parse_args(argv)
+
+
+def load_app():
+    """
+    Import the application and its document processing libraries.
+    
+    In production mode this happens once in the master, before the server
+    process is forked, so a replacement server process starts without
+    importing them again.
+    """
+    from src.app import app
+    from flask.logging import default_handler
+    
+    # Records reach the console through the logging queue instead
+    app.logger.removeHandler(default_handler)
+    return app
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that handles requests on a fixed-size thread pool."""
+    
+    multithread = True
+    
+    def __init__(self, host: str, port: int, app, threads: int, fd=None):
+        """
+        Initialize the server.
+        
+        Args:
+            host: Host the socket is bound to
+            port: Port the socket is bound to
+            app: WSGI application to serve
+            threads: Requests handled at once; each open live-update
+                stream holds a thread for as long as it is connected, up
+                to LIVE_UPDATE_MAX_STREAMS of them
+            fd: Already listening socket to accept connections on
+        """
+        super().__init__(host, port, app, fd=fd)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+    
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request_thread, request, client_address)
+    
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+    
+    def serve_forever(self, poll_interval: float = 0.5):
+        """Serve until shutdown(), then wait for in-flight requests to finish."""
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._pool.shutdown(wait=True)
+
+
+def open_listener(host: str, port: int) -> socket.socket:
+    """
+    Get the listening socket the server process accepts connections on.
+    
+    A master re-executed by a reload inherits the socket from its previous
+    image, so no connection is refused while the server process restarts.
+    """
+    fd = os.environ.pop(LISTEN_FD_ENV, None)
+    if fd is not None:
+        sock = socket.socket(fileno=int(fd))
+    else:
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        sock = socket.create_server((host, port), family=family, backlog=2048)
+    return sock
+
+
+def run_server(app, sock: socket.socket, host: str, port: int, threads: int, log_queue):
+    """Serve requests in the forked server process until told to stop."""
+    logging.getLogger().handlers = [QueueHandler(log_queue)]
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    
+    from src.app import journal
+    if journal is not None:
+        journal.resume()
+    
+    server = PooledWSGIServer(host, port, app, threads, fd=sock.fileno())
+    
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever() to return, so it can't run on its thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    
+    signal.signal(signal.SIGTERM, stop)
+    logger.info(f"Server {os.getpid()} serving with {threads} threads")
+    server.serve_forever()
+    
+    if journal is not None:
+        journal.close()
+    logger.info(f"Server {os.getpid()} stopped")
+
+
+def serve_production(app, host: str, port: int, threads: int,
+                     log_queue, listener: QueueListener):
+    """
+    Run one threaded server process under a supervising master.
+    
+    This is a single-process threaded server. Documents, comments,
+    live-update subscribers, caches and report jobs are held in process
+    memory, so one process serves every request and concurrency comes from
+    its request threads. Request handling therefore runs on one core at a
+    time; document extraction, the CPU-heavy work, runs in sandbox
+    processes that use the others.
+    
+    The master only supervises. SIGTERM or SIGINT stops the server process
+    gracefully and exits. SIGHUP stops it gracefully and re-executes the
+    master, which loads the current code and forks a fresh server process
+    on the same listening socket. A server process that dies is replaced.
+    """
+    sock = open_listener(host, port)
+    context = multiprocessing.get_context('fork')
+    
+    from src.app import journal
+    if journal is not None:
+        # Only the server process may write; it reopens the journal after forking
+        journal.close()
+    
+    def spawn():
+        process = context.Process(
+            target=run_server, args=(app, sock, host, port, threads, log_queue),
+            name='docprocessor-server'
+        )
+        process.start()
+        return process, time.monotonic()
+    
+    requested = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: requested.append('stop'))
+    signal.signal(signal.SIGINT, lambda signum, frame: requested.append('stop'))
+    signal.signal(signal.SIGHUP, lambda signum, frame: requested.append('reload'))
+    
+    process, started = spawn()
+    logger.info(f"Master {os.getpid()} listening on http://{host}:{port} with {threads} threads")
+    
+    while not requested:
+        time.sleep(0.5)
+        if process.is_alive() or requested:
+            continue
+        if time.monotonic() - started < SERVER_BOOT_SECONDS:
+            # Restarting a server that can't boot would only repeat the failure
+            logger.error(f"Server {process.pid} failed to boot; shutting down")
+            requested.append('stop')
+            break
+        logger.warning(f"Server {process.pid} exited with code {process.exitcode}; restarting")
+        process, started = spawn()
+    
+    process.terminate()
+    process.join(app.config['GRACEFUL_TIMEOUT'])
+    if process.is_alive():
+        logger.warning(f"Server {process.pid} did not stop in time; killing it")
+        process.kill()
+        process.join()
+    
+    if requested[0] == 'reload':
+        logger.info("Reloading")
+        listener.stop()
+        os.set_inheritable(sock.fileno(), True)
+        os.environ[LISTEN_FD_ENV] = str(sock.fileno())
+        os.execv(sys.executable, [sys.executable, '-m', 'src.run'] + sys.argv[1:])
+    
+    logger.info("Stopped")
+    sock.close()
 
 
 def main():
@@ -39,19 +244,31 @@ def main():
     # Load environment variables from .env file if it exists
     load_dotenv()
     
-    # Set up logging
-    setup_logging()
-    
     # Parse command-line arguments
     args = parse_args()
     
+    # Set up logging; the server process needs a process-safe queue
+    log_queue = multiprocessing.get_context('fork').Queue() if args.production else queue.Queue()
+    listener = setup_logging(log_queue)
+    
     # Create upload directory if it doesn't exist
     upload_dir = os.environ.get('UPLOAD_FOLDER', 'uploads')
     os.makedirs(upload_dir, exist_ok=True)
     
-    # Run the Flask application
-    app.run(host=args.host, port=args.port, debug=args.debug)
+    app = load_app()
+    try:
+        if args.production:
+            serve_production(
+                app, args.host, args.port,
+                threads=args.threads or app.config['WEB_THREADS'],
+                log_queue=log_queue, listener=listener
+            )
+        else:
+            # Run the Flask development server
+            app.run(host=args.host, port=args.port, debug=args.debug)
+    finally:
+        listener.stop()
 
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -38,6 +38,19 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Shared status modal on the documents list: point its form at the
+    // document whose "Change Status" link opened it
+    const statusModal = document.getElementById('statusModal');
+    if (statusModal) {
+        statusModal.addEventListener('show.bs.modal', function(event) {
+            const trigger = event.relatedTarget;
+            if (trigger) {
+                statusModal.querySelector('form').action = trigger.getAttribute('data-action');
+                statusModal.querySelector('select[name="status"]').value = trigger.getAttribute('data-status');
+            }
+        });
+    }
+    
     // Form validation example
     const forms = document.querySelectorAll('.needs-validation');
     Array.from(forms).forEach(function (form) {
@@ -49,8 +62,118 @@ document.addEventListener('DOMContentLoaded', function() {
             form.classList.add('was-validated');
         }, false);
     });
+    
+    setupLiveUpdates();
 });
 
+// Badge colours, mirroring the templates
+const DOCUMENT_STATUS_BADGES = {
+    'Uploaded': 'bg-info',
+    'In Review': 'bg-warning',
+    'Reviewed': 'bg-success',
+    'Updated': 'bg-primary',
+    'Approved': 'bg-success',
+    'Resubmitted': 'bg-secondary'
+};
+
+// Live review updates on the document detail page: subscribe to the
+// document's event stream and patch the page in place, and send the
+// comment and status forms through the batch API instead of reloading.
+function setupLiveUpdates() {
+    const detail = document.getElementById('document-detail');
+    if (!detail || !window.EventSource) {
+        return;
+    }
+    const documentId = detail.getAttribute('data-document-id');
+    const batchUrl = detail.getAttribute('data-batch-url');
+    const events = new EventSource(detail.getAttribute('data-events-url'));
+    
+    events.addEventListener('comment_added', function(e) {
+        const data = JSON.parse(e.data);
+        if (!document.getElementById(`comment-${data.comment_id}`)) {
+            document.getElementById('comment-list').insertAdjacentHTML('beforeend', data.html);
+        }
+        document.getElementById('no-comments').classList.add('d-none');
+    });
+    ['comment_resolved', 'comment_status_changed', 'comment_linked'].forEach(function(name) {
+        events.addEventListener(name, function(e) {
+            const data = JSON.parse(e.data);
+            const item = document.getElementById(`comment-${data.comment_id}`);
+            if (item) {
+                item.outerHTML = data.html;
+            }
+        });
+    });
+    events.addEventListener('document_status_changed', function(e) {
+        setDocumentStatusBadge(documentId, JSON.parse(e.data).status);
+    });
+    events.addEventListener('version_added', function(e) {
+        const data = JSON.parse(e.data);
+        const alert = document.createElement('div');
+        alert.className = 'alert alert-info';
+        alert.textContent = `Version ${data.version} of this document was uploaded. `;
+        const link = document.createElement('a');
+        link.href = data.url;
+        link.textContent = 'View it';
+        alert.appendChild(link);
+        detail.after(alert);
+    });
+    events.addEventListener('reload', function() {
+        window.location.reload();
+    });
+    
+    // Forms are in the page or inserted later by comment_added events
+    document.addEventListener('submit', function(e) {
+        const form = e.target;
+        const op = form.getAttribute('data-batch-op');
+        if (!op || events.readyState !== EventSource.OPEN) {
+            return;  // Fall back to a normal form post
+        }
+        e.preventDefault();
+        submitBatchForm(batchUrl, form, op).catch(function() {
+            form.submit();
+        });
+    });
+}
+
+function submitBatchForm(batchUrl, form, op) {
+    const operation = {op: op};
+    ['document-id', 'comment-id'].forEach(function(attr) {
+        const value = form.getAttribute(`data-${attr}`);
+        if (value) {
+            operation[attr.replace('-', '_')] = value;
+        }
+    });
+    new FormData(form).forEach(function(value, key) {
+        if (value !== '') {
+            operation[key] = key === 'page_number' ? parseInt(value, 10) : value;
+        }
+    });
+    
+    return fetch(batchUrl, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({operations: [operation]})
+    }).then(function(response) {
+        if (!response.ok) {
+            throw new Error(`Batch request failed: ${response.status}`);
+        }
+        form.reset();
+        const modal = form.closest('.modal');
+        if (modal) {
+            bootstrap.Modal.getOrCreateInstance(modal).hide();
+        }
+    });
+}
+
+function setDocumentStatusBadge(documentId, status) {
+    const badge = document.getElementById(`status-badge-${documentId}`);
+    if (badge) {
+        badge.className = `badge ${DOCUMENT_STATUS_BADGES[status] || ''}`;
+        badge.textContent = status;
+    }
+}
+
 // Document view page enhancements
 function setupDocumentView() {
     const commentButtons = document.querySelectorAll('.add-comment-btn');
@@ -76,8 +199,16 @@ function toggleCommentResolution(commentId) {
 
 // Status update functions
 function updateDocumentStatus(documentId, newStatus) {
-    // This would be an AJAX call to update the status
-    console.log(`Updating document ${documentId} to status: ${newStatus}`);
-    // After success, update UI
-    document.getElementById(`status-badge-${documentId}`).textContent = newStatus;
+    const detail = document.getElementById('document-detail');
+    return fetch(detail.getAttribute('data-batch-url'), {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({operations: [
+            {op: 'update_document_status', document_id: documentId, status: newStatus}
+        ]})
+    }).then(function(response) {
+        if (response.ok) {
+            setDocumentStatusBadge(documentId, newStatus);
+        }
+    });
 } 
\ No newline at end of file
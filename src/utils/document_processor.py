@@ -3,11 +3,68 @@ Utilities for processing different document types.
 """
 
 import os
+import io
+import mmap
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
 import PyPDF2
 import docx
 import openpyxl
 import pandas as pd
-from typing import Dict, Any, List, Tuple
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# PDFs with fewer pages than this are extracted serially; below it the cost of
+# starting worker processes and re-parsing the file outweighs the gain.
+PARALLEL_PAGE_THRESHOLD = 32
+
+# Each worker gets this many page ranges so uneven pages balance out.
+RANGES_PER_WORKER = 2
+
+# PDFs at least this large are memory-mapped; smaller ones are read in one call.
+MMAP_THRESHOLD = 1024 * 1024
+
+# Deepest nesting of PDF objects, and of form XObjects, followed when
+# fingerprinting a page; deeper pages aren't fingerprinted, so never reused.
+MAX_FINGERPRINT_DEPTH = 16
+
+# Font entries left out of page fingerprints: embedded font programs are
+# large and don't affect extracted text, and /Parent leads out of the page.
+FINGERPRINT_SKIPPED_KEYS = frozenset({'/FontDescriptor', '/Parent'})
+
+
+# A chunk is a (fingerprint, text) pair: a page of a PDF, a paragraph of a
+# Word document or a row of a spreadsheet. Concatenating the texts of a
+# document's chunks gives its extract_text() output. A fingerprint of None
+# marks a chunk that must never be reused.
+Chunk = Tuple[Optional[str], str]
+
+
+def fingerprint(*parts: Any) -> str:
+    """Return a short stable digest of the given parts."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def load_file_buffer(file_path: str):
+    """
+    Load a whole file into a seekable, readable buffer.
+    
+    Large files are memory-mapped, so reads are served from the OS page cache
+    without a read() syscall per seek; pages not yet mapped still cost a
+    page fault on first access. Smaller files are read with a single
+    bulk read. Either way, parsers get no small reads against the underlying
+    (possibly network-mounted) file.
+    """
+    with open(file_path, 'rb', buffering=0) as file:
+        if os.fstat(file.fileno()).st_size >= MMAP_THRESHOLD:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return io.BytesIO(file.read())
 
 
 class DocumentProcessor:
@@ -17,55 +74,272 @@ class DocumentProcessor:
         """Initialize with file path."""
         self.file_path = file_path
         self.content = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Release the file buffer held in ``content``, if any."""
+        if isinstance(self.content, mmap.mmap):
+            self.content.close()
+        self.content = None
         
     def extract_text(self) -> str:
-        """Extract text from document. To be implemented by subclasses."""
-        raise NotImplementedError("Subclasses must implement extract_text()")
+        """Extract text from document."""
+        return "".join(text for _, text in self.extract_chunks())
+    
+    def extract_chunks(self, known: Optional[Dict[str, str]] = None) -> List[Chunk]:
+        """
+        Extract the document as fingerprinted chunks. To be implemented by subclasses.
+        
+        Args:
+            known: Previously extracted chunk texts keyed by fingerprint; chunks
+                whose fingerprint is found here are reused instead of extracted
+        """
+        raise NotImplementedError("Subclasses must implement extract_chunks()")
     
     def get_metadata(self) -> Dict[str, Any]:
         """Get metadata from document. To be implemented by subclasses."""
         raise NotImplementedError("Subclasses must implement get_metadata()")
 
 
+def _extract_page(pdf_reader: PyPDF2.PdfReader, index: int) -> Optional[str]:
+    """Extract text from a single page, returning None if the page fails."""
+    try:
+        return pdf_reader.pages[index].extract_text()
+    except Exception as e:
+        logger.warning(f"Error extracting text from page {index + 1}: {str(e)}")
+        return None
+
+
+def _extract_page_indices(file_path: str, indices: List[int]) -> List[Optional[str]]:
+    """
+    Extract text from the given 0-based pages of a PDF.
+    
+    Runs inside worker processes, so it opens its own reader. Workers map
+    the same file, so they share its pages in the OS page cache.
+    """
+    buffer = load_file_buffer(file_path)
+    try:
+        pdf_reader = PyPDF2.PdfReader(buffer)
+        return [_extract_page(pdf_reader, index) for index in indices]
+    finally:
+        buffer.close()
+
+
+def _page_fingerprint(pdf_reader: PyPDF2.PdfReader, index: int) -> Optional[str]:
+    """
+    Fingerprint a page from everything its text extraction depends on.
+    
+    That is the content stream, the fonts (including their /Encoding and
+    /ToUnicode maps) and the content and fonts of form XObjects the page
+    draws. This is much cheaper than extracting the page's text. Returns
+    None if the page can't be fingerprinted, so it is always extracted.
+    """
+    try:
+        page = pdf_reader.pages[index]
+        contents = page.get_contents()
+        return fingerprint(contents.get_data() if contents is not None else b'',
+                           _resource_parts(page.get('/Resources')))
+    except Exception as e:
+        logger.warning(f"Error fingerprinting page {index + 1}: {str(e)}")
+        return None
+
+
+def _resource_parts(resources: Any, depth: int = 0) -> List[Any]:
+    """Describe the fonts and form XObjects of a resource dictionary."""
+    if depth > MAX_FINGERPRINT_DEPTH:
+        raise ValueError("Form XObjects nested too deeply to fingerprint")
+    if resources is None:
+        return []
+    resources = resources.get_object()
+    parts = []
+    font_dict = resources.get('/Font')
+    if font_dict is not None:
+        for name, font in sorted(font_dict.get_object().items()):
+            parts.append((name, _describe(font)))
+    xobject_dict = resources.get('/XObject')
+    if xobject_dict is not None:
+        for name, xobject in sorted(xobject_dict.get_object().items()):
+            xobject = xobject.get_object()
+            # Images carry no text
+            if xobject.get('/Subtype') == '/Form':
+                parts.append((name, fingerprint(xobject.get_data()),
+                              _resource_parts(xobject.get('/Resources'), depth + 1)))
+    return parts
+
+
+def _describe(obj: Any, depth: int = 0) -> Any:
+    """Resolve a PDF object into plain data; streams become digests of their data."""
+    if depth > MAX_FINGERPRINT_DEPTH:
+        raise ValueError("PDF object nested too deeply to fingerprint")
+    obj = obj.get_object()
+    if isinstance(obj, PyPDF2.generic.StreamObject):
+        return fingerprint(obj.get_data(), _describe_entries(obj, depth))
+    if isinstance(obj, dict):
+        return _describe_entries(obj, depth)
+    if isinstance(obj, list):
+        return [_describe(item, depth + 1) for item in obj]
+    return obj
+
+
+def _describe_entries(obj: dict, depth: int) -> List[Tuple[str, Any]]:
+    """Describe a PDF dictionary's entries in key order."""
+    return [
+        (str(key), _describe(value, depth + 1)) for key, value in sorted(obj.items())
+        if key not in FINGERPRINT_SKIPPED_KEYS
+    ]
+
+
+def _split_page_ranges(page_count: int, range_count: int) -> List[Tuple[int, int]]:
+    """Split page_count pages into at most range_count contiguous ranges."""
+    range_count = max(1, min(range_count, page_count))
+    size, remainder = divmod(page_count, range_count)
+    ranges = []
+    start = 0
+    for i in range(range_count):
+        stop = start + size + (1 if i < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
 class PDFProcessor(DocumentProcessor):
     """Processor for PDF documents."""
     
-    def extract_text(self) -> str:
-        """Extract text from PDF document."""
-        text = ""
-        with open(self.file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+    def __init__(self, file_path: str, max_workers: Optional[int] = None,
+                 worker_initializer: Optional[Callable[[], None]] = None):
+        """
+        Initialize with file path.
+        
+        Args:
+            file_path: Path to the PDF file
+            max_workers: Number of worker processes for page extraction
+                (defaults to the number of CPUs; 1 forces serial extraction)
+            worker_initializer: Called in each worker process before it
+                extracts pages, e.g. to apply resource limits
+        """
+        super().__init__(file_path)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.worker_initializer = worker_initializer
+        self.failed_pages: List[int] = []
+        self._reader: Optional[PyPDF2.PdfReader] = None
+    
+    def _get_reader(self) -> PyPDF2.PdfReader:
+        """
+        Get a reader over the file, loading it on first use.
+        
+        The buffer and reader are reused by every extract, metadata and
+        page-count call on this processor until close().
+        """
+        if self._reader is None:
+            self.content = load_file_buffer(self.file_path)
+            self._reader = PyPDF2.PdfReader(self.content)
+        return self._reader
+    
+    def close(self):
+        """Release the reader and its file buffer."""
+        self._reader = None
+        super().close()
+    
+    def extract_pages(self) -> List[str]:
+        """
+        Extract the text of every page, in page order.
+        
+        Large PDFs are split into page ranges and extracted across a process
+        pool. A page that fails to extract yields an empty string and its
+        1-based number is recorded in ``failed_pages``.
+        """
+        pdf_reader = self._get_reader()
+        indices = list(range(len(pdf_reader.pages)))
+        results = self._extract_indices(pdf_reader, indices)
+        
+        self._record_failures(indices, results)
+        return [text if text is not None else "" for text in results]
+    
+    def extract_chunks(self, known: Optional[Dict[str, str]] = None) -> List[Chunk]:
+        """Extract one chunk per page, only extracting pages not in known."""
+        known = known or {}
+        pdf_reader = self._get_reader()
+        fingerprints = [
+            _page_fingerprint(pdf_reader, index) for index in range(len(pdf_reader.pages))
+        ]
+        changed = [index for index, fp in enumerate(fingerprints) if fp not in known]
+        results = self._extract_indices(pdf_reader, changed)
+        
+        self._record_failures(changed, results)
+        extracted = dict(zip(changed, results))
+        chunks = []
+        for index, fp in enumerate(fingerprints):
+            if index not in extracted:
+                chunks.append((fp, known[fp]))
+            elif extracted[index] is None:
+                chunks.append((None, "\n"))
+            else:
+                chunks.append((fp, extracted[index] + "\n"))
+        return chunks
+    
+    def _extract_indices(self, pdf_reader: PyPDF2.PdfReader,
+                         indices: List[int]) -> List[Optional[str]]:
+        """Extract the given pages, in parallel when there are enough of them."""
+        if self.max_workers <= 1 or len(indices) < PARALLEL_PAGE_THRESHOLD:
+            return [_extract_page(pdf_reader, index) for index in indices]
+        return self._extract_parallel(indices)
+    
+    def _extract_parallel(self, indices: List[int]) -> List[Optional[str]]:
+        """Extract pages across a process pool, preserving their order."""
+        ranges = _split_page_ranges(len(indices), self.max_workers * RANGES_PER_WORKER)
+        batches = [indices[start:stop] for start, stop in ranges]
+        results: List[Optional[str]] = []
+        with ProcessPoolExecutor(max_workers=self.max_workers,
+                                 initializer=self.worker_initializer) as executor:
+            futures = [
+                executor.submit(_extract_page_indices, self.file_path, batch)
+                for batch in batches
+            ]
+            for batch, future in zip(batches, futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    # A crashed worker only costs its own batch; retry it here
+                    logger.warning(f"Worker failed on pages {batch[0] + 1}-{batch[-1] + 1}: {str(e)}")
+                    results.extend(_extract_page_indices(self.file_path, batch))
+        return results
+    
+    def _record_failures(self, indices: List[int], results: List[Optional[str]]):
+        """Record the 1-based numbers of pages that failed to extract."""
+        self.failed_pages = [index + 1 for index, text in zip(indices, results) if text is None]
     
     def get_metadata(self) -> Dict[str, Any]:
         """Get metadata from PDF document."""
         metadata = {}
-        with open(self.file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            if pdf_reader.metadata:
-                for key, value in pdf_reader.metadata.items():
-                    metadata[key] = value
+        pdf_reader = self._get_reader()
+        if pdf_reader.metadata:
+            for key, value in pdf_reader.metadata.items():
+                metadata[key] = value
         return metadata
     
     def get_page_count(self) -> int:
         """Get the number of pages in the PDF."""
-        with open(self.file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            return len(pdf_reader.pages)
+        return len(self._get_reader().pages)
 
 
 class WordProcessor(DocumentProcessor):
     """Processor for Word documents."""
     
-    def extract_text(self) -> str:
-        """Extract text from Word document."""
+    def extract_chunks(self, known: Optional[Dict[str, str]] = None) -> List[Chunk]:
+        """
+        Extract one chunk per paragraph.
+        
+        python-docx has to parse the whole package to reach any paragraph, so
+        known chunks save no parsing here; the fingerprints still let callers
+        tell which paragraphs changed between versions.
+        """
         doc = docx.Document(self.file_path)
-        text = ""
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-        return text
+        return [(fingerprint(para.text), para.text + "\n") for para in doc.paragraphs]
     
     def get_metadata(self) -> Dict[str, Any]:
         """Get metadata from Word document."""
@@ -88,18 +362,28 @@ class WordProcessor(DocumentProcessor):
 class ExcelProcessor(DocumentProcessor):
     """Processor for Excel documents."""
     
-    def extract_text(self) -> str:
-        """Extract text from Excel document."""
+    def extract_chunks(self, known: Optional[Dict[str, str]] = None) -> List[Chunk]:
+        """
+        Extract one chunk per sheet row, plus a header and trailer per sheet.
+        
+        Rows are fingerprinted from their raw cell values, so formatting the
+        row text is skipped for rows found in known.
+        """
+        known = known or {}
         workbook = openpyxl.load_workbook(self.file_path, data_only=True)
-        text = ""
+        chunks = []
         for sheet_name in workbook.sheetnames:
             sheet = workbook[sheet_name]
-            text += f"Sheet: {sheet_name}\n"
-            for row in sheet.rows:
-                row_text = " | ".join(str(cell.value) if cell.value is not None else "" for cell in row)
-                text += row_text + "\n"
-            text += "\n"
-        return text
+            chunks.append((fingerprint('sheet', sheet_name), f"Sheet: {sheet_name}\n"))
+            for values in sheet.iter_rows(values_only=True):
+                fp = fingerprint('row', values)
+                if fp in known:
+                    chunks.append((fp, known[fp]))
+                    continue
+                row_text = " | ".join(str(value) if value is not None else "" for value in values)
+                chunks.append((fp, row_text + "\n"))
+            chunks.append((fingerprint('end', sheet_name), "\n"))
+        return chunks
     
     def get_metadata(self) -> Dict[str, Any]:
         """Get metadata from Excel document."""
@@ -115,13 +399,23 @@ class ExcelProcessor(DocumentProcessor):
         return pd.read_excel(self.file_path, sheet_name=None)
 
 
-def get_processor_for_file(file_path: str) -> DocumentProcessor:
-    """Factory function to get the appropriate processor for a file."""
+def get_processor_for_file(file_path: str, max_workers: Optional[int] = None,
+                           worker_initializer: Optional[Callable[[], None]] = None) -> DocumentProcessor:
+    """
+    Factory function to get the appropriate processor for a file.
+    
+    Args:
+        file_path: Path of the file
+        max_workers: Worker processes a PDF processor may use for page
+            extraction (defaults to the number of CPUs). The extraction
+            sandbox passes its ``page_workers`` setting here.
+        worker_initializer: Called in each page worker before it starts
+    """
     _, ext = os.path.splitext(file_path)
     ext = ext.lower()
     
     if ext == '.pdf':
-        return PDFProcessor(file_path)
+        return PDFProcessor(file_path, max_workers=max_workers, worker_initializer=worker_initializer)
     elif ext in ['.docx', '.doc']:
         return WordProcessor(file_path)
     elif ext in ['.xlsx', '.xls']:
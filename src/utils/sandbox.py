@@ -0,0 +1,381 @@
+"""
+Upload validation and isolated, resource-limited document extraction.
+"""
+
+import os
+import signal
+import logging
+import functools
+import threading
+import zipfile
+import multiprocessing
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; only the wall-clock limit applies
+    resource = None
+
+from src.utils.document_processor import Chunk, get_processor_for_file
+
+logger = logging.getLogger(__name__)
+
+# Word and Excel files are zip packages; these bound what a package may
+# expand to before any parser touches it.
+MAX_ZIP_ENTRIES = 10000
+MAX_UNCOMPRESSED_BYTES = 512 * 1024 * 1024
+# Entries larger than MIN_RATIO_CHECK_BYTES may not expand more than this
+MAX_COMPRESSION_RATIO = 200
+MIN_RATIO_CHECK_BYTES = 1024 * 1024
+
+# The PDF header must appear within this many leading bytes
+PDF_HEADER_WINDOW = 1024
+
+# Legacy .doc and .xls files are OLE2 compound files, not zip packages
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Reasons recorded when extraction fails
+INVALID = 'invalid'
+TIMEOUT = 'timeout'
+CPU_LIMIT = 'cpu_limit'
+MEMORY_LIMIT = 'memory_limit'
+KILLED = 'killed'
+CRASHED = 'crashed'
+ERROR = 'error'
+
+# Failures that depend on load or outside events rather than on the file,
+# so another attempt may succeed
+TRANSIENT_REASONS = (TIMEOUT, KILLED, CRASHED)
+
+# Operations an extraction job can run
+CHUNKS = 'chunks'
+METADATA = 'metadata'
+
+
+class InvalidDocumentError(ValueError):
+    """Raised when a file fails structural validation."""
+
+
+class ExtractionError(Exception):
+    """Raised when sandboxed extraction fails or exceeds its limits."""
+    
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+
+def validate_document(source: Union[str, BinaryIO], filename: str):
+    """
+    Check a file's structure before it is parsed.
+    
+    PDFs must start with a PDF header. Legacy .doc and .xls files must
+    start with the OLE2 compound file signature. .docx and .xlsx files must
+    be zip packages whose entry count, total size and per-entry compression
+    ratio are within limits, which rejects zip bombs from the central
+    directory alone. Nothing is decompressed.
+    
+    Args:
+        source: Path of the file, or a seekable binary file object (its
+            position is restored afterwards)
+        filename: Name used to determine the file type
+    
+    Raises:
+        InvalidDocumentError: If the file is malformed or exceeds the limits
+    """
+    _, ext = os.path.splitext(filename)
+    ext = ext.lower()
+    position = None if isinstance(source, str) else source.tell()
+    try:
+        if ext == '.pdf':
+            _validate_pdf(source)
+        elif ext in ['.doc', '.xls']:
+            _validate_ole2(source)
+        elif ext in ['.docx', '.xlsx']:
+            _validate_zip(source)
+    finally:
+        if position is not None:
+            source.seek(position)
+
+
+def _validate_pdf(source: Union[str, BinaryIO]):
+    """Check that a PDF header appears near the start of the file."""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            head = f.read(PDF_HEADER_WINDOW)
+    else:
+        head = source.read(PDF_HEADER_WINDOW)
+    if b'%PDF-' not in head:
+        raise InvalidDocumentError("File is not a PDF document")
+
+
+def _validate_ole2(source: Union[str, BinaryIO]):
+    """Check that a legacy Office file starts with the OLE2 signature."""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            head = f.read(len(OLE2_SIGNATURE))
+    else:
+        head = source.read(len(OLE2_SIGNATURE))
+    if head != OLE2_SIGNATURE:
+        raise InvalidDocumentError("File is not a legacy Office document")
+
+
+def _validate_zip(source: Union[str, BinaryIO]):
+    """Check a zip package's central directory against the size limits."""
+    try:
+        with zipfile.ZipFile(source) as package:
+            entries = package.infolist()
+    except (zipfile.BadZipFile, OSError) as e:
+        raise InvalidDocumentError(f"File is not a valid Office document: {str(e)}")
+    
+    if len(entries) > MAX_ZIP_ENTRIES:
+        raise InvalidDocumentError(f"Document has too many parts ({len(entries)})")
+    total = 0
+    for entry in entries:
+        total += entry.file_size
+        if (entry.file_size > MIN_RATIO_CHECK_BYTES
+                and entry.file_size > MAX_COMPRESSION_RATIO * max(entry.compress_size, 1)):
+            raise InvalidDocumentError(f"Document part {entry.filename} is too highly compressed")
+    if total > MAX_UNCOMPRESSED_BYTES:
+        raise InvalidDocumentError(f"Document expands to {total} bytes, over the limit")
+
+
+def _apply_limits(cpu_seconds: int, memory_bytes: int):
+    """Limit the CPU time and address space of the current process."""
+    if resource is None:
+        return
+    # SIGXCPU at the soft limit, SIGKILL a second later if it is ignored
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+def _address_space() -> Optional[int]:
+    """Get the bytes of address space the current process maps, where known."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _limit_page_worker(cpu_seconds: int, memory_bytes: int):
+    """
+    Limit a page worker to its share of the job's budget.
+    
+    Workers are forked from the job process and start out mapping what it
+    maps, so the memory share is allowed on top of that. Where the mapped
+    size can't be read, the worker keeps the job's memory limit.
+    """
+    if resource is None:
+        return
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    used = _address_space()
+    if used is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (used + memory_bytes, used + memory_bytes))
+
+
+def _run_job(conn, file_path: str, operations: Tuple[str, ...], known: Optional[Dict[str, str]],
+             cpu_seconds: int, memory_bytes: int, page_workers: int):
+    """
+    Validate and extract a file inside a sandbox process, sending the results.
+    
+    Every operation runs on one processor, so the file is read into one
+    buffer and parsed once however many results the caller needs.
+    
+    The process leads its own process group, so the parent can kill it,
+    and any page workers it started, if it hangs. Resource limits apply
+    per process, so page workers split the job's CPU and memory budget
+    between them rather than each getting all of it. Large PDFs can then
+    use up to twice the job's budget: once in the workers and once in this
+    process, which mostly waits while they run.
+    """
+    if hasattr(os, 'setsid'):
+        os.setsid()
+    _apply_limits(cpu_seconds, memory_bytes)
+    worker_initializer = functools.partial(
+        _limit_page_worker, max(1, cpu_seconds // page_workers), memory_bytes // page_workers
+    )
+    try:
+        validate_document(file_path, file_path)
+        results = {}
+        with get_processor_for_file(file_path, max_workers=page_workers,
+                                    worker_initializer=worker_initializer) as processor:
+            if CHUNKS in operations:
+                results[CHUNKS] = processor.extract_chunks(known)
+            if METADATA in operations:
+                results[METADATA] = {
+                    key: value if isinstance(value, (str, int, float, bool, list)) else str(value)
+                    for key, value in processor.get_metadata().items()
+                }
+        conn.send(('ok', results))
+    except InvalidDocumentError as e:
+        conn.send(('error', INVALID, str(e)))
+    except MemoryError:
+        conn.send(('error', MEMORY_LIMIT, f"Extraction exceeded the {memory_bytes // (1024 * 1024)} MB memory limit"))
+    except Exception as e:
+        conn.send(('error', ERROR, str(e)))
+    finally:
+        conn.close()
+
+
+class ExtractionSandbox:
+    """
+    Runs document extraction in isolated, resource-limited processes.
+    
+    Each job gets a fresh process with CPU-time and memory limits and a
+    wall-clock timeout, so a malformed or hostile upload can only exhaust
+    its own job. Job processes are never forked from the calling process:
+    the server is multithreaded, and a fork could inherit a lock (logging,
+    the journal, the allocator) held by another thread and deadlock. Where
+    available, jobs are forked from a single-threaded fork server that has
+    the parsers imported already, so per-job startup is still a fork rather
+    than a new interpreter; elsewhere each job is spawned. The number of
+    concurrent jobs is bounded so a burst of bad uploads can't starve the
+    web workers either. Within a job, large PDFs are extracted by a small
+    pool of page workers that share the job's limits.
+    """
+    
+    def __init__(self, cpu_seconds: int = 30, memory_bytes: int = 1024 * 1024 * 1024,
+                 timeout: float = 60.0, max_concurrent_jobs: Optional[int] = None,
+                 page_workers: int = 1):
+        """
+        Initialize the sandbox.
+        
+        Args:
+            cpu_seconds: CPU time each job may use
+            memory_bytes: Address space each job process may map
+            timeout: Wall-clock seconds before a job is killed
+            max_concurrent_jobs: Jobs allowed to run at once (defaults to the
+                number of CPUs)
+            page_workers: Worker processes each job may extract a large
+                PDF's pages with (1 extracts them in the job process)
+        """
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.timeout = timeout
+        self.page_workers = max(1, page_workers)
+        self._slots = threading.BoundedSemaphore(max_concurrent_jobs or os.cpu_count() or 1)
+        
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            self._context = multiprocessing.get_context('forkserver')
+            # Jobs fork from a server that has already imported the parsers
+            self._context.set_forkserver_preload(['src.utils.sandbox'])
+        else:
+            self._context = multiprocessing.get_context('spawn')
+    
+    def extract_chunks(self, file_path: str, known: Optional[Dict[str, str]] = None) -> List[Chunk]:
+        """
+        Extract a file's chunks in a sandbox process.
+        
+        Args:
+            file_path: Path of the file to extract
+            known: Previously extracted chunk texts keyed by fingerprint
+        
+        Returns:
+            List of (fingerprint, text) chunks
+        
+        Raises:
+            ExtractionError: If the file is invalid, extraction fails or a
+                limit is exceeded
+        """
+        return self.extract(file_path, known, (CHUNKS,))[CHUNKS]
+    
+    def get_metadata(self, file_path: str) -> Dict[str, Any]:
+        """
+        Read a file's metadata in a sandbox process.
+        
+        Args:
+            file_path: Path of the file
+        
+        Returns:
+            Document metadata
+        
+        Raises:
+            ExtractionError: If the file is invalid, reading fails or a limit
+                is exceeded
+        """
+        return self.extract(file_path, operations=(METADATA,))[METADATA]
+    
+    def extract(self, file_path: str, known: Optional[Dict[str, str]] = None,
+                operations: Tuple[str, ...] = (CHUNKS, METADATA)) -> Dict[str, Any]:
+        """
+        Run several operations on a file in one sandbox process.
+        
+        The job opens the file once and shares its buffer and parser across
+        the operations, so asking for chunks and metadata together costs one
+        process and one read of the file.
+        
+        Args:
+            file_path: Path of the file to extract
+            known: Previously extracted chunk texts keyed by fingerprint
+            operations: Results to produce, from CHUNKS and METADATA
+        
+        Returns:
+            Dict of each operation's result: a list of (fingerprint, text)
+            chunks for CHUNKS, a metadata dict for METADATA
+        
+        Raises:
+            ExtractionError: If the file is invalid, extraction fails or a
+                limit is exceeded
+        """
+        with self._slots:
+            receiver, sender = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=_run_job,
+                args=(sender, file_path, operations, known, self.cpu_seconds, self.memory_bytes,
+                      self.page_workers),
+                name='extraction-sandbox'
+            )
+            process.start()
+            sender.close()
+            
+            message = None
+            timed_out = False
+            try:
+                if receiver.poll(self.timeout):
+                    try:
+                        message = receiver.recv()
+                    except EOFError:
+                        pass
+                else:
+                    timed_out = True
+            finally:
+                receiver.close()
+                if not timed_out:
+                    process.join(1)
+                # Only while the job is unreaped is its pid, and so its
+                # process group id, certain not to have been reused
+                if timed_out or process.is_alive():
+                    self._kill(process)
+                process.join()
+        
+        if message is not None and message[0] == 'ok':
+            return message[1]
+        if timed_out:
+            error = ExtractionError(TIMEOUT, f"Extraction took longer than {self.timeout:g} seconds")
+        elif message is not None:
+            error = ExtractionError(message[1], message[2])
+        elif hasattr(signal, 'SIGXCPU') and process.exitcode == -signal.SIGXCPU:
+            error = ExtractionError(CPU_LIMIT, f"Extraction exceeded the {self.cpu_seconds} second CPU limit")
+        elif hasattr(signal, 'SIGKILL') and process.exitcode == -signal.SIGKILL:
+            # The CPU limit is enforced with SIGXCPU, which jobs don't catch, so
+            # SIGKILL came from elsewhere: the OOM killer or an operator
+            error = ExtractionError(KILLED, "Extraction process was killed")
+        else:
+            error = ExtractionError(CRASHED, f"Extraction process exited with code {process.exitcode}")
+        logger.warning(f"Extraction of {file_path} failed ({error.reason}): {error.message}")
+        raise error
+    
+    def _kill(self, process):
+        """
+        Kill a job's process group, including any workers it started.
+        
+        The caller must not have joined the job yet.
+        """
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+                return
+            except (ProcessLookupError, PermissionError):
+                pass
+        process.kill()
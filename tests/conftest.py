@@ -0,0 +1,49 @@
+"""
+Shared fixtures.
+"""
+
+import pytest
+
+import src.app as app_module
+from src.core.anchoring import AnchorIndex
+from src.core.batch import BatchProcessor
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.core.duplicates import DuplicateIndex
+from src.core.render_cache import RenderCache
+from src.core.reports import ReportEngine
+from src.core.statistics import ReviewStatistics
+
+
+@pytest.fixture
+def app_managers(tmp_path, monkeypatch):
+    """
+    Give the app empty managers for one test.
+    
+    Everything the routes use that holds or caches documents and comments
+    is replaced, and wired up the way src.app wires the real ones, so the
+    test's uploads and comments never reach the shared managers.
+    
+    Returns:
+        Tuple of the test's (document_manager, comment_manager)
+    """
+    document_manager = DocumentManager(str(tmp_path / 'uploads'),
+                                       sandbox=app_module.document_manager.sandbox)
+    comment_manager = CommentManager(locks=document_manager.locks)
+    review_statistics = ReviewStatistics()
+    review_statistics.attach(document_manager, comment_manager)
+    anchor_index = AnchorIndex(document_manager, comment_manager)
+    anchor_index.attach()
+    document_manager.add_listener(app_module.publish_document_change)
+    comment_manager.add_listener(app_module.publish_comment_change)
+    
+    monkeypatch.setattr(app_module, 'document_manager', document_manager)
+    monkeypatch.setattr(app_module, 'comment_manager', comment_manager)
+    monkeypatch.setattr(app_module, 'render_cache', RenderCache())
+    monkeypatch.setattr(app_module, 'batch_processor', BatchProcessor(document_manager, comment_manager))
+    monkeypatch.setattr(app_module, 'review_statistics', review_statistics)
+    monkeypatch.setattr(app_module, 'anchor_index', anchor_index)
+    monkeypatch.setattr(app_module, 'duplicate_index', DuplicateIndex(document_manager))
+    monkeypatch.setattr(app_module, 'report_engine',
+                        ReportEngine(document_manager, comment_manager, str(tmp_path / 'reports')))
+    return document_manager, comment_manager
@@ -0,0 +1,102 @@
+"""
+Tests for comment anchoring.
+"""
+
+import io
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from src.core.anchoring import AnchorIndex
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.models.document import DocumentType
+
+
+def make_pdf(pages):
+    """Build an in-memory PDF; each page is a list of text lines."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for lines in pages:
+        for n, line in enumerate(lines):
+            pdf.drawString(72, 720 - 14 * n, line)
+        pdf.showPage()
+    pdf.save()
+    buffer.seek(0)
+    return buffer
+
+
+PAGES = [
+    ["PROJECT SCOPE", "Renovation of the third floor nursing unit."],
+    ["INFECTION CONTROL", "Negative pressure barriers at the work zone."],
+    ["EGRESS PLAN", "Two exits maintained at all times."],
+]
+
+
+@pytest.fixture
+def setup(tmp_path):
+    """
+    Upload a three-section PDF into fresh managers with an attached index.
+    
+    Returns:
+        Tuple of (document_manager, comment_manager, index, document ID)
+    """
+    document_manager = DocumentManager(str(tmp_path))
+    comment_manager = CommentManager()
+    index = AnchorIndex(document_manager, comment_manager)
+    index.attach()
+    document = document_manager.upload_document(make_pdf(PAGES), 'icra.pdf',
+                                                DocumentType.SAFETY_RISK_ASSESSMENT)
+    return document_manager, comment_manager, index, document.id
+
+
+def test_comments_are_anchored_to_sections_and_pages(setup):
+    """Test resolving free-text sections and pages to anchors."""
+    document_manager, comment_manager, index, document_id = setup
+    by_section = comment_manager.add_comment(document_id, 'Specify HEPA units', section='infection  control')
+    by_page = comment_manager.add_comment(document_id, 'Show exit signage', page_number=3)
+    bad_page = comment_manager.add_comment(document_id, 'Typo', page_number=40)
+    
+    anchor = index.get_anchor(by_section.id)
+    assert (anchor.page, anchor.section) == (2, 'INFECTION CONTROL')
+    assert index.get_anchor(by_page.id).section == 'EGRESS PLAN'
+    assert index.get_anchor(bad_page.id).page is None
+    
+    later = comment_manager.add_comment(document_id, 'Barrier height?', section='Infection')
+    assert index.comments_for_section(document_id, 'INFECTION CONTROL') == [by_section, later]
+    assert index.comments_for_page(document_id, 3) == [by_page]
+
+
+def test_carry_forward_remaps_through_version_diff(setup):
+    """Test that open comments follow their sections into a new version."""
+    document_manager, comment_manager, index, document_id = setup
+    infection = comment_manager.add_comment(document_id, 'Specify HEPA units', section='INFECTION CONTROL')
+    egress = comment_manager.add_comment(document_id, 'Show exit signage', page_number=3)
+    resolved = comment_manager.add_comment(document_id, 'Fix title', page_number=1)
+    comment_manager.resolve_comment(resolved.id, 'Fixed', 'Reviewer')
+    
+    new_pages = [["PHASING", "Work proceeds in two phases."]] + PAGES
+    new_version = document_manager.create_new_version(document_id, make_pdf(new_pages))
+    carried = index.submit_carry_forward(document_id, new_version.id).result(timeout=30)
+    
+    assert [c.text for c in carried] == [infection.text, egress.text]
+    assert (carried[0].page_number, carried[0].section) == (3, 'INFECTION CONTROL')
+    assert carried[1].page_number == 4
+    assert carried[1].related_comment_ids == (egress.id,)
+    assert new_version.metadata['extraction']['reused'] == 3
+
+
+def test_least_recently_used_outlines_are_evicted(setup):
+    """Test that only max_outlines documents stay outlined and evicted ones are re-anchored."""
+    document_manager, comment_manager, index, document_id = setup
+    index.max_outlines = 1
+    comment = comment_manager.add_comment(document_id, 'Specify HEPA units', section='INFECTION CONTROL')
+    other = document_manager.upload_document(make_pdf(PAGES[:1]), 'scope.pdf', DocumentType.OTHER)
+    
+    assert index.get_anchor(comment.id).section == 'INFECTION CONTROL'
+    index.outline(other.id)
+    assert list(index._outlines) == [other.id]
+    assert comment.id not in index._anchors
+    
+    assert index.comments_for_section(document_id, 'INFECTION CONTROL') == [comment]
+    assert list(index._outlines) == [document_id]
@@ -2,9 +2,11 @@
 Tests for the DocProcessor application.
 """
 
+import io
 import os
 import pytest
-from src.app import app
+from src.app import app, live_updates
+from src.models.document import DocumentStatus, DocumentType
 
 
 @pytest.fixture
@@ -42,4 +44,183 @@ def test_error_404(client):
     """Test 404 error page."""
     response = client.get('/non-existent-page')
     assert response.status_code == 404
-    assert b'Page Not Found' in response.data 
\ No newline at end of file
+    assert b'Page Not Found' in response.data 
+
+def test_documents_page_etag(client, app_managers):
+    """Test that an unchanged documents page is answered with 304."""
+    document_manager, _ = app_managers
+    response = client.get('/documents')
+    etag = response.headers['ETag']
+    
+    response = client.get('/documents', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    
+    document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'sra.pdf', DocumentType.OTHER)
+    response = client.get('/documents', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_batch_api_rejects_invalid_operations(client):
+    """Test that the batch API validates operations before applying them."""
+    response = client.post('/api/batch', json={'operations': [{'op': 'delete_everything'}]})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid batch'
+
+
+def test_batch_changes_are_published_live(client, app_managers):
+    """Test that comments added through the API reach live subscribers."""
+    document_manager, _ = app_managers
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'fp.pdf',
+                                                DocumentType.FUNCTIONAL_PROGRAM)
+    subscriber = live_updates.subscribe(document.id)
+    try:
+        response = client.post('/api/batch', json={'operations': [
+            {'op': 'add_comment', 'document_id': document.id, 'text': 'Label the clean utility room'}
+        ]})
+        assert response.status_code == 200
+        
+        event, data = subscriber.get_nowait()
+        assert event == 'comment_added'
+        assert 'Label the clean utility room' in data['html']
+        assert subscriber.get_nowait() == ('document_status_changed', {'status': 'In Review'})
+    finally:
+        live_updates.unsubscribe(document.id, subscriber)
+
+
+def test_report_export_streams_csv(client, app_managers):
+    """Test that a small comment log is streamed as CSV."""
+    document_manager, comment_manager = app_managers
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'bod.pdf',
+                                                DocumentType.OTHER)
+    comment_manager.add_comment(document.id, 'State the design loads')
+    
+    response = client.get(f'/reports/export?scope=document&document_id={document.id}&format=csv')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert 'attachment' in response.headers['Content-Disposition']
+    assert b'State the design loads' in response.data
+
+
+def test_report_job_download_of_missing_or_expired_job(client, monkeypatch):
+    """Test that unknown jobs get 404 and jobs whose file was evicted get 410."""
+    from src.app import report_engine
+    assert client.get('/reports/jobs/unknown/download').status_code == 404
+    
+    monkeypatch.setattr(report_engine, 'get_job', lambda job_id: {
+        'id': job_id, 'status': 'expired', 'format': 'csv', 'path': None, 'error': None
+    })
+    assert client.get('/reports/jobs/old/download').status_code == 410
+    response = client.get('/reports/jobs/old')
+    assert b'deleted to make room' in response.data
+
+
+def test_upload_rejects_malformed_document(client, app_managers):
+    """Test that files failing validation are not stored."""
+    document_manager, _ = app_managers
+    response = client.post('/upload', data={
+        'file': (io.BytesIO(b'<html></html>'), 'sra.pdf'),
+        'document_type': DocumentType.OTHER.value,
+    })
+    assert response.status_code == 302
+    assert document_manager.get_all_documents() == []
+    assert os.listdir(document_manager.storage_dir) == []
+
+
+def test_duplicate_upload_can_be_attached_as_version(client, app_managers):
+    """Test that a re-uploaded document is flagged and can join the original's history."""
+    from reportlab.pdfgen import canvas
+    
+    import src.app as app_module
+    
+    document_manager, _ = app_managers
+    checks = []
+    submit_check = app_module.duplicate_index.submit_check
+    app_module.duplicate_index.submit_check = lambda document_id: checks.append(submit_check(document_id))
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for line in range(40):
+        pdf.drawString(40, 800 - 18 * line, f"Room {line} requires a handwash sink within {line + 3} metres")
+    pdf.save()
+    
+    document_ids = []
+    for name in ('fp.pdf', 'fp_resubmitted.pdf'):
+        response = client.post('/upload', data={
+            'file': (io.BytesIO(buffer.getvalue()), name),
+            'document_type': DocumentType.FUNCTIONAL_PROGRAM.value,
+        })
+        document_ids.append(response.headers['Location'].rsplit('/', 1)[-1])
+    original_id, duplicate_id = document_ids
+    for check in checks:
+        check.result(timeout=30)
+    
+    response = client.get(f'/documents/{duplicate_id}')
+    assert b'Possible duplicate' in response.data
+    
+    client.post(f'/documents/{duplicate_id}/attach_as_version',
+                data={'parent_document_id': original_id})
+    duplicate = document_manager.get_document(duplicate_id)
+    assert duplicate.parent_document_id == original_id
+    assert duplicate.version == 2
+    assert b'Possible duplicate' not in client.get(f'/documents/{duplicate_id}').data
+
+
+def test_document_events_refused_when_streams_are_full(client, app_managers, monkeypatch):
+    """Test that a live update stream beyond the limit is refused rather than holding a thread."""
+    document_manager, _ = app_managers
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'sra.pdf', DocumentType.OTHER)
+    monkeypatch.setattr(live_updates, 'max_subscribers', 0)
+    
+    response = client.get(f'/documents/{document.id}/events')
+    assert response.status_code == 503
+
+
+def test_comment_form_is_validated(client, app_managers):
+    """Test that form input is validated with the form models before anything changes."""
+    document_manager, comment_manager = app_managers
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'fp.pdf',
+                                                DocumentType.FUNCTIONAL_PROGRAM)
+    
+    response = client.post(f'/documents/{document.id}/add_comment',
+                           data={'text': 'Check corridor widths', 'page_number': 'two'},
+                           follow_redirects=True)
+    assert b'Invalid page number' in response.data
+    response = client.post(f'/documents/{document.id}/add_comment', data={'text': ''},
+                           follow_redirects=True)
+    assert b'Text is required' in response.data
+    response = client.post(f'/documents/{document.id}/update_status', data={'status': 'Shredded'},
+                           follow_redirects=True)
+    assert b'Invalid status' in response.data
+    assert not comment_manager.get_comments_for_document(document.id)
+    
+    response = client.post(f'/documents/{document.id}/add_comment',
+                           data={'text': 'Check corridor widths', 'page_number': '2', 'section': ''})
+    assert response.status_code == 302
+    comment = comment_manager.get_comments_for_document(document.id)[0]
+    assert (comment.page_number, comment.section) == (2, None)
+
+
+def test_form_routes_follow_the_batch_workflow(client, app_managers):
+    """Test that the form routes and the batch API move documents through the same statuses."""
+    document_manager, comment_manager = app_managers
+    by_form, by_batch = [
+        document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), f'sra-{n}.pdf',
+                                         DocumentType.SAFETY_RISK_ASSESSMENT)
+        for n in range(2)
+    ]
+    
+    client.post(f'/documents/{by_form.id}/add_comment', data={'text': 'Add fire exits'})
+    client.post('/api/batch', json={'operations': [
+        {'op': 'add_comment', 'document_id': by_batch.id, 'text': 'Add fire exits'}
+    ]})
+    assert by_form.status == by_batch.status == DocumentStatus.IN_REVIEW
+    
+    for document in (by_form, by_batch):
+        comment = comment_manager.get_comments_for_document(document.id)[0]
+        if document is by_form:
+            client.post(f'/comments/{comment.id}/resolve', data={'resolution_text': 'Added'})
+        else:
+            client.post('/api/batch', json={'operations': [
+                {'op': 'resolve_comment', 'comment_id': comment.id, 'resolution_text': 'Added'}
+            ]})
+    assert by_form.status == by_batch.status == DocumentStatus.REVIEWED
@@ -0,0 +1,61 @@
+"""
+Tests for batch operations.
+"""
+
+import io
+
+import pytest
+
+from src.core.batch import BatchError, BatchProcessor
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.models.batch import BatchRequest
+from src.models.document import CommentStatus, DocumentStatus, DocumentType
+
+
+@pytest.fixture
+def managers(tmp_path):
+    """Create managers with one uploaded document."""
+    document_manager = DocumentManager(str(tmp_path))
+    comment_manager = CommentManager()
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'sra.pdf',
+                                                DocumentType.SAFETY_RISK_ASSESSMENT)
+    return document_manager, comment_manager, document.id
+
+
+def test_batch_add_and_resolve(managers):
+    """Test adding and resolving comments in batches updates status once per batch."""
+    document_manager, comment_manager, document_id = managers
+    processor = BatchProcessor(document_manager, comment_manager)
+    
+    result = processor.apply(BatchRequest.model_validate({'operations': [
+        {'op': 'add_comment', 'document_id': document_id, 'text': f'Comment {n}'}
+        for n in range(3)
+    ]}))
+    assert result['documents'] == {document_id: DocumentStatus.IN_REVIEW.value}
+    
+    comment_ids = [r['id'] for r in result['results']]
+    result = processor.apply(BatchRequest.model_validate({'operations': [
+        {'op': 'resolve_comment', 'comment_id': comment_id, 'resolution_text': 'Fixed'}
+        for comment_id in comment_ids
+    ]}))
+    assert result['documents'] == {document_id: DocumentStatus.REVIEWED.value}
+    assert all(comment_manager.get_comment(c).status == CommentStatus.RESOLVED for c in comment_ids)
+
+
+def test_invalid_operations_are_rejected_before_any_change(managers):
+    """Test that a batch naming a missing comment is rejected before any operation is applied."""
+    document_manager, comment_manager, document_id = managers
+    processor = BatchProcessor(document_manager, comment_manager)
+    
+    batch = BatchRequest.model_validate({'operations': [
+        {'op': 'add_comment', 'document_id': document_id, 'text': 'New comment'},
+        {'op': 'update_document_status', 'document_id': document_id, 'status': 'Approved'},
+        {'op': 'resolve_comment', 'comment_id': 'missing', 'resolution_text': 'Fixed'},
+    ]})
+    with pytest.raises(BatchError) as excinfo:
+        processor.apply(batch)
+    
+    assert excinfo.value.index == 2
+    assert comment_manager.get_comments_for_document(document_id) == []
+    assert document_manager.get_document(document_id).status == DocumentStatus.UPLOADED
@@ -0,0 +1,261 @@
+"""
+Stress tests for the managers under concurrent clients.
+"""
+
+import io
+import sys
+import threading
+
+import pytest
+
+from src.app import app
+from src.core.batch import BatchProcessor
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.core.journal import Journal
+from src.core.statistics import ReviewStatistics
+from src.models.batch import BatchRequest
+from src.models.document import CommentStatus, DocumentStatus, DocumentType
+
+CLIENTS = 32
+
+
+@pytest.fixture(autouse=True)
+def frequent_thread_switches():
+    """Switch threads far more often than usual so races actually interleave."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def run_clients(target, count=CLIENTS):
+    """Run target(index) on count threads started together; re-raise the first error."""
+    barrier = threading.Barrier(count)
+    errors = []
+    
+    def client(index):
+        barrier.wait()
+        try:
+            target(index)
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def lock_is_free(document_manager, document_id):
+    """Check from another thread whether a document's lock could be taken."""
+    result = []
+    
+    def try_lock():
+        lock = document_manager.locks.lock_for(document_id)
+        result.append(lock.acquire(blocking=False))
+        if result[0]:
+            lock.release()
+    
+    thread = threading.Thread(target=try_lock)
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def assert_statistics_consistent(stats, document_manager, comment_manager):
+    """Check that counters kept by listeners agree with a rebuild."""
+    rebuilt = ReviewStatistics()
+    rebuilt.rebuild(document_manager, comment_manager)
+    assert stats.documents_by_status == rebuilt.documents_by_status
+    assert stats.comments_by_status == rebuilt.comments_by_status
+    assert stats.resolution_count == rebuilt.resolution_count
+
+
+def test_concurrent_versions_get_distinct_numbers(tmp_path):
+    """Test that new versions uploaded at once from one parent are numbered uniquely."""
+    document_manager = DocumentManager(str(tmp_path))
+    original = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'fp.pdf',
+                                                DocumentType.FUNCTIONAL_PROGRAM)
+    versions = []
+    
+    def upload(index):
+        versions.append(document_manager.create_new_version(original.id, io.BytesIO(b'%PDF-1.4')))
+    
+    run_clients(upload)
+    
+    assert sorted(v.version for v in versions) == list(range(2, CLIENTS + 2))
+    assert len({document_manager.get_revision(v.id) for v in versions}) == CLIENTS
+    latest = document_manager.create_new_version(original.id, io.BytesIO(b'%PDF-1.4'))
+    assert latest.version == CLIENTS + 2
+
+
+def test_concurrent_batches_keep_counts_and_statuses(tmp_path):
+    """Test that concurrent batch clients leave consistent comments, statuses and statistics."""
+    document_manager = DocumentManager(str(tmp_path))
+    comment_manager = CommentManager(locks=document_manager.locks)
+    stats = ReviewStatistics()
+    stats.attach(document_manager, comment_manager)
+    processor = BatchProcessor(document_manager, comment_manager)
+    documents = [
+        document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), f'sra-{n}.pdf',
+                                         DocumentType.SAFETY_RISK_ASSESSMENT)
+        for n in range(4)
+    ]
+    # Reviewed must only ever be set while the document has no open comments
+    reviewed_with_open_comments = []
+    update_document_status = document_manager.update_document_status
+    
+    def check_reviewed(document_id, status):
+        with document_manager.lock_document(document_id):
+            if (status == DocumentStatus.REVIEWED
+                    and comment_manager.get_open_comments_for_document(document_id)):
+                reviewed_with_open_comments.append(document_id)
+            return update_document_status(document_id, status)
+    
+    document_manager.update_document_status = check_reviewed
+    
+    def review(index):
+        for round_number in range(5):
+            document_id = documents[(index + round_number) % len(documents)].id
+            added = processor.apply(BatchRequest.model_validate({'operations': [
+                {'op': 'add_comment', 'document_id': document_id, 'text': f'{index}-{round_number}-{n}'}
+                for n in range(2)
+            ]}))
+            processor.apply(BatchRequest.model_validate({'operations': [
+                {'op': 'resolve_comment', 'comment_id': result['id'], 'resolution_text': 'Done'}
+                for result in added['results']
+            ]}))
+    
+    run_clients(review)
+    
+    assert not reviewed_with_open_comments
+    assert len(comment_manager.comments) == CLIENTS * 5 * 2
+    assert len({c.id for c in comment_manager.comments.values()}) == CLIENTS * 5 * 2
+    for document in documents:
+        comments = comment_manager.get_comments_for_document(document.id)
+        assert comments and all(c.status == CommentStatus.RESOLVED for c in comments)
+        assert document.status == DocumentStatus.REVIEWED
+    assert_statistics_consistent(stats, document_manager, comment_manager)
+
+
+def test_batch_holds_document_locks_throughout(tmp_path):
+    """Test that a batch keeps its documents locked between operations."""
+    document_manager = DocumentManager(str(tmp_path))
+    comment_manager = CommentManager(locks=document_manager.locks)
+    processor = BatchProcessor(document_manager, comment_manager)
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'fp.pdf',
+                                                DocumentType.FUNCTIONAL_PROGRAM)
+    add_comment = comment_manager.add_comment
+    free_between_operations = []
+    
+    def checked_add_comment(**kwargs):
+        free_between_operations.append(lock_is_free(document_manager, document.id))
+        return add_comment(**kwargs)
+    
+    comment_manager.add_comment = checked_add_comment
+    processor.apply(BatchRequest.model_validate({'operations': [
+        {'op': 'add_comment', 'document_id': document.id, 'text': f'Comment {n}'}
+        for n in range(3)
+    ]}))
+    
+    assert free_between_operations == [False, False, False]
+    assert lock_is_free(document_manager, document.id)
+
+
+def test_concurrent_review_requests(app_managers):
+    """Test that add-then-resolve requests from many clients leave the document reviewed."""
+    document_manager, comment_manager = app_managers
+    app.config['TESTING'] = True
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'hazop.pdf',
+                                                DocumentType.OTHER)
+    
+    def review(index):
+        with app.test_client() as client:
+            for round_number in range(3):
+                text = f'Client {index} round {round_number}'
+                response = client.post(f'/documents/{document.id}/add_comment', data={'text': text})
+                assert response.status_code == 302
+                comment = next(c for c in comment_manager.get_comments_for_document(document.id)
+                               if c.text == text)
+                response = client.post(f'/comments/{comment.id}/resolve',
+                                       data={'resolution_text': 'Done'})
+                assert response.status_code == 302
+    
+    run_clients(review)
+    
+    comments = comment_manager.get_comments_for_document(document.id)
+    assert len(comments) == CLIENTS * 3
+    assert not comment_manager.get_open_comments_for_document(document.id)
+    assert document.status == DocumentStatus.REVIEWED
+
+
+def test_listeners_run_outside_the_lock_in_order(tmp_path):
+    """Test that listeners run after the lock is released and see each change in order."""
+    document_manager = DocumentManager(str(tmp_path))
+    comment_manager = CommentManager(locks=document_manager.locks)
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'sra.pdf',
+                                                DocumentType.SAFETY_RISK_ASSESSMENT)
+    seen = []
+    
+    def listener(event, comment, previous):
+        seen.append((comment.status, lock_is_free(document_manager, document.id)))
+    
+    comment_manager.add_listener(listener)
+    with document_manager.lock_document(document.id):
+        comment = comment_manager.add_comment(document.id, 'Check door schedule')
+        comment_manager.resolve_comment(comment.id, 'Added', 'Reviewer')
+        assert not seen
+    
+    assert seen == [(CommentStatus.OPEN, True), (CommentStatus.RESOLVED, True)]
+
+
+def test_failing_listener_does_not_fail_the_change(tmp_path):
+    """Test that a listener error is logged, not raised, and later events still go out."""
+    document_manager = DocumentManager(str(tmp_path))
+    comment_manager = CommentManager(locks=document_manager.locks)
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'sra.pdf',
+                                                DocumentType.SAFETY_RISK_ASSESSMENT)
+    seen = []
+    
+    def failing(event, comment, previous):
+        raise OSError("Disk full")
+    
+    comment_manager.add_listener(failing)
+    comment_manager.add_listener(lambda event, comment, previous: seen.append(event))
+    with document_manager.lock_document(document.id):
+        comment = comment_manager.add_comment(document.id, 'Check door schedule')
+        comment_manager.resolve_comment(comment.id, 'Added', 'Reviewer')
+    
+    assert seen == ['comment_added', 'comment_resolved']
+    assert comment_manager.get_comment(comment.id).status == CommentStatus.RESOLVED
+
+
+def test_snapshot_while_documents_change(tmp_path):
+    """Test that journal snapshots read records safely while clients change them."""
+    document_manager = DocumentManager(str(tmp_path / 'uploads'))
+    comment_manager = CommentManager(locks=document_manager.locks)
+    journal = Journal(str(tmp_path / 'journal'), fsync_interval=60)
+    journal.attach(document_manager, comment_manager)
+    documents = [
+        document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), f'el-{n}.xlsx',
+                                         DocumentType.EQUIPMENT_LIST)
+        for n in range(4)
+    ]
+    
+    def work(index):
+        for round_number in range(20):
+            if index == 0:
+                journal.snapshot()
+            else:
+                # New metadata keys resize the dict a snapshot may be reading
+                document_manager.update_document_metadata(
+                    documents[index % len(documents)].id, {f'{index}-{round_number}': round_number})
+    
+    try:
+        run_clients(work, count=8)
+    finally:
+        journal.close()
@@ -0,0 +1,59 @@
+"""
+Tests for the document manager.
+"""
+
+import io
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from src.core.document_manager import DocumentManager
+from src.models.document import DocumentType
+
+
+def make_pdf(page_texts):
+    """Build an in-memory PDF with one line of text per page."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    for text in page_texts:
+        pdf.drawString(72, 720, text)
+        pdf.showPage()
+    pdf.save()
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Create a document manager backed by a temporary directory."""
+    return DocumentManager(str(tmp_path))
+
+
+def test_new_version_reuses_unchanged_pages(manager):
+    """Test that only changed pages are re-extracted for a new version."""
+    pages = [f"Room {n} meets clearance requirements" for n in range(1, 6)]
+    original = manager.upload_document(make_pdf(pages), 'sra.pdf',
+                                       DocumentType.SAFETY_RISK_ASSESSMENT)
+    manager.get_document_text(original.id)
+    
+    pages[2] = "Room 3 revised: added handwashing station"
+    new_version = manager.create_new_version(original.id, make_pdf(pages))
+    text = manager.get_document_text(new_version.id)
+    
+    assert "Room 3 revised" in text
+    assert "Room 5 meets" in text
+    assert new_version.metadata['extraction'] == {
+        'chunks': 5,
+        'reused': 4,
+        'base_document_id': original.id,
+    }
+
+
+def test_document_text_without_cached_parent(manager):
+    """Test that a version whose parent was never extracted is extracted in full."""
+    original = manager.upload_document(make_pdf(["Page one"]), 'fp.pdf',
+                                       DocumentType.FUNCTIONAL_PROGRAM)
+    new_version = manager.create_new_version(original.id, make_pdf(["Page one"]))
+    
+    assert manager.get_document_text(new_version.id).strip() == "Page one"
+    assert new_version.metadata['extraction']['reused'] == 0
@@ -0,0 +1,109 @@
+"""
+Tests for the document processors.
+"""
+
+import PyPDF2
+import pytest
+from PyPDF2.generic import DecodedStreamObject, NameObject
+from reportlab.pdfgen import canvas
+
+from src.utils import document_processor
+from src.utils.document_processor import PDFProcessor, _page_fingerprint, _split_page_ranges
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    """Create a small PDF with one line of text per page."""
+    path = str(tmp_path / 'sample.pdf')
+    pdf = canvas.Canvas(path)
+    for page in range(6):
+        pdf.drawString(72, 720, f"Page marker {page + 1}")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+def test_split_page_ranges():
+    """Test that page ranges cover every page exactly once, in order."""
+    assert _split_page_ranges(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert _split_page_ranges(2, 8) == [(0, 1), (1, 2)]
+
+
+def test_parallel_extraction_matches_serial(pdf_path, monkeypatch):
+    """Test that parallel extraction returns pages in the same order as serial."""
+    serial = PDFProcessor(pdf_path, max_workers=1).extract_pages()
+    
+    monkeypatch.setattr(document_processor, 'PARALLEL_PAGE_THRESHOLD', 2)
+    parallel = PDFProcessor(pdf_path, max_workers=2).extract_pages()
+    
+    assert parallel == serial
+    assert [f"Page marker {n}" in text for n, text in enumerate(parallel, 1)] == [True] * 6
+
+
+def test_failed_page_does_not_fail_document(pdf_path, monkeypatch):
+    """Test that a page that fails to extract is recorded and left empty."""
+    original = document_processor.PyPDF2.PageObject.extract_text
+    
+    def flaky_extract_text(page, *args, **kwargs):
+        text = original(page, *args, **kwargs)
+        if 'marker 3' in text:
+            raise ValueError('corrupt content stream')
+        return text
+    
+    monkeypatch.setattr(document_processor.PyPDF2.PageObject, 'extract_text', flaky_extract_text)
+    processor = PDFProcessor(pdf_path, max_workers=1)
+    pages = processor.extract_pages()
+    
+    assert processor.failed_pages == [3]
+    assert pages[2] == ""
+    assert "Page marker 4" in pages[3]
+
+
+def test_reader_is_shared_across_calls(pdf_path, monkeypatch):
+    """Test that text, metadata and page count reuse one loaded buffer."""
+    loads = []
+    original = document_processor.load_file_buffer
+    monkeypatch.setattr(document_processor, 'load_file_buffer',
+                        lambda path: loads.append(path) or original(path))
+    monkeypatch.setattr(document_processor, 'MMAP_THRESHOLD', 1)
+    
+    with PDFProcessor(pdf_path, max_workers=1) as processor:
+        assert "Page marker 1" in processor.extract_text()
+        assert processor.get_page_count() == 6
+        assert processor.get_metadata()
+        assert isinstance(processor.content, document_processor.mmap.mmap)
+    
+    assert loads == [pdf_path]
+    assert processor.content is None
+
+
+def test_page_fingerprint_covers_fonts_and_forms(tmp_path, pdf_path):
+    """Test that font encodings, ToUnicode maps and form XObjects change a page's fingerprint."""
+    reader = PyPDF2.PdfReader(pdf_path)
+    original = _page_fingerprint(reader, 0)
+    font = next(iter(reader.pages[0]['/Resources']['/Font'].values())).get_object()
+    
+    font[NameObject('/Encoding')] = NameObject('/MacRomanEncoding')
+    encoded = _page_fingerprint(reader, 0)
+    to_unicode = DecodedStreamObject()
+    to_unicode.set_data(b'beginbfchar <41> <0042> endbfchar')
+    font[NameObject('/ToUnicode')] = to_unicode
+    mapped = _page_fingerprint(reader, 0)
+    assert len({original, encoded, mapped}) == 3
+    
+    # Pages that only differ inside a form XObject have identical content streams
+    fingerprints = []
+    for text in ('Door schedule', 'Window schedule'):
+        path = str(tmp_path / f'{text}.pdf')
+        pdf = canvas.Canvas(path)
+        pdf.beginForm('schedule')
+        pdf.drawString(72, 720, text)
+        pdf.endForm()
+        pdf.doForm('schedule')
+        pdf.showPage()
+        pdf.save()
+        reader = PyPDF2.PdfReader(path)
+        assert text in reader.pages[0].extract_text()
+        fingerprints.append((reader.pages[0].get_contents().get_data(), _page_fingerprint(reader, 0)))
+    assert fingerprints[0][0] == fingerprints[1][0]
+    assert fingerprints[0][1] != fingerprints[1][1]
@@ -0,0 +1,85 @@
+"""
+Tests for near-duplicate detection.
+"""
+
+import io
+import random
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from src.core.document_manager import DocumentManager
+from src.core.duplicates import DuplicateIndex
+from src.models.document import DocumentType
+
+
+def make_words(seed, count=400):
+    """Generate reproducible filler text."""
+    rng = random.Random(seed)
+    vocabulary = [f"word{n}" for n in range(2000)]
+    return [rng.choice(vocabulary) for _ in range(count)]
+
+
+def make_pdf(words):
+    """Build an in-memory PDF with ten words per line."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer)
+    y = 800
+    for start in range(0, len(words), 10):
+        if y < 50:
+            pdf.showPage()
+            y = 800
+        pdf.drawString(40, y, " ".join(words[start:start + 10]))
+        y -= 14
+    pdf.save()
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Create a document manager backed by a temporary directory."""
+    return DocumentManager(str(tmp_path))
+
+
+def test_reupload_is_matched_but_own_versions_are_not(manager):
+    """Test that a lightly edited re-upload is suggested as a version."""
+    index = DuplicateIndex(manager)
+    words = make_words(1)
+    original = manager.upload_document(make_pdf(words), 'sra.pdf', DocumentType.SAFETY_RISK_ASSESSMENT)
+    assert index.check(original.id) == []
+    unrelated = manager.upload_document(make_pdf(make_words(2)), 'fp.pdf', DocumentType.FUNCTIONAL_PROGRAM)
+    assert index.check(unrelated.id) == []
+    
+    edited = list(words)
+    edited[100:104] = ['revised', 'clearance', 'around', 'equipment']
+    version = manager.create_new_version(original.id, make_pdf(edited))
+    assert index.check(version.id) == []
+    
+    reupload = manager.upload_document(make_pdf(edited), 'sra_final.pdf', DocumentType.SAFETY_RISK_ASSESSMENT)
+    candidates = index.check(reupload.id)
+    assert [c['document_id'] for c in candidates] == [version.id]
+    assert candidates[0]['similarity'] == 1.0
+    assert reupload.metadata['duplicate_candidates'] == candidates
+    assert set(reupload.metadata) == {'extraction', 'duplicate_candidates'}
+    
+    rebuilt = DuplicateIndex(manager)
+    rebuilt.submit_rebuild().result(timeout=60)
+    assert len(rebuilt) == 4
+    signature = rebuilt._signatures[reupload.id]
+    assert rebuilt.query(signature, exclude=[reupload.id])[0] == (version.id, 1.0)
+
+
+def test_attach_as_version(manager):
+    """Test that a separate upload can join another document's history."""
+    original = manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'sra.pdf', DocumentType.OTHER)
+    version = manager.create_new_version(original.id, io.BytesIO(b'%PDF-1.4'))
+    duplicate = manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'sra_v3.pdf', DocumentType.OTHER)
+    
+    manager.attach_as_version(duplicate.id, manager.get_latest_version(original.id).id)
+    assert duplicate.parent_document_id == version.id
+    assert duplicate.version == 3
+    assert manager.get_latest_version(original.id) is duplicate
+    
+    with pytest.raises(ValueError):
+        manager.attach_as_version(version.id, duplicate.id)
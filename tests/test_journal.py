@@ -0,0 +1,130 @@
+"""
+Tests for journal persistence.
+"""
+
+import io
+import os
+
+import pytest
+
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.core import journal as journal_module
+from src.core.journal import JOURNAL_FILE, Journal, JournalCorruptError
+from src.models.document import CommentStatus, DocumentStatus, DocumentType
+
+
+@pytest.fixture
+def journal_dir(tmp_path):
+    """Directory for the snapshot and journal files of one test."""
+    return str(tmp_path / 'journal')
+
+
+def start(tmp_path, journal_dir):
+    """Create managers restored from and journaled to journal_dir."""
+    document_manager = DocumentManager(str(tmp_path / 'uploads'))
+    comment_manager = CommentManager()
+    journal = Journal(journal_dir, fsync_interval=60)
+    report = journal.recover(document_manager, comment_manager)
+    journal.attach(document_manager, comment_manager)
+    return document_manager, comment_manager, journal, report
+
+
+def test_recover_replays_journal(tmp_path, journal_dir):
+    """Test that every mutation survives a restart."""
+    documents, comments, journal, _ = start(tmp_path, journal_dir)
+    original = documents.upload_document(io.BytesIO(b'%PDF-1.4'), 'sra.pdf',
+                                         DocumentType.SAFETY_RISK_ASSESSMENT)
+    first = comments.add_comment(original.id, 'Add corridor widths', page_number=2)
+    second = comments.add_comment(original.id, 'See page 2 comment')
+    comments.link_related_comments(second.id, [first.id])
+    comments.resolve_comment(first.id, 'Dimensions added', 'Reviewer')
+    documents.update_document_status(original.id, DocumentStatus.REVIEWED)
+    new_version = documents.create_new_version(original.id, io.BytesIO(b'%PDF-1.4'))
+    journal.close()
+    
+    documents, comments, journal, report = start(tmp_path, journal_dir)
+    assert report == {'snapshot_records': 0, 'journal_records': 7, 'seconds': report['seconds']}
+    assert documents.get_document(original.id).status == DocumentStatus.REVIEWED
+    assert documents.get_document(new_version.id).parent_document_id == original.id
+    assert comments.get_comment(first.id).status == CommentStatus.RESOLVED
+    assert comments.get_comment(second.id).related_comment_ids == (first.id,)
+    assert len(comments.get_comments_for_document(original.id)) == 2
+    journal.close()
+
+
+def test_snapshot_compacts_journal(tmp_path, journal_dir):
+    """Test recovery from a snapshot plus the journal written after it."""
+    documents, comments, journal, _ = start(tmp_path, journal_dir)
+    document = documents.upload_document(io.BytesIO(b'%PDF-1.4'), 'el.xlsx',
+                                         DocumentType.EQUIPMENT_LIST)
+    comment = comments.add_comment(document.id, 'Missing casework')
+    assert journal.snapshot() == 2
+    comments.resolve_comment(comment.id, 'Added', 'Reviewer')
+    journal.close()
+    
+    # Simulate a crash that tore the last journal line
+    with open(os.path.join(journal_dir, JOURNAL_FILE), 'a') as f:
+        f.write('{"op": "comment_ad')
+    
+    documents, comments, journal, report = start(tmp_path, journal_dir)
+    assert (report['snapshot_records'], report['journal_records']) == (2, 1)
+    assert comments.get_comment(comment.id).status == CommentStatus.RESOLVED
+    documents.update_document_status(document.id, DocumentStatus.REVIEWED)
+    journal.close()
+    
+    documents, comments, journal, report = start(tmp_path, journal_dir)
+    assert report['journal_records'] == 2
+    assert documents.get_document(document.id).status == DocumentStatus.REVIEWED
+    journal.close()
+
+
+def test_interrupted_snapshots_keep_every_segment(tmp_path, journal_dir, monkeypatch):
+    """Test that a second interrupted snapshot doesn't overwrite the first one's segment."""
+    documents, comments, journal, _ = start(tmp_path, journal_dir)
+    document = documents.upload_document(io.BytesIO(b'%PDF-1.4'), 'sra.pdf',
+                                         DocumentType.SAFETY_RISK_ASSESSMENT)
+    
+    def crash(record):
+        raise OSError("No space left on device")
+    
+    # Each snapshot fails after rotating the journal, as a crash would
+    monkeypatch.setattr(journal_module, '_serialize', crash)
+    with pytest.raises(OSError):
+        journal.snapshot()
+    monkeypatch.undo()
+    comment = comments.add_comment(document.id, 'Missing egress widths')
+    monkeypatch.setattr(journal_module, '_serialize', crash)
+    with pytest.raises(OSError):
+        journal.snapshot()
+    monkeypatch.undo()
+    journal.close()
+    
+    documents, comments, journal, report = start(tmp_path, journal_dir)
+    assert report['journal_records'] == 2
+    assert documents.get_document(document.id).filename == document.filename
+    assert comments.get_comment(comment.id).text == 'Missing egress widths'
+    assert journal.snapshot() == 2
+    journal.close()
+    
+    documents, comments, journal, report = start(tmp_path, journal_dir)
+    assert (report['snapshot_records'], report['journal_records']) == (2, 0)
+    journal.close()
+
+
+def test_corrupt_entry_mid_file_fails_recovery(tmp_path, journal_dir):
+    """Test that a damaged line followed by more entries is reported, not truncated."""
+    documents, comments, journal, _ = start(tmp_path, journal_dir)
+    document = documents.upload_document(io.BytesIO(b'%PDF-1.4'), 'fp.pdf',
+                                         DocumentType.FUNCTIONAL_PROGRAM)
+    comments.add_comment(document.id, 'Check room list')
+    journal.close()
+    
+    path = os.path.join(journal_dir, JOURNAL_FILE)
+    with open(path, 'r+b') as f:
+        f.write(b'#')
+    size = os.path.getsize(path)
+    
+    with pytest.raises(JournalCorruptError):
+        start(tmp_path, journal_dir)
+    assert os.path.getsize(path) == size
@@ -0,0 +1,63 @@
+"""
+Tests for live review updates.
+"""
+
+import json
+
+from src.core.live_updates import BUSY_RETRY_MS, LiveUpdateBroker, RELOAD_EVENT
+
+
+def test_stream_delivers_published_events():
+    """Test that events published to a document reach its stream."""
+    broker = LiveUpdateBroker()
+    stream = broker.stream('doc-1')
+    assert next(stream).startswith('retry:')
+    
+    broker.publish('doc-2', 'comment_added', {'comment_id': 'other'})
+    broker.publish('doc-1', 'document_status_changed', {'status': 'Reviewed'})
+    
+    message = next(stream)
+    assert message.startswith('event: document_status_changed\n')
+    assert json.loads(message.split('data: ', 1)[1]) == {'status': 'Reviewed'}
+    
+    stream.close()
+    assert not broker.has_subscribers('doc-1')
+
+
+def test_lagging_subscriber_is_told_to_reload():
+    """Test that an overflowing subscriber gets a single reload event."""
+    broker = LiveUpdateBroker(max_queue_size=2)
+    subscriber = broker.subscribe('doc-1')
+    for n in range(3):
+        broker.publish('doc-1', 'comment_added', {'comment_id': str(n)})
+    
+    assert subscriber.get_nowait() == (RELOAD_EVENT, {})
+    assert subscriber.empty()
+
+
+def test_stream_subscribes_only_when_iterated():
+    """Test that a stream nobody reads from holds no subscription."""
+    broker = LiveUpdateBroker()
+    stream = broker.stream('doc-1')
+    assert not broker.has_subscribers('doc-1')
+    stream.close()
+    
+    stream = broker.stream('doc-1')
+    next(stream)
+    assert broker.has_subscribers('doc-1')
+    stream.close()
+    assert not broker.has_subscribers('doc-1')
+
+
+def test_streams_beyond_the_limit_are_turned_away():
+    """Test that the subscriber limit frees the request instead of holding it."""
+    broker = LiveUpdateBroker(max_subscribers=1)
+    first = broker.stream('doc-1')
+    next(first)
+    assert broker.is_full()
+    
+    assert list(broker.stream('doc-2')) == [f"retry: {BUSY_RETRY_MS}\n\n"]
+    assert not broker.has_subscribers('doc-2')
+    
+    first.close()
+    assert not broker.is_full()
@@ -0,0 +1,49 @@
+"""
+Tests for the compact model records.
+"""
+
+import pytest
+
+from src.models.document import Comment, CommentStatus, Document, DocumentType
+from src.models.records import CommentRecord, DocumentRecord
+
+
+def test_comment_record_round_trip():
+    """Test converting a comment record to a model and back."""
+    record = CommentRecord(id='c1', document_id='d1', text='Add eyewash station',
+                           page_number=4, related_comment_ids=['c2'])
+    model = record.to_model()
+    
+    assert isinstance(model, Comment)
+    assert model.related_comment_ids == ['c2']
+    assert model.status == CommentStatus.OPEN
+    
+    restored = CommentRecord.from_model(model)
+    assert restored.related_comment_ids == ('c2',)
+    assert restored.created_at == record.created_at
+
+
+def test_document_record_metadata_is_lazy():
+    """Test that document metadata is only allocated when used."""
+    record = DocumentRecord(id='d1', filename='d1.pdf', original_filename='sra.pdf',
+                            document_type=DocumentType.SAFETY_RISK_ASSESSMENT)
+    assert record.metadata == {}
+    assert record._metadata is None
+    assert record.to_model().metadata == {}
+    
+    record.metadata = {'pages': 3}
+    assert record.to_model().metadata == {'pages': 3}
+    assert not hasattr(record, '__dict__')
+
+
+def test_document_record_comments_are_explicit():
+    """Test that comments are neither silently dropped nor silently reported empty."""
+    record = DocumentRecord(id='d1', filename='d1.pdf', original_filename='el.xlsx',
+                            document_type=DocumentType.EQUIPMENT_LIST)
+    comment = CommentRecord(id='c1', document_id='d1', text='Missing casework')
+    
+    model = record.to_model([comment])
+    assert [c.text for c in model.comments] == ['Missing casework']
+    with pytest.raises(ValueError):
+        DocumentRecord.from_model(model)
+    assert DocumentRecord.from_model(Document.model_validate(record.to_model().model_dump())).id == 'd1'
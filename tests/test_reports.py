@@ -0,0 +1,144 @@
+"""
+Tests for the report engine.
+"""
+
+import csv
+import io
+import os
+import time
+
+import openpyxl
+import pytest
+
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.core.reports import REPORT_COLUMNS, ReportEngine, ReportFormat
+from src.models.document import CommentStatus, DocumentType
+
+
+def make_engine(tmp_path):
+    """Create a report engine over fresh managers with one uploaded document."""
+    document_manager = DocumentManager(str(tmp_path / 'uploads'))
+    comment_manager = CommentManager()
+    engine = ReportEngine(document_manager, comment_manager, str(tmp_path / 'reports'))
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'spec.pdf',
+                                                DocumentType.OTHER)
+    return engine, document_manager, comment_manager, document
+
+
+def test_csv_report_covers_lineage(tmp_path):
+    """Test that a lineage report includes comments on every version."""
+    engine, document_manager, comment_manager, document = make_engine(tmp_path)
+    first = comment_manager.add_comment(document.id, 'Clarify scope', page_number=2)
+    comment_manager.resolve_comment(first.id, 'Clarified', 'Reviewer')
+    new_version = document_manager.create_new_version(document.id, io.BytesIO(b'%PDF-1.4'))
+    comment_manager.add_comment(new_version.id, 'Check references')
+    
+    document_ids = engine.select_documents('lineage', document_id=new_version.id)
+    rows = list(csv.reader(io.StringIO(''.join(engine.stream_csv(document_ids)))))
+    assert rows[0] == REPORT_COLUMNS
+    assert [row[6] for row in rows[1:]] == ['Clarify scope', 'Check references']
+    assert rows[1][9] == 'Clarified'
+    
+    open_rows = list(engine.iter_rows(document_ids, CommentStatus.OPEN))
+    assert [row[6] for row in open_rows] == ['Check references']
+
+
+def test_built_report_is_reused_until_data_changes(tmp_path):
+    """Test that cached report files are invalidated by new comments."""
+    engine, _, comment_manager, document = make_engine(tmp_path)
+    comment_manager.add_comment(document.id, 'Clarify scope')
+    
+    first = engine.build(ReportFormat.CSV, [document.id])
+    assert engine.build(ReportFormat.CSV, [document.id]) == first
+    
+    comment_manager.add_comment(document.id, 'Check references')
+    second = engine.build(ReportFormat.CSV, [document.id])
+    assert second != first
+    with open(second, encoding='utf-8') as f:
+        assert len(list(csv.reader(f))) == 3
+
+
+def test_xlsx_and_pdf_reports(tmp_path):
+    """Test the spreadsheet and PDF outputs, including a background job."""
+    engine, _, comment_manager, document = make_engine(tmp_path)
+    for n in range(200):
+        comment_manager.add_comment(document.id, f'Comment {n} ' + 'detail ' * 20)
+    
+    workbook = openpyxl.load_workbook(engine.build(ReportFormat.XLSX, [document.id]))
+    assert workbook['Comments'].max_row == 201
+    
+    job_id = engine.submit(ReportFormat.PDF, [document.id])
+    for _ in range(100):
+        job = engine.get_job(job_id)
+        if job['status'] in ('done', 'failed'):
+            break
+        time.sleep(0.05)
+    assert job['status'] == 'done'
+    with open(job['path'], 'rb') as f:
+        assert f.read(5) == b'%PDF-'
+
+
+def wait_for_job(engine, job_id):
+    """Poll a background job until it stops running."""
+    for _ in range(100):
+        job = engine.get_job(job_id)
+        if job['status'] not in ('pending', 'running'):
+            return job
+        time.sleep(0.05)
+    return job
+
+
+def test_evicted_report_expires_its_job(tmp_path):
+    """Test that evicting a report file marks its job expired and old jobs are forgotten."""
+    engine, _, comment_manager, document = make_engine(tmp_path)
+    engine.max_cached_reports = 1
+    engine.max_jobs = 2
+    comment_manager.add_comment(document.id, 'Clarify scope')
+    
+    job_id = engine.submit(ReportFormat.CSV, [document.id])
+    assert wait_for_job(engine, job_id)['status'] == 'done'
+    
+    comment_manager.add_comment(document.id, 'Check references')
+    engine.build(ReportFormat.CSV, [document.id])
+    job = engine.get_job(job_id)
+    assert job['status'] == 'expired' and job['path'] is None
+    
+    for _ in range(2):
+        wait_for_job(engine, engine.submit(ReportFormat.CSV, [document.id]))
+    with pytest.raises(KeyError):
+        engine.get_job(job_id)
+
+
+def test_formula_like_comments_are_neutralized(tmp_path):
+    """Test that comment text starting with '=' is exported as text, not a formula."""
+    engine, _, comment_manager, document = make_engine(tmp_path)
+    comment_manager.add_comment(document.id, '=HYPERLINK("http://example.com","x")')
+    comment_manager.add_comment(document.id, '-2 mm tolerance')
+    
+    rows = list(csv.reader(io.StringIO(''.join(engine.stream_csv([document.id])))))
+    assert [row[6] for row in rows[1:]] == ['\'=HYPERLINK("http://example.com","x")', "'-2 mm tolerance"]
+    
+    sheet = openpyxl.load_workbook(engine.build(ReportFormat.XLSX, [document.id]))['Comments']
+    cell = sheet.cell(row=2, column=7)
+    assert cell.data_type == 's'
+    assert cell.value == '=HYPERLINK("http://example.com","x")'
+
+
+def test_report_files_are_not_left_behind(tmp_path, monkeypatch):
+    """Test that failed builds remove their temp file and old reports are cleared at startup."""
+    engine, document_manager, comment_manager, document = make_engine(tmp_path)
+    comment_manager.add_comment(document.id, 'Clarify scope')
+    finished = engine.build(ReportFormat.XLSX, [document.id])
+    
+    def failing_rows(document_ids, comment_status=None):
+        yield ['Partial row']
+        raise OSError("Disk full")
+    
+    monkeypatch.setattr(engine, 'iter_rows', failing_rows)
+    with pytest.raises(OSError):
+        engine.build(ReportFormat.CSV, [document.id])
+    assert os.listdir(engine.output_dir) == [os.path.basename(finished)]
+    
+    ReportEngine(document_manager, comment_manager, engine.output_dir)
+    assert os.listdir(engine.output_dir) == []
@@ -0,0 +1,29 @@
+"""
+Tests for the production server.
+"""
+
+import http.client
+import threading
+
+from src.app import app
+from src.run import PooledWSGIServer
+
+
+def test_pooled_server_serves_and_drains():
+    """Test that the pooled server answers requests and stops cleanly."""
+    server = PooledWSGIServer('127.0.0.1', 0, app, threads=2)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+        for _ in range(3):  # One keep-alive connection
+            connection.request('GET', '/api/stats')
+            response = connection.getresponse()
+            assert response.status == 200
+            assert b'documents' in response.read()
+        connection.close()
+    finally:
+        server.shutdown()
+        thread.join(5)
+    assert not thread.is_alive()
+
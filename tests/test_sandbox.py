@@ -0,0 +1,149 @@
+"""
+Tests for upload validation and the extraction sandbox.
+"""
+
+import io
+import os
+import zipfile
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from src.core.document_manager import DocumentManager
+from src.models.document import DocumentType
+from src.utils.document_processor import PARALLEL_PAGE_THRESHOLD
+from src.utils.sandbox import (ExtractionError, ExtractionSandbox, InvalidDocumentError,
+                               INVALID, OLE2_SIGNATURE, TIMEOUT, validate_document)
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    """Create a two-page PDF."""
+    path = str(tmp_path / 'sample.pdf')
+    pdf = canvas.Canvas(path)
+    for page in range(2):
+        pdf.drawString(72, 720, f"Page marker {page + 1}")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+@pytest.fixture
+def hanging_path(tmp_path):
+    """Create a FIFO named like a PDF; reading it blocks until the job is killed."""
+    path = str(tmp_path / 'hanging.pdf')
+    os.mkfifo(path)
+    return path
+
+
+def test_validate_rejects_zip_bomb():
+    """Test that highly compressed packages are rejected from the directory alone."""
+    bomb = io.BytesIO()
+    with zipfile.ZipFile(bomb, 'w', zipfile.ZIP_DEFLATED) as package:
+        package.writestr('[Content_Types].xml', '<Types/>')
+        package.writestr('word/document.xml', b'\x00' * (8 * 1024 * 1024))
+    bomb.seek(0)
+    
+    with pytest.raises(InvalidDocumentError, match='too highly compressed'):
+        validate_document(bomb, 'bomb.docx')
+    assert bomb.tell() == 0
+    
+    with pytest.raises(InvalidDocumentError):
+        validate_document(io.BytesIO(b'%PDF-1.4'), 'renamed.xlsx')
+    with pytest.raises(InvalidDocumentError):
+        validate_document(io.BytesIO(b'PK\x03\x04'), 'spec.pdf')
+
+
+def test_validate_legacy_office_files():
+    """Test that .doc and .xls files are checked as OLE2 files, not zip packages."""
+    validate_document(io.BytesIO(OLE2_SIGNATURE + b'\x00' * 504), 'spec.doc')
+    validate_document(io.BytesIO(OLE2_SIGNATURE + b'\x00' * 504), 'equipment.xls')
+    with pytest.raises(InvalidDocumentError):
+        validate_document(io.BytesIO(b'PK\x03\x04'), 'equipment.xls')
+
+
+def test_sandbox_extracts_and_enforces_timeout(pdf_path, hanging_path):
+    """Test that sandboxed extraction returns chunks and kills slow jobs."""
+    chunks = ExtractionSandbox().extract_chunks(pdf_path)
+    assert [text.strip() for _, text in chunks] == ["Page marker 1", "Page marker 2"]
+    
+    with pytest.raises(ExtractionError) as error:
+        ExtractionSandbox(timeout=1).extract_chunks(hanging_path)
+    assert error.value.reason == TIMEOUT
+
+
+def test_failed_extraction_is_recorded_and_not_retried(tmp_path):
+    """Test that a bad upload's failure is stored on the document."""
+    manager = DocumentManager(str(tmp_path))
+    events = []
+    manager.add_listener(lambda event, document, previous: events.append(event))
+    document = manager.upload_document(io.BytesIO(b'not a pdf'), 'sra.pdf', DocumentType.OTHER)
+    
+    with pytest.raises(ExtractionError):
+        manager.get_document_text(document.id)
+    assert document.metadata['extraction_error']['reason'] == INVALID
+    assert events == ['document_added', 'document_extraction_failed']
+    
+    manager.sandbox = None  # A retry would fail on the missing sandbox
+    with pytest.raises(ExtractionError):
+        manager.get_document_chunks(document.id)
+
+
+def test_transient_failure_is_retried(tmp_path, pdf_path):
+    """Test that a timed-out extraction is retried and its record cleared."""
+    manager = DocumentManager(str(tmp_path / 'uploads'), sandbox=ExtractionSandbox(timeout=1))
+    with open(pdf_path, 'rb') as f:
+        document = manager.upload_document(f, 'sra.pdf', DocumentType.OTHER)
+    stored_path = os.path.join(manager.storage_dir, document.filename)
+    os.replace(stored_path, pdf_path)
+    os.mkfifo(stored_path)
+    
+    with pytest.raises(ExtractionError):
+        manager.get_document_text(document.id)
+    assert document.metadata['extraction_error']['reason'] == TIMEOUT
+    
+    os.replace(pdf_path, stored_path)
+    assert 'Page marker 1' in manager.get_document_text(document.id)
+    assert 'extraction_error' not in document.metadata
+
+
+def test_chunks_and_metadata_share_one_job(tmp_path, pdf_path):
+    """Test that a document's chunks and metadata come from a single sandbox job."""
+    manager = DocumentManager(str(tmp_path / 'uploads'))
+    with open(pdf_path, 'rb') as f:
+        document = manager.upload_document(f, 'sra.pdf', DocumentType.OTHER)
+    jobs = []
+    extract = manager.sandbox.extract
+    
+    def counted_extract(*args, **kwargs):
+        jobs.append(args)
+        return extract(*args, **kwargs)
+    
+    manager.sandbox.extract = counted_extract
+    assert len(manager.get_document_chunks(document.id)) == 2
+    assert 'ReportLab' in manager.get_document_metadata(document.id)['/Producer']
+    assert manager.get_document_chunks(document.id)
+    assert len(jobs) == 1
+
+
+def test_large_pdfs_are_extracted_by_page_workers(tmp_path):
+    """Test that a job hands a large PDF's pages to its workers and keeps their order."""
+    path = str(tmp_path / 'large.pdf')
+    pdf = canvas.Canvas(path)
+    for page in range(PARALLEL_PAGE_THRESHOLD + 8):
+        pdf.drawString(72, 720, f"Page marker {page + 1}")
+        pdf.showPage()
+    pdf.save()
+    
+    chunks = ExtractionSandbox(page_workers=2).extract_chunks(path)
+    assert [text.strip() for _, text in chunks] == [
+        f"Page marker {page + 1}" for page in range(PARALLEL_PAGE_THRESHOLD + 8)
+    ]
+
+
+def test_finished_jobs_are_not_signalled(pdf_path, monkeypatch):
+    """Test that only jobs still running are killed, so a reused pid is never signalled."""
+    killed = []
+    monkeypatch.setattr(os, 'killpg', lambda pid, sig: killed.append(pid))
+    ExtractionSandbox().extract_chunks(pdf_path)
+    assert killed == []
@@ -0,0 +1,37 @@
+"""
+Tests for the review statistics.
+"""
+
+import io
+
+from src.core.comment_manager import CommentManager
+from src.core.document_manager import DocumentManager
+from src.core.statistics import ReviewStatistics
+from src.models.document import DocumentStatus, DocumentType
+
+
+def test_incremental_statistics_match_rebuild(tmp_path):
+    """Test that incremental counters agree with a bulk rebuild."""
+    document_manager = DocumentManager(str(tmp_path))
+    comment_manager = CommentManager()
+    stats = ReviewStatistics()
+    stats.attach(document_manager, comment_manager)
+    
+    document = document_manager.upload_document(io.BytesIO(b'%PDF-1.4'), 'el.xlsx',
+                                                DocumentType.EQUIPMENT_LIST)
+    document_manager.update_document_status(document.id, DocumentStatus.IN_REVIEW)
+    first = comment_manager.add_comment(document.id, 'Missing model numbers')
+    comment_manager.add_comment(document.id, 'Confirm quantities')
+    comment_manager.resolve_comment(first.id, 'Added', 'Reviewer')
+    comment_manager.resolve_comment(first.id, 'Added again', 'Reviewer')
+    
+    snapshot = stats.snapshot()
+    assert snapshot['documents']['by_status']['In Review'] == 1
+    assert snapshot['documents']['by_type']['Equipment List'] == 1
+    assert snapshot['comments']['open'] == 1
+    assert snapshot['comments']['resolved'] == 1
+    assert stats.resolution_count == 1
+    
+    rebuilt = ReviewStatistics()
+    rebuilt.rebuild(document_manager, comment_manager)
+    assert rebuilt.snapshot() == snapshot